@@ -0,0 +1,151 @@
+import importlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from ..core.cache import content_hash
+from ..core.profiling import PROFILER, Profiler, ProfilingCallbackHandler
+from .common.assistant_pool import AssistantPool
+
+DEFAULT_CONCURRENCY = 4
+
+
+@dataclass
+class BatchJob:
+    id: str
+    base_dir: str
+    prompt: str
+    model: Optional[str] = None
+
+
+def load_jobs(path: str) -> List[BatchJob]:
+    """
+    Reads `{"base_dir": ..., "prompt": ..., "model"?: ..., "id"?: ...}` lines.
+
+    Jobs without an `id` get one derived from their content, so a resumed run
+    recognises them even if the file was reordered.
+    """
+    jobs = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+                base_dir, prompt = data["base_dir"], data["prompt"]
+            except (ValueError, KeyError) as e:
+                raise ValueError(f"{path}:{number}: expected a JSON object with 'base_dir' and 'prompt' ({e})")
+            model = data.get("model")
+            job_id = str(data.get("id") or content_hash(json.dumps([base_dir, prompt, model]))[:16])
+            jobs.append(BatchJob(id=job_id, base_dir=base_dir, prompt=prompt, model=model))
+    return jobs
+
+
+def completed_job_ids(output_path: str) -> Set[str]:
+    """Ids of the jobs that already succeeded in an earlier (possibly interrupted) run."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by the interruption
+            if result.get("status") == "ok":
+                done.add(result["id"])
+    return done
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def load_llm_factory(spec: str) -> Callable[[str], object]:
+    """Imports an LLM factory given as `package.module:function`; it is called with the model name."""
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"Expected 'module:function', got '{spec}'")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class BatchRunner:
+    """
+    Runs assistant prompts over many repositories without a human in the loop.
+
+    At most `concurrency` jobs, and therefore LLM requests, are in flight at
+    once. Assistants come from an `AssistantPool`, so each repository's forge
+    and each model's client are reused across jobs. Jobs are grouped by
+    repository to make that reuse likely. Every result is appended to the
+    output JSONL as soon as it finishes, with its timings and token counts.
+    A shared `response_cache` keys its answers by repository as well as by
+    prompt.
+    """
+
+    def __init__(self, llm_factory: Callable[[str], object], default_model: str,
+                 concurrency: int = DEFAULT_CONCURRENCY, assistant_name: str = "react_assistant",
+                 pool_size: Optional[int] = None, **assistant_options):
+        self.default_model = default_model
+        self.concurrency = concurrency
+        self.assistant_name = assistant_name
+        self.pool = AssistantPool(llm_factory, max_size=pool_size or max(2 * concurrency, 8), **assistant_options)
+        self._write_lock = threading.Lock()
+
+    def run_job(self, job: BatchJob) -> Dict:
+        model = job.model or self.default_model
+        stats = Profiler()
+        stats.enable()
+        callbacks = [ProfilingCallbackHandler(stats)]
+        if PROFILER.enabled:
+            callbacks.append(ProfilingCallbackHandler())
+        result = {"id": job.id, "base_dir": job.base_dir, "model": model, "prompt": job.prompt}
+        started = time.perf_counter()
+        result["started_at"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime())
+        try:
+            config = {"configurable": {"thread_id": str(uuid.uuid4())}, "callbacks": callbacks}
+            with self.pool.lease(self.assistant_name, model, job.base_dir) as agent:
+                response = agent.invoke({"messages": [("user", job.prompt)]}, config=config)
+            result.update(status="ok", response=response["messages"][-1].content)
+        except Exception as e:
+            result.update(status="error", error=f"{type(e).__name__}: {e}")
+        spans, counters = stats.spans(), stats.counters()
+        result.update(
+            duration_s=round(time.perf_counter() - started, 4),
+            llm_s=round(spans.get("llm.call", {}).get("total", 0.0), 4),
+            tool_s=round(spans.get("agent.tool_call", {}).get("total", 0.0), 4),
+            llm_calls=int(counters.get("llm.calls", 0)),
+            tool_calls=int(counters.get("agent.tool_calls", 0)),
+            input_tokens=int(counters.get("llm.input_tokens", 0)),
+            output_tokens=int(counters.get("llm.output_tokens", 0)),
+        )
+        return result
+
+    def run(self, jobs: Iterable[BatchJob], output_path: str, resume: bool = True) -> Dict[str, int]:
+        """Runs `jobs` (skipping ones already completed when `resume`) and returns status counts."""
+        jobs = list(jobs)
+        done = completed_job_ids(output_path) if resume else set()
+        pending = sorted((job for job in jobs if job.id not in done), key=lambda job: os.path.abspath(job.base_dir))
+        summary = {"total": len(jobs), "skipped": len(jobs) - len(pending), "ok": 0, "error": 0}
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+            if out.tell() and not _ends_with_newline(output_path):
+                out.write("\n")  # Close a line cut short by an interruption
+
+            def run_and_record(job: BatchJob) -> None:
+                result = self.run_job(job)
+                with self._write_lock:
+                    out.write(json.dumps(result) + "\n")
+                    out.flush()  # ✅ Finished jobs survive an interruption
+                    summary[result["status"]] += 1
+
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch-job") as executor:
+                list(executor.map(run_and_record, pending))
+        return summary
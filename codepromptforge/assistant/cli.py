@@ -1,9 +1,13 @@
+import json
 import sys
 import subprocess
 import uuid
-from .common import AssistantRegistry
+from .common import AssistantRegistry, ResponseCache
+from .common.ollama_models import DEFAULT_KEEP_ALIVE, get_model_catalog, parse_keep_alive
+from .batch import DEFAULT_CONCURRENCY, BatchRunner, load_jobs, load_llm_factory
+from ..core.main import TOOL_PROFILES
+from ..core.profiling import PROFILER, ProfilingCallbackHandler
 from langchain_ollama import ChatOllama
-import ollama
 
 #############################
 # Assistant Module Utilities#
@@ -12,11 +16,12 @@ class ModelNotFoundError(Exception):
     """Custom exception to handle missing Ollama models."""
     pass
 
-def check_if_model_exists(model_name):
-    available_models = [m["model"] for m in ollama.list()["models"]]
-    if model_name in available_models:
+def check_if_model_exists(model_name, host=None):
+    catalog = get_model_catalog(host)
+    if catalog.has_model(model_name):
         return True
     else:
+        available_models = catalog.list_models()
         error_message = (
             f"❌ Model '{model_name}' not found in Ollama.\n"
             f"📥 To download it, run:\n\n"
@@ -28,22 +33,28 @@ def check_if_model_exists(model_name):
 #########################
 # Assistant CLI Handlers#
 #########################
-def start_assistant(model_name, base_dir, temperature, num_ctx):
+def start_assistant(model_name, base_dir, temperature, num_ctx, keep_alive=DEFAULT_KEEP_ALIVE, host=None, warm_up=True,
+                    response_cache=None, tool_profile="full"):
     try:
-        check_if_model_exists(model_name)
+        check_if_model_exists(model_name, host)
         print("✅ Model is available.")
     except ModelNotFoundError as e:
         print(e, file=sys.stderr)
         sys.exit(1)
-    llm = ChatOllama(model=model_name, temperature=temperature, num_ctx=num_ctx)
+    if warm_up:
+        # Load the model while the agent is being built and the user is typing
+        get_model_catalog(host).warm_up_in_background(model_name, num_ctx=num_ctx, keep_alive=keep_alive)
+    llm = ChatOllama(model=model_name, temperature=temperature, num_ctx=num_ctx, keep_alive=keep_alive, base_url=host)
     assistant_name = "react_assistant"
     if assistant_name not in AssistantRegistry.list_assistants():
         print(f"Error: Assistant '{assistant_name}' is not available.", file=sys.stderr)
         sys.exit(1)
-    agent = AssistantRegistry.get_assistant(assistant_name, llm, base_dir)
+    agent = AssistantRegistry.get_assistant(assistant_name, llm, base_dir, response_cache=response_cache,
+                                            tool_profile=tool_profile)
     print(f"🔹 Running '{assistant_name}' assistant with Ollama model: {model_name}")
     print("💬 Type your messages below. Type 'exit' to quit.\n")
     thread_id = str(uuid.uuid4())
+    callbacks = [ProfilingCallbackHandler()] if PROFILER.enabled else []
     while True:
         user_input = input("User: ")
         if user_input.lower() in ["exit", "quit"]:
@@ -51,7 +62,7 @@ def start_assistant(model_name, base_dir, temperature, num_ctx):
             break
         try:
             inputs = {"messages": [("user", user_input)]}
-            config = {"configurable": {"thread_id": thread_id}}
+            config = {"configurable": {"thread_id": thread_id}, "callbacks": callbacks}
             response = agent.invoke(inputs, config=config)
             if isinstance(response, dict) and "messages" in response:
                 print(f"Assistant: {response['messages'][-1].content}")
@@ -62,9 +73,25 @@ def start_assistant(model_name, base_dir, temperature, num_ctx):
 
 import subprocess
 
-def start_server(model_name, base_dir):
+def start_server(model_name, base_dir, num_ctx=None, keep_alive=DEFAULT_KEEP_ALIVE, host=None, warm_up=True,
+                 cache_args=(), repos=(), pool_size=None, tool_profile="full", metrics=False):
     print(f"🚀 Starting web server with model '{model_name}' and base directory '{base_dir}'...")
-    subprocess.run(["python", "-m", "codepromptforge.assistant.web_assistant.app", "--model", model_name, "--base-dir", base_dir])
+    command = ["python", "-m", "codepromptforge.assistant.web_assistant.app", "--model", model_name, "--base-dir", base_dir,
+               "--keep-alive", str(keep_alive), "--tool-profile", tool_profile]
+    if num_ctx:
+        command += ["--num_ctx", str(num_ctx)]
+    if host:
+        command += ["--ollama-host", host]
+    if not warm_up:
+        command.append("--no-warmup")
+    for repo in repos:
+        command += ["--repo", repo]
+    if pool_size:
+        command += ["--pool-size", str(pool_size)]
+    if metrics:
+        command.append("--metrics")
+    command += list(cache_args)
+    subprocess.run(command)
 
 ###############################
 # Assistant Commands Registration
@@ -76,16 +103,124 @@ def register_commands(subparsers):
     parser_assistant.add_argument("--base-dir", required=True, help="Base directory for assistant operations")
     parser_assistant.add_argument("--temperature", type=float, default=0.0, help="Temperature setting for the model")
     parser_assistant.add_argument("--num_ctx", type=int, default=80000, help="Context length for the model")
+    add_ollama_arguments(parser_assistant)
+    add_tool_profile_argument(parser_assistant)
+    add_cache_arguments(parser_assistant)
     parser_assistant.set_defaults(func=handle_assistant)
 
     # Register web assistant command
     parser_web = subparsers.add_parser("web_assistant", help="Start the advanced web assistant server")
     parser_web.add_argument("--model", required=True, help="Ollama model to use")
     parser_web.add_argument("--base-dir", required=True, help="Base directory for assistant operations")
+    parser_web.add_argument("--num_ctx", type=int, default=None, help="Context length for the model")
+    parser_web.add_argument("--repo", action="append", default=[], help="Additional base directory users may switch to (repeatable)")
+    parser_web.add_argument("--pool-size", type=int, default=None, help="Maximum number of (model, repository) assistants kept in memory")
+    parser_web.add_argument("--metrics", action="store_true", help="Collect timings and serve them at /metrics")
+    add_ollama_arguments(parser_web)
+    add_tool_profile_argument(parser_web)
+    add_cache_arguments(parser_web)
     parser_web.set_defaults(func=handle_web)
 
+    # Register batch assistant command
+    parser_batch = subparsers.add_parser("batch_assistant", help="Run a JSONL file of (base_dir, prompt) jobs without interaction")
+    parser_batch.add_argument("--jobs", required=True, help="JSONL file with one {\"base_dir\", \"prompt\"[, \"model\", \"id\"]} object per line")
+    parser_batch.add_argument("--output", required=True, help="JSONL file the results are appended to")
+    parser_batch.add_argument("--model", required=True, help="Model for jobs that do not name one")
+    parser_batch.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Maximum number of jobs (LLM requests) in flight")
+    parser_batch.add_argument("--no-resume", dest="resume", action="store_false", help="Rerun every job and overwrite --output")
+    parser_batch.add_argument("--llm", help="LLM factory as module:function called with the model name (e.g. codepromptforge.assistant.common.fake_llm:build_fake_llm)")
+    parser_batch.add_argument("--temperature", type=float, default=0.0, help="Temperature setting for the model")
+    parser_batch.add_argument("--num_ctx", type=int, default=80000, help="Context length for the model")
+    add_ollama_arguments(parser_batch)
+    add_tool_profile_argument(parser_batch)
+    add_cache_arguments(parser_batch)
+    parser_batch.set_defaults(func=handle_batch)
+
+    # Register web assistant load test command
+    parser_load = subparsers.add_parser("load_test", help="Replay scripted chat sessions against the web assistant with a fake LLM")
+    parser_load.add_argument("--base-dir", required=True, help="Repository the assistant serves")
+    parser_load.add_argument("--sessions", type=int, default=20, help="Number of chat sessions to replay")
+    parser_load.add_argument("--turns", help="JSONL file with one {\"turns\": [...]} session per line, reused in turn until --sessions are run")
+    parser_load.add_argument("--concurrency", type=int, default=4, help="Sessions in flight at once")
+    parser_load.add_argument("--latency", type=float, default=0.05, help="Seconds the fake model waits before each response")
+    parser_load.add_argument("--tokens-per-second", type=float, default=None, help="Simulated generation speed of the fake model")
+    parser_load.add_argument("--tool-calls", type=json.loads, default=None, help="JSON list of {\"name\", \"args\"} tool calls the fake model makes every turn")
+    parser_load.add_argument("--output", help="Also write the report to this JSON file")
+    add_tool_profile_argument(parser_load)
+    parser_load.set_defaults(func=handle_load_test)
+
+def add_ollama_arguments(parser):
+    parser.add_argument("--keep-alive", type=parse_keep_alive, default=DEFAULT_KEEP_ALIVE, help="How long Ollama keeps the model loaded (e.g. 30m, -1 for forever)")
+    parser.add_argument("--ollama-host", default=None, help="Ollama server URL (defaults to OLLAMA_HOST)")
+    parser.add_argument("--no-warmup", dest="warm_up", action="store_false", help="Do not preload the model at startup")
+
+def add_tool_profile_argument(parser):
+    parser.add_argument("--tool-profile", choices=list(TOOL_PROFILES), default="full",
+                        help="Tools given to the assistant: review (read-only), editing, offline (no web search) or full")
+
+def add_cache_arguments(parser):
+    parser.add_argument("--cache", action="store_true", help="Answer repeated conversations from the on-disk response cache (best with --temperature 0)")
+    parser.add_argument("--cache-path", default=None, help="SQLite file for the response cache")
+    parser.add_argument("--cache-max-mb", type=int, default=256, help="Evict least recently used answers beyond this size")
+
+def build_response_cache(args):
+    if not args.cache:
+        return None
+    return ResponseCache(args.cache_path, max_bytes=args.cache_max_mb * 1024 * 1024)
+
 def handle_assistant(args):
-    start_assistant(args.model, args.base_dir, args.temperature, args.num_ctx)
+    start_assistant(args.model, args.base_dir, args.temperature, args.num_ctx,
+                    keep_alive=args.keep_alive, host=args.ollama_host, warm_up=args.warm_up,
+                    response_cache=build_response_cache(args), tool_profile=args.tool_profile)
+
+def handle_batch(args):
+    try:
+        jobs = load_jobs(args.jobs)
+        if args.llm:
+            llm_factory = load_llm_factory(args.llm)
+        else:
+            def llm_factory(model):
+                if args.warm_up:
+                    get_model_catalog(args.ollama_host).warm_up_in_background(model, num_ctx=args.num_ctx, keep_alive=args.keep_alive)
+                return ChatOllama(model=model, temperature=args.temperature, num_ctx=args.num_ctx,
+                                  keep_alive=args.keep_alive, base_url=args.ollama_host)
+        runner = BatchRunner(llm_factory, args.model, concurrency=args.concurrency,
+                             response_cache=build_response_cache(args), tool_profile=args.tool_profile)
+        summary = runner.run(jobs, args.output, resume=args.resume)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ {summary['ok']} succeeded, ❌ {summary['error']} failed, ⏭️ {summary['skipped']} already done "
+          f"(of {summary['total']}). Results in {args.output}")
+    if summary["error"]:
+        sys.exit(1)
 
 def handle_web(args):
-    start_server(args.model, args.base_dir)
\ No newline at end of file
+    cache_args = []
+    if args.cache:
+        cache_args = ["--cache", "--cache-max-mb", str(args.cache_max_mb)]
+        if args.cache_path:
+            cache_args += ["--cache-path", args.cache_path]
+    start_server(args.model, args.base_dir, num_ctx=args.num_ctx,
+                 keep_alive=args.keep_alive, host=args.ollama_host, warm_up=args.warm_up,
+                 cache_args=cache_args, repos=args.repo, pool_size=args.pool_size, tool_profile=args.tool_profile,
+                 metrics=args.metrics)
+
+def handle_load_test(args):
+    # Imported here: the web app itself imports this module
+    from .web_assistant.loadtest import DEFAULT_TURNS, LoadTest, build_fake_app, format_report, load_sessions
+    try:
+        scripts = load_sessions(args.turns) if args.turns else [DEFAULT_TURNS]
+        if not scripts:
+            raise ValueError(f"No sessions in {args.turns}")
+        sessions = [scripts[i % len(scripts)] for i in range(args.sessions)]
+        app = build_fake_app(args.base_dir, latency=args.latency, tokens_per_second=args.tokens_per_second,
+                             tool_calls=args.tool_calls, tool_profile=args.tool_profile)
+        report = LoadTest(app, concurrency=args.concurrency).run(sessions)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
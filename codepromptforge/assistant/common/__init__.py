@@ -1,4 +1,6 @@
 from .assistant_registry import AssistantRegistry
+from .response_cache import ResponseCache
 from . import react_assistant  # Ensure assistants are loaded
+from .assistant_pool import AssistantPool
 
-__all__ = ["AssistantRegistry"]
\ No newline at end of file
+__all__ = ["AssistantRegistry", "AssistantPool", "ResponseCache"]
\ No newline at end of file
@@ -0,0 +1,166 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from ...core.profiling import PROFILER
+from .assistant_registry import AssistantRegistry
+from .react_assistant import build_forge
+
+DEFAULT_POOL_SIZE = 8
+
+# (assistant name, model, absolute base_dir)
+PoolKey = Tuple[str, str, str]
+
+
+class AssistantPool:
+    """
+    Lazily builds assistants per (assistant, model, base_dir) and reuses them.
+
+    One LLM client is created per model and one forge per base directory.
+    Both are shared by every pooled assistant that uses them. At most
+    `max_size` assistants are kept; the least recently used is evicted,
+    along with its forge or LLM once no other pooled assistant uses it. An
+    evicted forge is closed, but only after every `lease` on it has ended, so
+    requests that are still running keep working.
+    Concurrent requests for the same key wait for a single build.
+    """
+
+    def __init__(self, llm_factory: Callable[[str], object], max_size: int = DEFAULT_POOL_SIZE,
+                 forge_factory: Callable[[str], object] = build_forge, **assistant_options):
+        if max_size < 1:
+            raise ValueError("The pool must hold at least one assistant.")
+        self.llm_factory = llm_factory
+        self.forge_factory = forge_factory
+        self.max_size = max_size
+        self.assistant_options = assistant_options  # forwarded to every builder (e.g. `response_cache`)
+        self._assistants: "OrderedDict[PoolKey, object]" = OrderedDict()
+        self._llms: Dict[str, object] = {}
+        self._forges: Dict[str, object] = {}
+        self._building: Dict[PoolKey, threading.Lock] = {}
+        self._leases: Dict[int, int] = {}  # id(forge) -> running requests
+        self._retiring: Dict[int, object] = {}  # evicted forges waiting for their leases to end
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(name: str, model: str, base_dir: str) -> PoolKey:
+        return name, model, os.path.abspath(base_dir)
+
+    def get(self, name: str, model: str, base_dir: str):
+        """Returns the pooled assistant for `(name, model, base_dir)`, building it on first use."""
+        return self._get(self.make_key(name, model, base_dir), leased=False)[0]
+
+    @contextmanager
+    def lease(self, name: str, model: str, base_dir: str) -> Iterator[object]:
+        """Like `get`, but the assistant's forge is not closed by an eviction until the block exits."""
+        assistant, forge = self._get(self.make_key(name, model, base_dir), leased=True)
+        try:
+            yield assistant
+        finally:
+            self._release(forge)
+
+    def _get(self, key: PoolKey, leased: bool) -> Tuple[object, object]:
+        """Returns the assistant for `key` and, when `leased`, the forge the caller now holds a lease on."""
+        name, model, base_dir = key
+        with self._lock:
+            assistant = self._hit(key)
+            if assistant is not None:
+                return assistant, self._take_lease(self._forges[base_dir]) if leased else None
+            build_lock = self._building.setdefault(key, threading.Lock())
+        with build_lock:
+            with self._lock:
+                assistant = self._hit(key)
+                if assistant is not None:
+                    return assistant, self._take_lease(self._forges[base_dir]) if leased else None
+            PROFILER.incr("assistant_pool.builds")
+            forge = self._forge(base_dir)
+            with PROFILER.span("assistant_pool.build"):
+                assistant = AssistantRegistry.get_assistant(
+                    name, self._llm(model), base_dir, forge=forge, **self.assistant_options
+                )
+            with self._lock:
+                self._assistants[key] = assistant
+                self._forges.setdefault(base_dir, forge)  # an eviction during the build may have dropped it
+                self._building.pop(key, None)
+                if leased:
+                    self._take_lease(forge)
+                evicted = [old for old in self._evict() if not self._defer_close(old)]
+            for old in evicted:
+                self._close(old)  # ✅ Outside the lock; releases the forge's worker threads
+            return assistant, forge if leased else None
+
+    def _hit(self, key: PoolKey):
+        assistant = self._assistants.get(key)
+        if assistant is not None:
+            self._assistants.move_to_end(key)
+            PROFILER.incr("assistant_pool.hits")
+        return assistant
+
+    def _take_lease(self, forge):
+        """Called under the lock; counts a request on `forge` and returns it."""
+        self._leases[id(forge)] = self._leases.get(id(forge), 0) + 1
+        return forge
+
+    def _defer_close(self, forge) -> bool:
+        """Called under the lock; keeps an evicted forge open while requests still hold it."""
+        if self._leases.get(id(forge)):
+            self._retiring[id(forge)] = forge
+            return True
+        return False
+
+    def _release(self, forge) -> None:
+        with self._lock:
+            remaining = self._leases.pop(id(forge)) - 1
+            if remaining:
+                self._leases[id(forge)] = remaining
+            retired = self._retiring.pop(id(forge), None) if not remaining else None
+        if retired is not None:
+            self._close(retired)
+
+    @staticmethod
+    def _close(forge) -> None:
+        close = getattr(forge, "close", None)
+        if close is not None:
+            close()
+
+    def _llm(self, model: str):
+        with self._lock:
+            llm = self._llms.get(model)
+        if llm is None:
+            llm = self.llm_factory(model)
+            with self._lock:
+                llm = self._llms.setdefault(model, llm)
+        return llm
+
+    def _forge(self, base_dir: str):
+        with self._lock:
+            forge = self._forges.get(base_dir)
+        if forge is None:
+            forge = self.forge_factory(base_dir)
+            with self._lock:
+                forge = self._forges.setdefault(base_dir, forge)
+        return forge
+
+    def _evict(self) -> List[object]:
+        """Drops the least recently used assistants beyond `max_size`; returns the forges no longer used."""
+        evicted = []
+        while len(self._assistants) > self.max_size:
+            (_, model, base_dir), _ = self._assistants.popitem(last=False)
+            PROFILER.incr("assistant_pool.evictions")
+            if not any(key[1] == model for key in self._assistants):
+                self._llms.pop(model, None)
+            if not any(key[2] == base_dir for key in self._assistants):
+                forge = self._forges.pop(base_dir, None)
+                if forge is not None:
+                    evicted.append(forge)
+        return evicted
+
+    def keys(self) -> List[PoolKey]:
+        """Pooled keys, least recently used first."""
+        with self._lock:
+            return list(self._assistants)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._assistants)
@@ -26,13 +26,14 @@ class AssistantRegistry:
         cls._registry[name] = builder
 
     @classmethod
-    def get_assistant(cls, name: str, llm, base_dir='..'):
+    def get_assistant(cls, name: str, llm, base_dir='..', **options):
         """
         Retrieve and build an assistant by name.
 
         Args:
             name (str): The name of the registered assistant.
             llm: The LLM model instance to be used by the assistant.
+            **options: Extra keyword arguments forwarded to the builder (e.g. `response_cache`).
 
         Returns:
             The built assistant instance.
@@ -42,7 +43,7 @@ class AssistantRegistry:
         """
         if name not in cls._registry:
             raise KeyError(f"Assistant '{name}' is not registered.")
-        return cls._registry[name](llm, base_dir)
+        return cls._registry[name](llm, base_dir, **options)
 
     @classmethod
     def list_assistants(cls):
@@ -0,0 +1,65 @@
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from ...core.tokens import estimate_tokens
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic offline chat model for tests, batch dry runs and load tests.
+
+    For every user message it first makes the scripted `tool_calls` (one per
+    step, in order) and then answers with a summary of the prompt and of the
+    tool results it saw. `latency` is added before every response, and
+    `tokens_per_second` simulates generation speed. Usage metadata is
+    estimated with `estimate_tokens`, so token accounting can be exercised
+    without a model.
+    """
+
+    model: str = "fake"
+    temperature: float = 0.0
+    latency: float = 0.0
+    tokens_per_second: Optional[float] = None
+    tool_calls: List[Dict[str, Any]] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "codepromptforge-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages: List[Any], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        last_user = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+        turn = messages[last_user + 1:]
+        step = sum(1 for m in turn if isinstance(m, AIMessage))
+        if step < len(self.tool_calls):
+            call = self.tool_calls[step]
+            message = AIMessage(content="", tool_calls=[
+                {"name": call["name"], "args": call.get("args", {}), "id": f"call-{last_user}-{step}"}
+            ])
+        else:
+            prompt = messages[last_user].content if last_user >= 0 else ""
+            tool_chars = sum(len(str(m.content)) for m in turn if m.type == "tool")
+            message = AIMessage(content=f"[{self.model}] {prompt} ({step} tool calls, {tool_chars} chars of tool output)")
+
+        input_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        output_tokens = max(estimate_tokens(str(message.content)), 1)
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        delay = self.latency + (output_tokens / self.tokens_per_second if self.tokens_per_second else 0.0)
+        if delay:
+            time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def build_fake_llm(model: str = "fake", **options) -> FakeChatModel:
+    """LLM factory for `--llm codepromptforge.assistant.common.fake_llm:build_fake_llm`."""
+    return FakeChatModel(model=model, **options)
@@ -0,0 +1,101 @@
+import threading
+import time
+from typing import Dict, List, Optional, Union
+
+import ollama
+
+from ...core.profiling import PROFILER
+
+DEFAULT_TTL = 60.0
+DEFAULT_KEEP_ALIVE = "30m"
+
+
+class ModelCatalog:
+    """
+    Cached view of the models available on one Ollama server.
+
+    All requests go through a single `ollama.Client`, whose underlying HTTP
+    client keeps its connections open, so listing models and warming them up
+    never pays a new connection per call.
+    """
+
+    def __init__(self, host: Optional[str] = None, ttl: float = DEFAULT_TTL, client: Optional[ollama.Client] = None):
+        self.host = host
+        self.ttl = ttl
+        self.client = client or ollama.Client(host=host)
+        self._models: Optional[List[str]] = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self) -> List[str]:
+        """Queries the server and replaces the cached model list."""
+        with PROFILER.span("ollama.list"):
+            response = self.client.list()
+        models = [m.get("model") or m.get("name") for m in response["models"]]
+        with self._lock:
+            self._models = models
+            self._fetched_at = time.monotonic()
+        return list(models)
+
+    def list_models(self, refresh: bool = False) -> List[str]:
+        """Returns the cached model names, querying the server once the TTL has expired."""
+        with self._lock:
+            fresh = self._models is not None and time.monotonic() - self._fetched_at < self.ttl
+            if fresh and not refresh:
+                return list(self._models)
+        return self.refresh()
+
+    def has_model(self, model_name: str) -> bool:
+        """Checks for a model, refreshing once in case it was pulled after the last lookup."""
+        if _matches(model_name, self.list_models()):
+            return True
+        return _matches(model_name, self.refresh())
+
+    def warm_up(self, model_name: str, num_ctx: Optional[int] = None,
+                keep_alive: Union[str, float] = DEFAULT_KEEP_ALIVE) -> None:
+        """
+        Loads the model into memory with the given context size and keeps it resident.
+
+        The context size must match the one used for chatting, otherwise Ollama
+        reloads the model on the first real request.
+        """
+        options = {"num_ctx": num_ctx} if num_ctx else None
+        with PROFILER.span("ollama.warm_up"):
+            self.client.generate(model=model_name, prompt="", options=options, keep_alive=keep_alive)
+
+    def warm_up_in_background(self, model_name: str, num_ctx: Optional[int] = None,
+                              keep_alive: Union[str, float] = DEFAULT_KEEP_ALIVE) -> threading.Thread:
+        """Starts `warm_up` on a daemon thread so startup is not blocked; errors are reported, not raised."""
+
+        def target():
+            try:
+                self.warm_up(model_name, num_ctx=num_ctx, keep_alive=keep_alive)
+            except Exception as e:
+                print(f"⚠️ Warm-up of '{model_name}' failed: {e}")
+
+        thread = threading.Thread(target=target, name=f"warm-up-{model_name}", daemon=True)
+        thread.start()
+        return thread
+
+
+def _matches(model_name: str, available: List[str]) -> bool:
+    # Ollama reports untagged models as `<name>:latest`.
+    candidates = {model_name} if ":" in model_name else {model_name, f"{model_name}:latest"}
+    return any(model in candidates for model in available)
+
+
+def parse_keep_alive(value: str) -> Union[str, int]:
+    """Converts plain numbers (seconds, or -1 for forever) to int; durations like `30m` are kept."""
+    return int(value) if value.lstrip("-").isdigit() else value
+
+
+_catalogs: Dict[Optional[str], ModelCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_model_catalog(host: Optional[str] = None) -> ModelCatalog:
+    """Returns the shared catalog for an Ollama host, creating it on first use."""
+    with _catalogs_lock:
+        if host not in _catalogs:
+            _catalogs[host] = ModelCatalog(host=host)
+        return _catalogs[host]
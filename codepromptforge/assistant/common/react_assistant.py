@@ -1,22 +1,44 @@
 
+from ...core.cache import ContentCache
 from ...core.main import CodePromptForge
-from ...core.prompt import react_template
+from ...core.prefetch import Prefetcher
+from ...core.prompt import build_react_prompt
+from ...core.repo_map import MAP_STAGES
 from langgraph.prebuilt import create_react_agent
 from langgraph.checkpoint.memory import MemorySaver
 
 from .assistant_registry import AssistantRegistry
+from .response_cache import CachedAssistant
 
-# Define the assistant's prompt
-prompt = react_template + "You are forbidden to call tools beyond the list provided."
 memory = MemorySaver()
 
+# Listings come from a resident compact index, rebuilt at most this often (seconds)
+FILE_INDEX_TTL = 30.0
+
+# Files read ahead of the agent are kept in a per-forge content cache of this size (characters)
+CONTENT_CACHE_CHARS = 64 * 1024 * 1024
+
+# Per-file fields computed while prefetching, so the repo map tool does not read those files again
+PREFETCH_STAGES = ("hash",) + MAP_STAGES
+
+
+def build_forge(base_dir):
+    """Creates the forge whose tools the assistant uses; an `AssistantPool` shares one per base_dir."""
+    cache = ContentCache(max_chars=CONTENT_CACHE_CHARS)
+    return CodePromptForge(base_dir=base_dir, use_file_index=True, file_index_ttl=FILE_INDEX_TTL,
+                           content_cache=cache, prefetcher=Prefetcher(cache, stages=PREFETCH_STAGES))
+
 
 # Define the assistant builder function
-def build_react_assistant(llm, base_dir):
-    # Define the tools
-    forge = CodePromptForge(base_dir=base_dir)
-    tools = forge.get_tools()
-    return create_react_agent(llm, tools=tools, prompt=prompt, checkpointer=memory)
+def build_react_assistant(llm, base_dir, response_cache=None, forge=None, tool_profile="full"):
+    # Define the tools and a prompt describing exactly those tools
+    forge = forge or build_forge(base_dir)
+    tools = forge.get_tools(tool_profile)
+    prompt = build_react_prompt(tools) + "You are forbidden to call tools beyond the list provided."
+    agent = create_react_agent(llm, tools=tools, prompt=prompt, checkpointer=memory)
+    if response_cache is not None:
+        return CachedAssistant(agent, response_cache, llm, forge=forge, tool_profile=tool_profile, prompt=prompt)
+    return agent
 
 # Register the assistant
 AssistantRegistry.register_assistant("react_assistant", build_react_assistant)
\ No newline at end of file
@@ -0,0 +1,163 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from ...core.cache import WRITE_PREFIX, content_hash, default_cache_dir, dependency_hash, record_reads
+from ...core.profiling import PROFILER
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+MAX_THREADS = 1024  # conversations whose history `CachedAssistant` keeps for cache keys
+
+
+class ResponseCache:
+    """
+    SQLite store of final assistant answers.
+
+    Each entry remembers the content hash of every file the tools read while
+    producing it, and a listing hash of every folder they listed; an entry
+    whose files or folders have changed since is dropped on lookup.
+    When the stored answers exceed `max_bytes`, the least recently used entries
+    are evicted.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path) if path else default_cache_dir() / "responses.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, response TEXT NOT NULL, dependencies TEXT NOT NULL,"
+                " size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path), timeout=30)
+
+    @staticmethod
+    def make_key(model: str, params: Dict, messages: Sequence[Tuple[str, str]], scope: Optional[Dict] = None) -> str:
+        """
+        Builds the cache key from the model, its sampling parameters, the
+        conversation and the `scope` the agent ran in (repository, tool
+        profile, system prompt).
+        """
+        payload = json.dumps(
+            {"model": model, "params": params, "messages": [list(m) for m in messages], "scope": scope or {}},
+            sort_keys=True,
+        )
+        return content_hash(payload)
+
+    def get(self, key: str, listing_hash: Optional[Callable[[str], Optional[str]]] = None) -> Optional[str]:
+        """
+        Returns the cached answer, or None if missing or any file it depended on
+        changed. Folder listings it depended on are checked with `listing_hash`
+        (see `CodePromptForge.listing_hash`); without one they count as changed.
+        """
+        with self._connect() as db:
+            row = db.execute("SELECT response, dependencies FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                PROFILER.incr("response_cache.misses")
+                return None
+            response, dependencies = row
+            if any(dependency_hash(path, listing_hash) != digest for path, digest in json.loads(dependencies).items()):
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                PROFILER.incr("response_cache.invalidations")
+                return None
+            db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        PROFILER.incr("response_cache.hits")
+        return response
+
+    def put(self, key: str, response: str, dependencies: Dict[str, str]) -> None:
+        """Stores an answer with the `{path: content hash}` of the files it was built from."""
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, response, json.dumps(dependencies), len(response.encode("utf-8")), now, now),
+            )
+            self._evict(db)
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            PROFILER.incr("response_cache.evictions")
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self) -> None:
+        with self._connect() as db:
+            db.execute("DELETE FROM responses")
+
+
+class CachedAssistant:
+    """
+    Wraps a LangGraph agent so that repeated conversations are answered from a `ResponseCache`.
+
+    The key covers the model, temperature, context size and the whole conversation
+    of the thread so far, plus the repository, tool profile and system prompt of
+    the agent; on a hit the exchange is written into the agent's memory so later
+    turns behave as if the agent had answered itself. Answers of runs that wrote
+    files are not stored, since replaying them would skip the writes. The histories of
+    the `MAX_THREADS` most recently active threads are kept; an older thread
+    starts over with a fresh key, which only costs a cache miss.
+    """
+
+    def __init__(self, agent, cache: ResponseCache, llm, forge=None, tool_profile: Optional[str] = None,
+                 prompt: str = ""):
+        self.agent = agent
+        self.cache = cache
+        self.forge = forge
+        self.model = getattr(llm, "model", None) or type(llm).__name__
+        self.params = {
+            "temperature": getattr(llm, "temperature", None),
+            "num_ctx": getattr(llm, "num_ctx", None),
+        }
+        self.scope = {
+            "base_dir": str(forge.base_dir) if forge is not None else None,
+            "tool_profile": tool_profile,
+            "prompt": content_hash(prompt),
+        }
+        self._history: "OrderedDict[str, List[Tuple[str, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invoke(self, inputs, config=None, **kwargs):
+        thread_id = ((config or {}).get("configurable") or {}).get("thread_id", "default")
+        messages = [tuple(m) for m in inputs["messages"]]
+        with self._lock:
+            history = list(self._history.get(thread_id, []))
+        key = self.cache.make_key(self.model, self.params, history + messages, self.scope)
+
+        answer = self.cache.get(key, self.forge.listing_hash if self.forge is not None else None)
+        if answer is not None:
+            response = {"messages": [HumanMessage(content=content) for _, content in messages] + [AIMessage(content=answer)]}
+            self.agent.update_state(config, {"messages": response["messages"]})
+        else:
+            with record_reads() as reads:
+                response = self.agent.invoke(inputs, config=config, **kwargs)
+            answer = response["messages"][-1].content
+            if any(path.startswith(WRITE_PREFIX) for path in reads):
+                PROFILER.incr("response_cache.uncacheable")
+            else:
+                self.cache.put(key, answer, reads)
+
+        with self._lock:
+            self._history[thread_id] = history + messages + [("assistant", answer)]
+            self._history.move_to_end(thread_id)
+            while len(self._history) > MAX_THREADS:
+                self._history.popitem(last=False)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.agent, name)
@@ -1,89 +1,188 @@
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, Response, render_template, request, jsonify, session
 from codepromptforge.assistant import AssistantRegistry
+from codepromptforge.assistant.common.assistant_pool import DEFAULT_POOL_SIZE, AssistantPool
+from codepromptforge.assistant.cli import add_cache_arguments, add_tool_profile_argument, build_response_cache
+from codepromptforge.assistant.common.ollama_models import DEFAULT_KEEP_ALIVE, get_model_catalog, parse_keep_alive
+from codepromptforge.assistant.web_assistant.bundles import DEFAULT_REFRESH_INTERVAL, BundleService, bundle_response, parse_list
+from codepromptforge.core.main import NoFilesFoundError
+from codepromptforge.core.profiling import PROFILER, ProfilingCallbackHandler
 from langchain_ollama import ChatOllama
-import ollama
 import re
 import argparse
 import uuid
 import os
 
-APP_DIR = os.path.dirname(os.path.abspath(__file__)) 
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
 TEMPLATES_PATH = os.path.join(APP_DIR, "templates")
 STATIC_PATH = os.path.join(APP_DIR, "static")
 
-print("🔥 Debug Info 🔥")
-print(f"📂 Current Working Directory: {APP_DIR }")
-print(f"📁 Expected Templates Path: {TEMPLATES_PATH}")
-print(f"📄 index.html Exists: {os.path.exists(os.path.join(TEMPLATES_PATH, 'index.html'))}")
-
-# Initialize Flask with explicit template directory
-app = Flask(__name__, template_folder=TEMPLATES_PATH, static_folder=STATIC_PATH)
-app.secret_key = "supersecretkey"  # Required for session tracking
-
-def get_available_models():
-    """Returns a list of available models in Ollama."""
-    try:
-        return [m["name"] for m in ollama.list()["models"]]
-    except Exception:
-        return []
-
 def format_response(response):
     """Formats assistant response to preserve code formatting."""
     response = re.sub(r"```python\n(.*?)\n```", r'<pre><code class="language-python">\1</code></pre>', response, flags=re.DOTALL)
     response = re.sub(r"```markdown\n(.*?)\n```", r'<pre><code class="language-markdown">\1</code></pre>', response, flags=re.DOTALL)
     return response.replace("\n", "<br>")
 
-# Parse CLI arguments
-parser = argparse.ArgumentParser(description="Start web assistant")
-parser.add_argument("--model", required=True, help="Ollama model name")
-parser.add_argument("--base-dir", required=True, help="Base directory for file operations")
-args = parser.parse_args()
-
-# Convert base_dir to an absolute path
-BASE_DIR = os.path.abspath(args.base_dir)  # ✅ Ensure correct path
-
-# Change working directory to base_dir
-os.chdir(BASE_DIR)  # ✅ Ensure app has access to base_dir files
-
-print(f"🔹 Server running with base directory: {BASE_DIR}")
-
-# Initialize LLM
-llm = ChatOllama(model=args.model)
-
-# Retrieve assistant with `base_dir`
-assistant_name = "react_assistant"
-agent = AssistantRegistry.get_assistant(assistant_name, llm, BASE_DIR)  # ✅ Pass absolute base_dir
-
-@app.route("/")
-def index():
-    """Render the chat UI."""
-    if "thread_id" not in session:
-        session["thread_id"] = str(uuid.uuid4())  # ✅ Generate unique thread_id
-
-    return render_template(
-        "index.html",
-        models=get_available_models(),
-        selected_model=args.model,
-        base_dir=BASE_DIR,  # ✅ Pass absolute base_dir
-        thread_id=session["thread_id"]
-    )
-
-@app.route("/chat", methods=["POST"])
-def chat():
-    """Handle user input with thread_id for session tracking."""
-    user_input = request.json.get("message")
-    if not user_input:
-        return jsonify({"error": "Empty input!"}), 400
-
-    thread_id = session.get("thread_id", str(uuid.uuid4()))  # ✅ Ensure thread_id persists
-
-    inputs = {"messages": [("user", user_input)]}
-    config = {"configurable": {"thread_id": thread_id}}  # ✅ Include memory tracking
-
-    response = agent.invoke(inputs, config=config)
-
-    assistant_response = response["messages"][-1].content if "messages" in response else response.content
-    return jsonify({"message": format_response(assistant_response)})
+def build_parser():
+    """Command-line options of the web assistant."""
+    parser = argparse.ArgumentParser(description="Start web assistant")
+    parser.add_argument("--model", required=True, help="Ollama model name")
+    parser.add_argument("--base-dir", required=True, help="Base directory for file operations")
+    parser.add_argument("--num_ctx", type=int, default=None, help="Context length for the model")
+    parser.add_argument("--keep-alive", type=parse_keep_alive, default=DEFAULT_KEEP_ALIVE, help="How long Ollama keeps the model loaded")
+    parser.add_argument("--ollama-host", default=None, help="Ollama server URL (defaults to OLLAMA_HOST)")
+    parser.add_argument("--no-warmup", dest="warm_up", action="store_false", help="Do not preload the model at startup")
+    parser.add_argument("--repo", action="append", default=[], help="Additional base directory users may switch to (repeatable)")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE, help="Maximum number of (model, repository) assistants kept in memory")
+    parser.add_argument("--bundle-refresh", type=float, default=DEFAULT_REFRESH_INTERVAL, help="Seconds before /bundle checks its files for changes")
+    parser.add_argument("--metrics", action="store_true", help="Collect timings and serve them at /metrics")
+    add_cache_arguments(parser)
+    add_tool_profile_argument(parser)
+    return parser
+
+def create_app(args, llm_factory=None, list_models=None):
+    """
+    Builds the web assistant for parsed `args` (see `build_parser`).
+
+    `llm_factory(model)` replaces the Ollama client, e.g. with `build_fake_llm`
+    for tests and load tests, and `list_models(refresh)` replaces the Ollama
+    model catalog. Nothing is built at import time, so the app can be created
+    several times in one process.
+    """
+    app = Flask(__name__, template_folder=TEMPLATES_PATH, static_folder=STATIC_PATH)
+    app.secret_key = "supersecretkey"  # Required for session tracking
+
+    # Convert base_dir to an absolute path
+    base_dir = os.path.abspath(args.base_dir)  # ✅ Ensure correct path
+
+    # Repositories users may switch between; the first one is the default
+    repos = list(dict.fromkeys([base_dir] + [os.path.abspath(repo) for repo in args.repo]))
+
+    def build_llm(model):
+        return ChatOllama(model=model, num_ctx=args.num_ctx, keep_alive=args.keep_alive, base_url=args.ollama_host)
+
+    def get_available_models(refresh=False):
+        """Returns a list of available models in Ollama, cached for the catalog TTL."""
+        try:
+            if list_models is not None:
+                return list_models(refresh)
+            return get_model_catalog(args.ollama_host).list_models(refresh=refresh)
+        except Exception:
+            return []
+
+    def warm_up(model):
+        if args.warm_up:
+            get_model_catalog(args.ollama_host).warm_up_in_background(model, num_ctx=args.num_ctx, keep_alive=args.keep_alive)
+
+    # Preload the default model before the first chat arrives
+    warm_up(args.model)
+
+    # Assistants are built per (model, repository) on first use and reused afterwards
+    assistant_name = "react_assistant"
+    assistant_pool = AssistantPool(llm_factory or build_llm, max_size=args.pool_size,
+                                   response_cache=build_response_cache(args), tool_profile=args.tool_profile)
+    assistant_pool.get(assistant_name, args.model, base_dir)  # ✅ Pass absolute base_dir
+
+    # Prebuilt combined prompts for the /bundle endpoint
+    bundle_service = BundleService(base_dir, refresh_interval=args.bundle_refresh)
+
+    # Collect timings for the /metrics endpoint only when asked; profiling is process-wide
+    if args.metrics:
+        PROFILER.enable()
+    profiling_callbacks = [ProfilingCallbackHandler()] if args.metrics else []
+
+    @app.route("/")
+    def index():
+        """Render the chat UI."""
+        if "thread_id" not in session:
+            session["thread_id"] = str(uuid.uuid4())  # ✅ Generate unique thread_id
+
+        return render_template(
+            "index.html",
+            models=get_available_models(refresh=request.args.get("refresh") == "1"),
+            selected_model=session.get("model", args.model),
+            base_dir=session.get("base_dir", base_dir),  # ✅ Pass absolute base_dir
+            repos=repos,
+            thread_id=session["thread_id"]
+        )
+
+    @app.route("/session", methods=["POST"])
+    def switch_session():
+        """Switch this session's model and/or repository; the assistant is built on first use."""
+        model = request.json.get("model") or session.get("model", args.model)
+        selected_dir = os.path.abspath(request.json.get("base_dir") or session.get("base_dir", base_dir))
+        available = get_available_models()
+        if available and model not in available:
+            return jsonify({"error": f"Unknown model '{model}'"}), 400
+        if selected_dir not in repos:
+            return jsonify({"error": f"Repository '{selected_dir}' is not served by this assistant"}), 400
+        if model != session.get("model", args.model):
+            warm_up(model)
+        if selected_dir != session.get("base_dir", base_dir):
+            session["thread_id"] = str(uuid.uuid4())  # A new repository starts a new conversation
+        session["model"], session["base_dir"] = model, selected_dir
+        return jsonify({"model": model, "base_dir": selected_dir})
+
+    @app.route("/chat", methods=["POST"])
+    def chat():
+        """Handle user input with thread_id for session tracking."""
+        user_input = request.json.get("message")
+        if not user_input:
+            return jsonify({"error": "Empty input!"}), 400
+
+        if "thread_id" not in session:
+            session["thread_id"] = str(uuid.uuid4())  # ✅ Ensure thread_id persists
+        thread_id = session["thread_id"]
+
+        inputs = {"messages": [("user", user_input)]}
+        config = {"configurable": {"thread_id": thread_id}, "callbacks": profiling_callbacks}  # ✅ Include memory tracking
+
+        with assistant_pool.lease(assistant_name, session.get("model", args.model),
+                                  session.get("base_dir", base_dir)) as agent:
+            with PROFILER.span("web.chat"):
+                response = agent.invoke(inputs, config=config)
+
+        assistant_response = response["messages"][-1].content if "messages" in response else response.content
+        return jsonify({"message": format_response(assistant_response)})
+
+    @app.route("/bundle")
+    def bundle():
+        """Serve the combined prompt for `extensions` (with optional `exclude` and `tree=1`)."""
+        extensions = parse_list(request.args.getlist("extensions"))
+        if not extensions:
+            return jsonify({"error": "Missing 'extensions' parameter"}), 400
+        try:
+            built = bundle_service.get(
+                extensions,
+                excluded=parse_list(request.args.getlist("exclude")),
+                include_tree=request.args.get("tree") == "1",
+            )
+        except NoFilesFoundError as e:
+            return jsonify({"error": str(e)}), 404
+        return bundle_response(built)
+
+    @app.route("/metrics")
+    def metrics():
+        """Expose collected timings in the Prometheus text format."""
+        if not args.metrics:
+            return jsonify({"error": "Metrics are disabled; start the server with --metrics"}), 404
+        return Response(PROFILER.to_prometheus(), mimetype="text/plain; version=0.0.4")
+
+    return app
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    print("🔥 Debug Info 🔥")
+    print(f"📂 Current Working Directory: {APP_DIR }")
+    print(f"📁 Expected Templates Path: {TEMPLATES_PATH}")
+    print(f"📄 index.html Exists: {os.path.exists(os.path.join(TEMPLATES_PATH, 'index.html'))}")
+
+    # Change working directory to base_dir
+    os.chdir(os.path.abspath(args.base_dir))  # ✅ Ensure app has access to base_dir files
+    print(f"🔹 Server running with base directory: {os.path.abspath(args.base_dir)}")
+
+    app = create_app(args)
+    app.run(debug=True, port=5000)
 
 if __name__ == "__main__":
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    main()
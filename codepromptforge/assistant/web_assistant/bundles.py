@@ -0,0 +1,222 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from flask import Response, request, send_file
+
+from ...core.cache import default_cache_dir
+from ...core.main import CodePromptForge
+from ...core.profiling import PROFILER
+
+DEFAULT_REFRESH_INTERVAL = 5.0
+# Replaced bundle files are deleted only after this many seconds, so requests
+# that picked up the old bundle just before the swap can still open it.
+DEFAULT_RETIRE_AFTER = 60.0
+# Selections kept on disk; the least recently requested one is dropped first.
+DEFAULT_MAX_BUNDLES = 64
+_CHUNK_SIZE = 64 * 1024
+
+# (extensions, excluded files, include tree)
+BundleKey = Tuple[Tuple[str, ...], Tuple[str, ...], bool]
+
+
+@dataclass
+class BuiltBundle:
+    """A prebuilt combined prompt on disk, named after its content hash."""
+
+    path: Path
+    etag: str
+    fingerprint: str
+    size: int
+    checked_at: float
+
+
+class BundleService:
+    """
+    Builds and caches `forge_prompt` output for the web assistant's `/bundle` endpoint.
+
+    The first request for a selection builds it; later requests are served
+    from the cached file immediately. Once a bundle is older than
+    `refresh_interval`, a background check compares the sizes and mtimes of
+    its files and rebuilds it if any changed. Bundles with a tree are also
+    rebuilt when files are added or removed anywhere. Concurrent requests for
+    the same selection share one build. At most `max_bundles` selections are
+    kept; evicted bundle files are deleted like replaced ones.
+    """
+
+    def __init__(self, base_dir: str, cache_dir: Optional[str] = None,
+                 refresh_interval: float = DEFAULT_REFRESH_INTERVAL, max_workers: int = 2,
+                 retire_after: float = DEFAULT_RETIRE_AFTER, max_bundles: int = DEFAULT_MAX_BUNDLES):
+        self.base_dir = Path(base_dir).resolve()
+        digest = hashlib.sha256(str(self.base_dir).encode("utf-8")).hexdigest()[:16]
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir() / "bundles" / digest
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.refresh_interval = refresh_interval
+        self.retire_after = retire_after
+        self.max_bundles = max_bundles
+        self._retired: List[Tuple[float, Path]] = []
+        self._bundles: "OrderedDict[BundleKey, BuiltBundle]" = OrderedDict()
+        self._inflight: Dict[BundleKey, Future] = {}
+        self._lock = threading.RLock()  # a finished future runs its done-callback under the lock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bundle-build")
+
+    @staticmethod
+    def make_key(extensions: Sequence[str], excluded: Sequence[str] = (), include_tree: bool = False) -> BundleKey:
+        return tuple(sorted(set(extensions))), tuple(sorted(set(excluded))), include_tree
+
+    def _forge(self, key: BundleKey, output_file: Optional[str] = None) -> CodePromptForge:
+        _, excluded, include_tree = key
+        return CodePromptForge(base_dir=str(self.base_dir), output_file=output_file, force=True,
+                               include_tree=include_tree, excluded=list(excluded))
+
+    @staticmethod
+    def _key_hash(key: BundleKey) -> str:
+        return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:16]
+
+    def _fingerprint(self, key: BundleKey) -> str:
+        """
+        Hash of the selected files' paths, sizes and mtimes, plus the whole
+        listing when the bundle includes a tree; changes whenever the bundle would.
+        """
+        forge = self._forge(key)
+        digest = hashlib.sha256()
+        for file in forge.find_files(list(key[0])):
+            stat = file.stat()
+            digest.update(f"{file}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8", "surrogateescape"))
+        if key[2]:
+            for path in forge.get_directory_tree("."):
+                digest.update(f"{path}\n".encode("utf-8", "surrogateescape"))
+        return digest.hexdigest()
+
+    def _build(self, key: BundleKey) -> BuiltBundle:
+        with PROFILER.span("web.bundle_build"):
+            fingerprint = self._fingerprint(key)
+            fd, temp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            os.close(fd)
+            try:
+                self._forge(key, temp_name).forge_prompt(list(key[0]))
+                digest = hashlib.sha256()
+                with open(temp_name, "rb") as built:
+                    for chunk in iter(lambda: built.read(_CHUNK_SIZE), b""):
+                        digest.update(chunk)
+                etag = digest.hexdigest()
+                # One file per selection: equal output from two selections must not share a file
+                target = self.cache_dir / f"{self._key_hash(key)}-{etag}.txt"
+                os.replace(temp_name, target)
+            except Exception:
+                Path(temp_name).unlink(missing_ok=True)
+                raise
+        return BuiltBundle(path=target, etag=etag, fingerprint=fingerprint, size=target.stat().st_size,
+                           checked_at=time.monotonic())
+
+    def _refresh(self, key: BundleKey) -> BuiltBundle:
+        """Rebuilds `key` if its files changed since the current build, then publishes the result."""
+        current = self._bundles.get(key)
+        if current is not None and self._fingerprint(key) == current.fingerprint:
+            current.checked_at = time.monotonic()
+            return current
+        built = self._build(key)
+        with self._lock:
+            self._bundles[key] = built
+            self._bundles.move_to_end(key)
+            evicted = []
+            while len(self._bundles) > self.max_bundles:
+                _, old = self._bundles.popitem(last=False)
+                evicted.append(old.path)
+                PROFILER.incr("web.bundle_evictions")
+        if current is not None and current.path != built.path:
+            evicted.append(current.path)
+        for path in evicted:
+            self._retire(path)
+        return built
+
+    def _retire(self, path: Path) -> None:
+        """Schedules a replaced bundle file for deletion and deletes those past their grace period."""
+        now = time.monotonic()
+        with self._lock:
+            self._retired.append((now, path))
+            expired = [old for retired_at, old in self._retired if now - retired_at >= self.retire_after]
+            self._retired = [(retired_at, old) for retired_at, old in self._retired
+                             if now - retired_at < self.retire_after]
+        for old in expired:
+            old.unlink(missing_ok=True)
+
+    def _single_flight(self, key: BundleKey) -> Future:
+        """Returns the in-progress refresh of `key`, starting one if there is none."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._executor.submit(self._refresh, key)
+                self._inflight[key] = future
+                future.add_done_callback(lambda _: self._release(key, future))
+            else:
+                PROFILER.incr("web.bundle_shared_builds")
+            return future
+
+    def _release(self, key: BundleKey, future: Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def get(self, extensions: Sequence[str], excluded: Sequence[str] = (), include_tree: bool = False) -> BuiltBundle:
+        """Returns the bundle for a selection, building it on first use and refreshing stale ones in the background."""
+        key = self.make_key(extensions, excluded, include_tree)
+        with self._lock:
+            current = self._bundles.get(key)
+            if current is not None:
+                self._bundles.move_to_end(key)
+        if current is None:
+            return self._single_flight(key).result()
+        if time.monotonic() - current.checked_at > self.refresh_interval:
+            self._single_flight(key)
+        return current
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+def _gzip_chunks(source: BinaryIO) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip container
+    with source:
+        for chunk in iter(lambda: source.read(_CHUNK_SIZE), b""):
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+    yield compressor.flush()
+
+
+def bundle_response(built: BuiltBundle) -> Response:
+    """
+    Serves a bundle for the current request.
+
+    `If-None-Match` is answered with 304. Range requests get the identity
+    encoding with 206 responses, and other clients that accept gzip get a
+    streamed gzip body with its own ETag.
+    """
+    gzip_etag = f"{built.etag}-gzip"
+    if request.if_none_match.contains(built.etag) or request.if_none_match.contains(gzip_etag):
+        response = Response(status=304)
+        response.set_etag(gzip_etag if request.if_none_match.contains(gzip_etag) else built.etag)
+    elif request.range is None and request.accept_encodings["gzip"] > 0:
+        # Opened now, so a rebuild replacing the file cannot break the stream
+        response = Response(_gzip_chunks(built.path.open("rb")), mimetype="text/plain")
+        response.headers["Content-Encoding"] = "gzip"
+        response.set_etag(gzip_etag)
+    else:
+        response = send_file(built.path, mimetype="text/plain", etag=built.etag, conditional=True, max_age=0)
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def parse_list(values: List[str]) -> List[str]:
+    """Accepts both repeated query parameters and comma-separated values."""
+    return [item.strip() for value in values for item in value.split(",") if item.strip()]
@@ -0,0 +1,170 @@
+import gc
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from typing import Dict, List, Optional, Sequence
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from ...core.profiling import PROFILER
+from ..common.fake_llm import build_fake_llm
+from .app import build_parser, create_app
+
+# Every session replays these user turns unless a turns file is given
+DEFAULT_TURNS = [
+    "Give me an overview of this project.",
+    "Which files would I change to add a command-line option?",
+    "Summarise what you found.",
+]
+
+# Tool calls the fake model makes on every user turn before it answers
+DEFAULT_TOOL_CALLS = [
+    {"name": "get_directory_tree", "args": {"folder_path": "."}},
+    {"name": "find_files", "args": {"extensions": ["py"]}},
+]
+
+REQUEST_TIMEOUT = 300.0
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass  # ✅ One log line per request would drown the report
+
+
+def load_sessions(path: str) -> List[List[str]]:
+    """Reads one session per line: `{"turns": ["first message", "follow-up", ...]}`."""
+    sessions = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                turns = json.loads(line)["turns"]
+            except (ValueError, KeyError, TypeError) as e:
+                raise ValueError(f"{path}:{number}: expected a JSON object with 'turns' ({e})")
+            sessions.append([str(turn) for turn in turns])
+    return sessions
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of `values` (0 for an empty sequence)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+def rss_bytes() -> int:
+    """Resident memory of this process (peak RSS where the current value is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def build_fake_app(base_dir: str, latency: float = 0.0, tokens_per_second: Optional[float] = None,
+                   tool_calls: Optional[List[Dict]] = None, tool_profile: str = "full", pool_size: Optional[int] = None,
+                   metrics: bool = True):
+    """
+    The web assistant for `base_dir`, answering with `FakeChatModel` instead of
+    Ollama. Metrics are on by default because `LoadTest` reports from them.
+    """
+    argv = ["--model", "fake", "--base-dir", base_dir, "--no-warmup", "--tool-profile", tool_profile]
+    if metrics:
+        argv.append("--metrics")
+    if pool_size:
+        argv += ["--pool-size", str(pool_size)]
+    calls = DEFAULT_TOOL_CALLS if tool_calls is None else tool_calls
+
+    def llm_factory(model):
+        return build_fake_llm(model, latency=latency, tokens_per_second=tokens_per_second, tool_calls=calls)
+
+    return create_app(build_parser().parse_args(argv), llm_factory=llm_factory, list_models=lambda refresh: ["fake"])
+
+
+class LoadTest:
+    """
+    Replays scripted multi-turn chat sessions against the web assistant.
+
+    The app is served by a threaded WSGI server on a free local port, so each
+    request goes through HTTP, Flask sessions and the agent, as it would in
+    production. `concurrency` sessions run at once. Each session keeps its own
+    cookies and so its own conversation thread. Each session sends its turns in
+    order and waits for every answer.
+    """
+
+    def __init__(self, app, concurrency: int = 4):
+        self.app = app
+        self.concurrency = concurrency
+
+    def run(self, sessions: List[List[str]]) -> Dict[str, float]:
+        """Runs `sessions` and returns throughput, latency, memory and tool-call figures."""
+        server = make_server("127.0.0.1", 0, self.app, threaded=True, request_handler=_QuietRequestHandler)
+        serving = threading.Thread(target=server.serve_forever, daemon=True)
+        serving.start()
+        url = f"http://127.0.0.1:{server.server_port}/chat"
+        latencies: List[float] = []
+        errors = [0]
+        lock = threading.Lock()
+
+        def run_session(turns: List[str]) -> None:
+            opener = build_opener(HTTPCookieProcessor(CookieJar()))
+            for message in turns:
+                request = Request(url, data=json.dumps({"message": message}).encode("utf-8"),
+                                  headers={"Content-Type": "application/json"})
+                started = time.perf_counter()
+                try:
+                    with opener.open(request, timeout=REQUEST_TIMEOUT) as response:
+                        response.read()
+                    failed = 0
+                except Exception:
+                    failed = 1
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+                    errors[0] += failed
+
+        PROFILER.reset()
+        gc.collect()
+        memory_before = rss_bytes()
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="load-session") as executor:
+                list(executor.map(run_session, sessions))
+        finally:
+            server.shutdown()
+        duration = time.perf_counter() - started
+        gc.collect()
+        memory_growth = rss_bytes() - memory_before
+
+        spans, counters = PROFILER.spans(), PROFILER.counters()
+        tools = spans.get("agent.tool_call", {})
+        return {
+            "sessions": len(sessions),
+            "requests": len(latencies),
+            "errors": errors[0],
+            "concurrency": self.concurrency,
+            "duration_s": round(duration, 4),
+            "throughput_rps": round(len(latencies) / duration, 3) if duration else 0.0,
+            "latency_p50_s": round(percentile(latencies, 50), 4),
+            "latency_p90_s": round(percentile(latencies, 90), 4),
+            "latency_p99_s": round(percentile(latencies, 99), 4),
+            "latency_max_s": round(max(latencies, default=0.0), 4),
+            "memory_growth_per_session_kb": round(memory_growth / max(len(sessions), 1) / 1024, 1),
+            "llm_calls": int(counters.get("llm.calls", 0)),
+            "llm_s": round(spans.get("llm.call", {}).get("total", 0.0), 4),
+            "tool_calls": int(tools.get("count", 0)),
+            "tool_s": round(tools.get("total", 0.0), 4),
+            "tool_max_s": round(tools.get("max", 0.0), 4),
+        }
+
+
+def format_report(report: Dict[str, float]) -> str:
+    """Renders a load-test report as one aligned name and value per line."""
+    width = max(len(name) for name in report)
+    return "\n".join(f"{name.ljust(width)}  {value}" for name, value in report.items())
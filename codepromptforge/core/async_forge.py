@@ -0,0 +1,103 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from .main import CodePromptForge
+from .repo_map import DEFAULT_MAX_TOKENS
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class AsyncCodePromptForge:
+    """
+    Asyncio front end for `CodePromptForge`.
+
+    Blocking file-system work is offloaded to a dedicated, bounded thread pool,
+    and at most `max_concurrency` operations are in flight at once, so many
+    sessions can share one process without starving the event loop or the disk.
+    Context variables (e.g. response-cache read tracking) follow each call into
+    the worker thread.
+    """
+
+    def __init__(self, forge: Optional[CodePromptForge] = None, max_workers: int = DEFAULT_MAX_WORKERS,
+                 max_concurrency: Optional[int] = None, **forge_kwargs):
+        self.forge = forge or CodePromptForge(**forge_kwargs)
+        self.max_concurrency = max_concurrency or max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="codepromptforge")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+
+    def _limit(self) -> asyncio.Semaphore:
+        # A semaphore belongs to one event loop; recreate it if we are used from another.
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _call(self, func, *args):
+        async with self._limit():
+            context = contextvars.copy_context()
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, functools.partial(context.run, func, *args)
+            )
+
+    async def get_directory_tree(self, folder_path: str) -> List[str]:
+        return await self._call(self.forge.get_directory_tree, folder_path)
+
+    async def get_repo_map(self, folder_path: str = ".", max_tokens: Optional[int] = DEFAULT_MAX_TOKENS) -> str:
+        return await self._call(self.forge.get_repo_map, folder_path, max_tokens)
+
+    async def get_file_content(self, file_path: str) -> str:
+        return await self._call(self.forge.get_file_content, file_path)
+
+    async def read_files(self, file_paths: Sequence[str]) -> Dict[str, str]:
+        """Reads several files concurrently, within the concurrency limit."""
+        contents = await asyncio.gather(*(self.get_file_content(path) for path in file_paths))
+        return dict(zip(file_paths, contents))
+
+    async def get_files_in_folder(self, folder_path: str) -> Dict[str, str]:
+        return await self._call(self.forge.get_files_in_folder, folder_path)
+
+    async def get_files_recursively(self, folder_path: str) -> Dict[str, str]:
+        return await self._call(self.forge.get_files_recursively, folder_path)
+
+    async def find_files(self, extensions: List[str]) -> List[Path]:
+        return await self._call(self.forge.find_files, extensions)
+
+    async def import_closure(self, entries: List[str], depth: Optional[int] = None) -> List[Path]:
+        return await self._call(self.forge.import_closure, entries, depth)
+
+    async def write_file(self, file_path: str, content: str) -> str:
+        return await self._call(self.forge.write_file, file_path, content)
+
+    async def write_files(self, files: Dict[str, str]) -> str:
+        return await self._call(self.forge.write_files, files)
+
+    async def apply_patch(self, file_path: str, diff: str) -> str:
+        return await self._call(self.forge.apply_patch, file_path, diff)
+
+    async def edit_file(self, file_path: str, edits: List[Dict[str, str]]) -> str:
+        return await self._call(self.forge.edit_file, file_path, edits)
+
+    async def forge_prompt(self, extensions: List[str]) -> None:
+        return await self._call(self.forge.forge_prompt, extensions)
+
+    async def run(self, extensions: List[str]) -> None:
+        return await self._call(self.forge.run, extensions)
+
+    async def clean_result_folder(self, excluded_files: List[str]) -> None:
+        return await self._call(self.forge.clean_result_folder, excluded_files)
+
+    def close(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+        return False
@@ -0,0 +1,160 @@
+import json
+import mmap
+import struct
+import zlib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from .cache import content_hash
+from .tokens import estimate_tokens
+
+# Layout: MAGIC | section bytes ... | JSON index | footer(index offset, index length, FOOTER_MAGIC)
+MAGIC = b"CPFBNDL1"
+FOOTER_MAGIC = b"CPFBIDX1"
+_FOOTER = struct.Struct("<QQ8s")
+
+# Section name used for the directory tree when `include_tree` is set.
+TREE_SECTION = "__tree__"
+
+
+class InvalidBundleError(Exception):
+    pass
+
+
+@dataclass
+class BundleEntry:
+    """Index record of one section: where its bytes live and what they contain."""
+
+    path: str
+    sha256: str
+    offset: int
+    length: int
+    size: int
+    tokens: int
+    compression: Optional[str] = None
+
+
+def write_bundle(output_file: Path, sections: Iterable[Tuple[str, str]], compress: bool = False,
+                 records: Optional[Mapping[str, Dict]] = None) -> List[BundleEntry]:
+    """
+    Writes `(path, text)` sections to `output_file` followed by their offset index.
+
+    With `compress=True` every section is zlib-compressed on its own, so a reader
+    can still decompress any single section without touching the others.
+    `records` are pipeline results keyed by path; their hashes and token
+    counts are used as they are, so the caller must leave out records of
+    files that changed since the pipeline read them. Sections with identical content are
+    stored once, and their index entries point at the same bytes.
+    """
+    entries = []
+    stored: Dict[str, BundleEntry] = {}
+    with Path(output_file).open("wb") as out:
+        out.write(MAGIC)
+        for path, text in sections:
+            raw = text.encode("utf-8")
+            record = records.get(path) if records else None
+            known = record is not None and "sha256" in record and "tokens" in record
+            sha256 = record["sha256"] if known else content_hash(raw)
+            first = stored.get(sha256)
+            if first is not None:
+                entries.append(BundleEntry(**{**asdict(first), "path": path}))
+                continue
+            data = zlib.compress(raw) if compress else raw
+            entry = BundleEntry(
+                path=path,
+                sha256=sha256,
+                offset=out.tell(),
+                length=len(data),
+                size=len(raw),
+                tokens=record["tokens"] if known else estimate_tokens(text),
+                compression="zlib" if compress else None,
+            )
+            entries.append(entry)
+            stored[sha256] = entry
+            out.write(data)
+        index = json.dumps({"version": 1, "sections": [asdict(e) for e in entries]}).encode("utf-8")
+        index_offset = out.tell()
+        out.write(index)
+        out.write(_FOOTER.pack(index_offset, len(index), FOOTER_MAGIC))
+    return entries
+
+
+class BundleReader:
+    """
+    Random-access reader for bundles written by `write_bundle`.
+
+    The file is memory-mapped and only the index is parsed up front; reading a
+    section touches just that section's bytes.
+    """
+
+    def __init__(self, bundle_file: str):
+        self.path = Path(bundle_file)
+        self._file = self.path.open("rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise InvalidBundleError(f"'{self.path}' is empty, not a bundle.")
+        try:
+            self._entries = self._load_index()
+        except Exception:
+            self.close()
+            raise
+
+    def _load_index(self) -> Dict[str, BundleEntry]:
+        if len(self._map) < len(MAGIC) + _FOOTER.size or self._map[:len(MAGIC)] != MAGIC:
+            raise InvalidBundleError(f"'{self.path}' is not a CodePromptForge bundle.")
+        index_offset, index_length, footer_magic = _FOOTER.unpack(self._map[-_FOOTER.size:])
+        if footer_magic != FOOTER_MAGIC:
+            raise InvalidBundleError(f"'{self.path}' is truncated or corrupt.")
+        index = json.loads(self._map[index_offset:index_offset + index_length].decode("utf-8"))
+        return {e["path"]: BundleEntry(**e) for e in index["sections"]}
+
+    def entries(self) -> List[BundleEntry]:
+        return list(self._entries.values())
+
+    def paths(self) -> List[str]:
+        return list(self._entries)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def entry(self, path: str) -> BundleEntry:
+        try:
+            return self._entries[path]
+        except KeyError:
+            raise KeyError(f"Section '{path}' not found in bundle '{self.path}'.") from None
+
+    def read_bytes(self, path: str, verify: bool = False) -> bytes:
+        """Returns the raw (decompressed) bytes of one section."""
+        entry = self.entry(path)
+        data = self._map[entry.offset:entry.offset + entry.length]
+        if entry.compression == "zlib":
+            data = zlib.decompress(data)
+        if verify and content_hash(data) != entry.sha256:
+            raise InvalidBundleError(f"Section '{path}' does not match its recorded hash.")
+        return data
+
+    def read(self, path: str, verify: bool = False) -> str:
+        """Returns the text of one section."""
+        return self.read_bytes(path, verify=verify).decode("utf-8")
+
+    def close(self) -> None:
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
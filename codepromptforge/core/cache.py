@@ -0,0 +1,150 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+# Maps absolute path -> content hash for reads made inside `record_reads()`.
+_read_log: ContextVar[Optional[Dict[str, str]]] = ContextVar("codepromptforge_read_log", default=None)
+
+
+def default_cache_dir() -> Path:
+    """Returns the per-user cache directory (`$XDG_CACHE_HOME/codepromptforge`)."""
+    root = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(root) / "codepromptforge"
+
+
+def content_hash(data: Union[str, bytes]) -> str:
+    """Returns the SHA-256 hex digest of `data` (strings are hashed as UTF-8)."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path: Union[str, Path]) -> Optional[str]:
+    """Returns the content hash of a text file, or None if it can no longer be read."""
+    try:
+        return content_hash(Path(path).read_text(encoding="utf-8"))
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+# Listing dependencies are recorded under this prefix followed by the folder's absolute path.
+LISTING_PREFIX = "listing:"
+# Writes are recorded under this prefix; an answer that wrote files cannot be replayed from the cache.
+WRITE_PREFIX = "write:"
+
+
+def listing_digest(paths: Iterable[str]) -> str:
+    """Hash of a file listing, independent of its order."""
+    return content_hash("\n".join(sorted(paths)))
+
+
+def dependency_hash(dependency: str, listing_hash: Optional[Callable[[str], Optional[str]]] = None) -> Optional[str]:
+    """
+    Current hash of a recorded dependency: a file's content, or a folder's
+    listing as computed by `listing_hash(folder)` (None, i.e. changed, without one).
+    """
+    if dependency.startswith(LISTING_PREFIX):
+        return listing_hash(dependency[len(LISTING_PREFIX):]) if listing_hash else None
+    return file_hash(dependency)
+
+
+@contextmanager
+def record_reads():
+    """
+    Collects `{path: content hash}` for every file the forge reads inside the
+    block, plus a listing hash for every folder it lists (see `note_listing`)
+    and a `WRITE_PREFIX` entry for every file it writes.
+    """
+    log: Dict[str, str] = {}
+    token = _read_log.set(log)
+    try:
+        yield log
+    finally:
+        _read_log.reset(token)
+
+
+def note_read(path: Path, content: str) -> None:
+    """Called by the forge after each read; a no-op unless `record_reads()` is active."""
+    log = _read_log.get()
+    if log is not None:
+        log[str(path)] = content_hash(content)
+
+
+def note_hash(path: Path, digest: str) -> None:
+    """Like `note_read`, for results derived from a file whose content hash is already known."""
+    log = _read_log.get()
+    if log is not None:
+        log[str(path)] = digest
+
+
+def recording() -> bool:
+    """True inside `record_reads()`; lets the forge skip work only a recording needs."""
+    return _read_log.get() is not None
+
+
+def note_listing(folder: Path, digest: str) -> None:
+    """Called by the forge after listing `folder`, so answers built on the listing notice added or removed files."""
+    log = _read_log.get()
+    if log is not None:
+        log[LISTING_PREFIX + str(folder)] = digest
+
+
+def note_write(path: Path) -> None:
+    """Called by the forge after writing `path`."""
+    log = _read_log.get()
+    if log is not None:
+        log[WRITE_PREFIX + str(path)] = ""
+
+
+class ContentCache:
+    """
+    Thread-safe LRU cache of file contents, validated by modification time and size.
+
+    One instance can be shared by several forges (e.g. across the roots of a
+    multi-root combine) so each file is read from disk once.
+    """
+
+    def __init__(self, max_chars: int = 256 * 1024 * 1024):
+        self.max_chars = max_chars
+        self._entries: "OrderedDict[str, Tuple[int, int, str]]" = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def read_text(self, path: Path) -> str:
+        """Returns the file's text, from the cache if the file is unchanged since it was stored."""
+        stat = path.stat()
+        key = str(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self._entries.move_to_end(key)
+                return entry[2]
+        text = path.read_text(encoding="utf-8")
+        self.put(key, stat.st_mtime_ns, stat.st_size, text)
+        return text
+
+    def put(self, key: str, mtime_ns: int, size: int, text: str) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._chars -= len(previous[2])
+            if len(text) > self.max_chars:
+                return
+            self._entries[key] = (mtime_ns, size, text)
+            self._chars += len(text)
+            while self._chars > self.max_chars:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._chars -= len(evicted)
+
+    def __contains__(self, path) -> bool:
+        with self._lock:
+            return str(path) in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -1,7 +1,14 @@
 import argparse
+import cProfile
 import json
 import sys
+from pathlib import Path
 from .main import CodePromptForge
+from .multiroot import MultiRootForge
+from .bundle import BundleReader
+from .pipeline import DEFAULT_STAGES, STAGES
+from .repo_map import DEFAULT_MAX_TOKENS
+from .profiling import PROFILER
 
 ##############################
 # Core Commands Registration #
@@ -11,6 +18,9 @@ def register_core_commands(subparsers):
     parser_tree = subparsers.add_parser("tree", help="Display the directory tree")
     parser_tree.add_argument("--folder", required=True, help="Folder path")
     parser_tree.add_argument("--base-dir", required=True, help="Base directory")
+    parser_tree.add_argument("--git", action="store_true", help="List tracked files from the git index instead of walking")
+    parser_tree.add_argument("--compact", action="store_true", help="Print an indented tree instead of full paths")
+    add_tree_limit_arguments(parser_tree)
     parser_tree.set_defaults(func=handle_tree)
 
     # file command
@@ -29,6 +39,7 @@ def register_core_commands(subparsers):
     parser_files_recursive = subparsers.add_parser("files_recursive", help="Recursively list files")
     parser_files_recursive.add_argument("--folder", required=True, help="Folder path")
     parser_files_recursive.add_argument("--base-dir", required=True, help="Base directory")
+    parser_files_recursive.add_argument("--git", action="store_true", help="List tracked files from the git index instead of walking")
     parser_files_recursive.set_defaults(func=handle_files_recursive)
 
     # write command
@@ -38,29 +49,93 @@ def register_core_commands(subparsers):
     parser_write.add_argument("--base-dir", required=True, help="Base directory")
     parser_write.set_defaults(func=handle_write)
 
+    # patch command
+    parser_patch = subparsers.add_parser("patch", help="Apply a unified diff or search/replace edits; the result is written into .result")
+    parser_patch.add_argument("--file", required=True, help="File path")
+    parser_patch.add_argument("--base-dir", required=True, help="Base directory")
+    parser_patch.add_argument("--diff-file", help="Unified diff to apply ('-' reads stdin)")
+    parser_patch.add_argument("--search", action="append", default=[], help="Exact text to replace (repeatable, paired with --replace)")
+    parser_patch.add_argument("--replace", action="append", default=[], help="Replacement text for the matching --search")
+    parser_patch.set_defaults(func=handle_patch)
+
     # combine command
     parser_combine = subparsers.add_parser("combine", help="Combine files into an output file")
-    parser_combine.add_argument("--extensions", nargs="+", required=True, help="List of file extensions")
+    parser_combine.add_argument("--extensions", nargs="+", help="List of file extensions (defaults to py with --entry)")
     parser_combine.add_argument("--output-file", required=True, help="Output file for the combination")
     parser_combine.add_argument("--base-dir", required=True, help="Base directory")
     parser_combine.add_argument("--force", action="store_true", help="Force overwrite existing output file")
     parser_combine.add_argument("--exclude", nargs="*", default=[], help="Files to exclude from concatenation")
+    parser_combine.add_argument("--format", choices=["text", "bundle"], default="text", help="Flat text file or indexed bundle")
+    parser_combine.add_argument("--compress", action="store_true", help="Compress each bundle section (bundle format only)")
+    parser_combine.add_argument("--shard-size", type=int, help="Split the output into shards of at most this many bytes/tokens")
+    parser_combine.add_argument("--shard-unit", choices=["bytes", "tokens"], default="bytes", help="Unit of --shard-size")
+    parser_combine.add_argument("--root", action="append", default=[], help="Additional base directory to combine (repeatable); paths are prefixed with the root name")
+    parser_combine.add_argument("--include-tree", action="store_true", help="Prepend the directory tree to the output")
+    parser_combine.add_argument("--tree-style", choices=["flat", "compact"], default="compact", help="Full paths or an indented tree")
+    add_tree_limit_arguments(parser_combine)
+    parser_combine.add_argument("--git", action="store_true", help="List tracked files from the git index instead of walking")
+    parser_combine.add_argument("--since", help="Only include files changed relative to this git ref")
+    parser_combine.add_argument("--with-diff", action="store_true", help="Append each file's diff against --since")
+    parser_combine.add_argument("--entry", action="append", default=[], help="Only include this Python file and the files it imports (repeatable)")
+    parser_combine.add_argument("--depth", type=int, help="Follow imports at most this many levels from --entry")
+    add_workers_argument(parser_combine)
     parser_combine.set_defaults(func=handle_combine)
 
+    # index command
+    parser_index = subparsers.add_parser("index", help="Print one JSON record per file with hashes, token counts, outlines, ...")
+    parser_index.add_argument("--extensions", nargs="+", required=True, help="List of file extensions")
+    parser_index.add_argument("--base-dir", required=True, help="Base directory")
+    parser_index.add_argument("--stages", nargs="+", choices=sorted(STAGES), default=list(DEFAULT_STAGES), help="Per-file stages to run")
+    parser_index.add_argument("--exclude", nargs="*", default=[], help="Files to leave out")
+    parser_index.add_argument("--git", action="store_true", help="List tracked files from the git index instead of walking")
+    add_workers_argument(parser_index)
+    parser_index.set_defaults(func=handle_index)
+
+    # repo_map command
+    parser_map = subparsers.add_parser("repo_map", help="Summarize every file: size, lines, tokens, language, symbols and a one-line summary")
+    parser_map.add_argument("--base-dir", required=True, help="Base directory")
+    parser_map.add_argument("--folder", default=".", help="Folder to map")
+    parser_map.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS, help="Approximate size limit of the printed map (0 = unlimited)")
+    parser_map.add_argument("--json", action="store_true", help="Print one JSON record per file instead of the compact map")
+    parser_map.add_argument("--exclude", nargs="*", default=[], help="Files to leave out")
+    parser_map.add_argument("--git", action="store_true", help="List tracked files from the git index instead of walking")
+    parser_map.set_defaults(func=handle_repo_map)
+
+    # extract command
+    parser_extract = subparsers.add_parser("extract", help="Read sections from a bundle written by 'combine --format bundle'")
+    parser_extract.add_argument("--bundle", required=True, help="Bundle file")
+    parser_extract.add_argument("--path", nargs="*", default=[], help="Relative paths of the sections to print")
+    parser_extract.add_argument("--list", action="store_true", help="List the bundle index instead of printing sections")
+    parser_extract.add_argument("--output-dir", help="Write the sections as files under this directory instead of printing")
+    parser_extract.set_defaults(func=handle_extract)
+
     # clean_result command
     parser_clean = subparsers.add_parser("clean_result", help="Clean the .result folder")
     parser_clean.add_argument("--exclude-clean", nargs="+", required=True, help="Files to remove from .result folder")
     parser_clean.add_argument("--base-dir", required=True, help="Base directory")
     parser_clean.set_defaults(func=handle_clean_result)
 
+def add_tree_limit_arguments(parser):
+    parser.add_argument("--max-depth", type=int, help="Collapse directories below this depth into a file count (0 summarises the whole tree)")
+    parser.add_argument("--max-entries", type=int, help="List at most this many entries per directory")
+
+def add_workers_argument(parser):
+    parser.add_argument("--workers", type=int, default=1, help="Processes for hashing and token counting (0 = one per core)")
+
 ###########################
 # Core Commands Handlers  #
 ###########################
+def enumeration(args):
+    return "git" if getattr(args, "git", False) else "walk"
+
 def handle_tree(args):
-    forge = CodePromptForge(base_dir=args.base_dir)
+    forge = CodePromptForge(base_dir=args.base_dir, enumeration=enumeration(args))
     try:
-        tree = forge.get_directory_tree(args.folder)
-        print("\n".join(tree))
+        if args.compact or args.max_depth is not None or args.max_entries is not None:
+            print(forge.render_directory_tree(args.folder, max_depth=args.max_depth, max_entries=args.max_entries))
+        else:
+            tree = forge.get_directory_tree(args.folder)
+            print("\n".join(tree))
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -84,7 +159,7 @@ def handle_files(args):
         sys.exit(1)
 
 def handle_files_recursive(args):
-    forge = CodePromptForge(base_dir=args.base_dir)
+    forge = CodePromptForge(base_dir=args.base_dir, enumeration=enumeration(args))
     try:
         files = forge.get_files_recursively(args.folder)
         print(json.dumps(files, indent=2))
@@ -101,12 +176,49 @@ def handle_write(args):
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
+def handle_patch(args):
+    forge = CodePromptForge(base_dir=args.base_dir)
+    try:
+        if args.diff_file:
+            diff = sys.stdin.read() if args.diff_file == "-" else Path(args.diff_file).read_text(encoding="utf-8")
+            result = forge.apply_patch(args.file, diff)
+        elif args.search and len(args.search) == len(args.replace):
+            result = forge.edit_file(args.file, list(zip(args.search, args.replace)))
+        else:
+            raise ValueError("Provide --diff-file, or matching pairs of --search and --replace")
+        print(result)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
 def handle_combine(args):
+    if not args.extensions:
+        if not args.entry:
+            print("Error: --extensions is required unless --entry is given", file=sys.stderr)
+            sys.exit(1)
+        args.extensions = ["py"]
+    if args.root:
+        handle_combine_roots(args)
+        return
     forge = CodePromptForge(
         base_dir=args.base_dir,
         output_file=args.output_file,
         force=args.force,
-        excluded=args.exclude
+        include_tree=args.include_tree,
+        excluded=args.exclude,
+        output_format=args.format,
+        compress=args.compress,
+        tree_style=args.tree_style,
+        tree_max_depth=args.max_depth,
+        tree_max_entries=args.max_entries,
+        shard_size=args.shard_size,
+        shard_unit=args.shard_unit,
+        enumeration=enumeration(args),
+        since=args.since,
+        include_diffs=args.with_diff,
+        workers=args.workers,
+        entries=args.entry,
+        entry_depth=args.depth
     )
     try:
         forge.forge_prompt(args.extensions)
@@ -114,6 +226,73 @@ def handle_combine(args):
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
+def handle_combine_roots(args):
+    try:
+        if args.shard_size or args.since or args.entry:
+            raise ValueError("--shard-size, --since and --entry are not supported together with --root")
+        forge = MultiRootForge(
+            [args.base_dir] + args.root,
+            output_file=args.output_file,
+            force=args.force,
+            include_tree=args.include_tree,
+            excluded=args.exclude,
+            output_format=args.format,
+            compress=args.compress,
+            enumeration=enumeration(args),
+            tree_style=args.tree_style,
+            tree_max_depth=args.max_depth,
+            tree_max_entries=args.max_entries
+        )
+        forge.forge_prompt(args.extensions)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+def handle_index(args):
+    try:
+        forge = CodePromptForge(base_dir=args.base_dir, excluded=args.exclude, enumeration=enumeration(args),
+                                workers=args.workers)
+        for record in forge.index_files(args.extensions, stages=args.stages):
+            print(json.dumps(record))
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+def handle_repo_map(args):
+    try:
+        forge = CodePromptForge(base_dir=args.base_dir, excluded=args.exclude, enumeration=enumeration(args))
+        if args.json:
+            for record in forge.repo_map_records(args.folder):
+                print(json.dumps(record))
+        else:
+            print(forge.get_repo_map(args.folder, max_tokens=args.max_tokens))
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+def handle_extract(args):
+    try:
+        with BundleReader(args.bundle) as reader:
+            if args.list:
+                for entry in reader.entries():
+                    print(f"{entry.path}\t{entry.size}\t{entry.tokens}\t{entry.sha256}")
+                return
+            for path in args.path or reader.paths():
+                content = reader.read(path, verify=True)
+                if args.output_dir:
+                    output_dir = Path(args.output_dir).resolve()
+                    target = (output_dir / path).resolve()
+                    if output_dir not in target.parents:
+                        raise ValueError(f"Refusing to write '{path}' outside {output_dir}")
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    target.write_text(content, encoding="utf-8")
+                else:
+                    print(f"### {path} ###")
+                    print(content)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
 def handle_clean_result(args):
     forge = CodePromptForge(base_dir=args.base_dir)
     try:
@@ -122,11 +301,38 @@ def handle_clean_result(args):
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
+#######################
+# Profiling            #
+#######################
+def run_profiled(args):
+    """Runs the selected command with instrumentation and reports where time went."""
+    output = args.profile_output
+    use_cprofile = bool(output and output.endswith(".prof"))
+    PROFILER.reset()
+    PROFILER.enable(trace=bool(output and not use_cprofile))
+    profile = cProfile.Profile() if use_cprofile else None
+    try:
+        if profile:
+            profile.runcall(args.func, args)
+        else:
+            args.func(args)
+    finally:
+        PROFILER.disable()
+        print(PROFILER.summary(), file=sys.stderr)
+        if profile:
+            profile.dump_stats(output)
+        elif output:
+            PROFILER.write_json(output)
+        if output:
+            print(f"Profile written to {output}", file=sys.stderr)
+
 #######################
 # Main CLI Entry Point#
 #######################
 def main():
     parser = argparse.ArgumentParser(description="Code management CLI for CodePromptForge.")
+    parser.add_argument("--profile", action="store_true", help="Print a timing breakdown to stderr after the command")
+    parser.add_argument("--profile-output", help="Write a JSON trace, or cProfile stats if the name ends in .prof")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     # Register core commands
@@ -142,7 +348,10 @@ def main():
 
     args = parser.parse_args()
     if hasattr(args, "func"):
-        args.func(args)
+        if args.profile or args.profile_output:
+            run_profiled(args)
+        else:
+            args.func(args)
     else:
         print("No valid command selected.", file=sys.stderr)
         sys.exit(1)
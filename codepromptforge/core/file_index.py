@@ -0,0 +1,147 @@
+import os
+import stat as stat_module
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Bits of the per-file `flags` column.
+FLAG_SYMLINK = 1
+FLAG_EXECUTABLE = 2
+
+
+class FileIndex:
+    """
+    Memory-compact snapshot of a file listing, for trees with millions of files.
+
+    Directory paths are interned once; every file is a row of array-backed
+    columns (directory id, name offset/length into one shared UTF-8 buffer,
+    size, mtime, flags), about 30 bytes plus its name instead of a `str` and a
+    `Path` per file. File names are deduplicated, so the `__init__.py`s of a
+    large tree share one copy. Queries decode paths lazily, one at a time.
+    """
+
+    def __init__(self):
+        self._names = bytearray()
+        self._dir_paths: List[str] = []
+        # Build-time lookup tables, dropped by `freeze`
+        self._name_offsets: Dict[str, int] = {}
+        self._dir_ids: Dict[str, int] = {}
+        self._file_dir = array("I")
+        self._name_offset = array("I")
+        self._name_length = array("H")
+        self._size = array("Q")
+        self._mtime_ns = array("q")
+        self._flags = array("B")
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls, base_dir: Union[str, Path], files: Iterable[Path]) -> "FileIndex":
+        """Indexes `files` (absolute paths under `base_dir`), keeping their order."""
+        index = cls()
+        base_dir = Path(base_dir)
+        for file in files:
+            try:
+                info = file.lstat()
+            except OSError:
+                continue
+            index.add(str(file.relative_to(base_dir)), info)
+        index.freeze()
+        return index
+
+    def _dir_id(self, directory: str) -> int:
+        dir_id = self._dir_ids.get(directory)
+        if dir_id is None:
+            dir_id = self._dir_ids[directory] = len(self._dir_paths)
+            self._dir_paths.append(directory)
+        return dir_id
+
+    def add(self, relative_path: str, info: os.stat_result) -> None:
+        directory, _, name = relative_path.rpartition(os.sep)
+        encoded = name.encode("utf-8", "surrogateescape")
+        offset = self._name_offsets.get(name)
+        if offset is None:
+            offset = self._name_offsets[name] = len(self._names)
+            self._names += encoded
+        flags = 0
+        if stat_module.S_ISLNK(info.st_mode):
+            flags |= FLAG_SYMLINK
+        if info.st_mode & 0o111:
+            flags |= FLAG_EXECUTABLE
+        self._file_dir.append(self._dir_id(directory))
+        self._name_offset.append(offset)
+        self._name_length.append(len(encoded))
+        self._size.append(info.st_size)
+        self._mtime_ns.append(info.st_mtime_ns)
+        self._flags.append(flags)
+
+    def freeze(self) -> None:
+        """Drops build-time lookup tables; the index stays queryable."""
+        self._name_offsets = {}
+        self._dir_ids = {}
+
+    def __len__(self) -> int:
+        return len(self._file_dir)
+
+    def age(self) -> float:
+        return time.monotonic() - self.built_at
+
+    def name(self, row: int) -> str:
+        offset = self._name_offset[row]
+        return self._names[offset:offset + self._name_length[row]].decode("utf-8", "surrogateescape")
+
+    def path(self, row: int) -> str:
+        """Relative path of the file in `row`."""
+        directory = self._dir_paths[self._file_dir[row]]
+        return f"{directory}{os.sep}{self.name(row)}" if directory else self.name(row)
+
+    def size(self, row: int) -> int:
+        return self._size[row]
+
+    def mtime_ns(self, row: int) -> int:
+        return self._mtime_ns[row]
+
+    def flags(self, row: int) -> int:
+        return self._flags[row]
+
+    def _dirs_under(self, folder: str) -> Optional[set]:
+        """Directory ids at or below `folder`, or None when `folder` is the root."""
+        folder = os.path.normpath(folder)
+        if folder in (".", ""):
+            return None
+        prefix = folder + os.sep
+        return {i for i, path in enumerate(self._dir_paths) if path == folder or path.startswith(prefix)}
+
+    def rows(self, folder: str = ".", suffixes: Sequence[str] = ()) -> Iterator[int]:
+        """Yields the rows under `folder` whose names end in one of `suffixes` (all when empty)."""
+        dirs = self._dirs_under(folder)
+        encoded = tuple(suffix.encode("utf-8") for suffix in suffixes)
+        for row in range(len(self)):
+            if dirs is not None and self._file_dir[row] not in dirs:
+                continue
+            if encoded:
+                offset = self._name_offset[row]
+                if not self._names[offset:offset + self._name_length[row]].endswith(encoded):
+                    continue
+            yield row
+
+    def paths(self, folder: str = ".", suffixes: Sequence[str] = ()) -> Iterator[str]:
+        """Yields the relative paths under `folder`, optionally filtered by suffix, in index order."""
+        for row in self.rows(folder, suffixes):
+            yield self.path(row)
+
+    def __iter__(self) -> Iterator[str]:
+        return self.paths()
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the index (columns, name buffer and directory strings)."""
+        columns = (self._file_dir, self._name_offset, self._name_length, self._size, self._mtime_ns, self._flags)
+        return (
+            len(self._names)
+            + sum(column.itemsize * len(column) for column in columns)
+            + sum(len(path) + 49 for path in self._dir_paths)
+        )
+
+    def stats(self) -> Tuple[int, int, int]:
+        """`(files, directories, approximate bytes)`."""
+        return len(self), len(self._dir_paths), self.memory_bytes()
@@ -0,0 +1,46 @@
+import subprocess
+from pathlib import Path
+from typing import List
+
+
+class GitError(Exception):
+    pass
+
+
+def _git(base_dir: Path, *args: str) -> str:
+    """Runs a git command inside `base_dir` and returns its stdout."""
+    try:
+        result = subprocess.run(
+            ["git", "-C", str(base_dir), *args],
+            capture_output=True,
+            check=False,
+        )
+    except FileNotFoundError:
+        raise GitError("git executable not found.") from None
+    if result.returncode != 0:
+        raise GitError(result.stderr.decode("utf-8", "replace").strip() or f"git {args[0]} failed")
+    return result.stdout.decode("utf-8", "surrogateescape")
+
+
+def _split_nul(output: str) -> List[str]:
+    return [path for path in output.split("\0") if path]
+
+
+def list_tracked_files(base_dir: Path) -> List[str]:
+    """Lists files in the git index under `base_dir`, relative to it, without walking the disk."""
+    return _split_nul(_git(base_dir, "ls-files", "-z", "--cached"))
+
+
+def changed_files(base_dir: Path, ref: str) -> List[str]:
+    """
+    Lists files under `base_dir` that differ from `ref` in the working tree, plus
+    untracked files that are not ignored. Deleted files are left out.
+    """
+    changed = _split_nul(_git(base_dir, "diff", "--name-only", "-z", "--relative", "--diff-filter=d", ref, "--"))
+    untracked = _split_nul(_git(base_dir, "ls-files", "-z", "--others", "--exclude-standard"))
+    return sorted(set(changed) | set(untracked))
+
+
+def file_diff(base_dir: Path, ref: str, path: str) -> str:
+    """Returns the unified diff of one file against `ref` (empty for untracked files)."""
+    return _git(base_dir, "diff", "--relative", ref, "--", path)
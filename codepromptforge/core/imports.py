@@ -0,0 +1,165 @@
+import ast
+import json
+import os
+import tempfile
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .cache import content_hash, default_cache_dir
+
+# One import statement: (relative level, module, imported names). `import a.b`
+# is (0, "a.b", []); `from ..pkg import x, y` is (2, "pkg", ["x", "y"]).
+ImportSpec = Tuple[int, str, List[str]]
+
+# Files whose parsed imports the cache keeps, least recently used dropped first
+MAX_CACHE_ENTRIES = 50000
+
+
+def parse_imports(text: str) -> List[ImportSpec]:
+    """Returns every import statement in a Python source, including ones nested in functions."""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return []
+    specs: List[ImportSpec] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            specs.extend((0, alias.name, []) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            specs.append((node.level, node.module or "", [alias.name for alias in node.names if alias.name != "*"]))
+    return specs
+
+
+class ImportGraph:
+    """
+    Statically resolved Python import graph of the files under `base_dir`.
+
+    Parsed imports are cached by file content hash in a JSON file, so after
+    the first run only files whose content changed are parsed again. Imports
+    are resolved against `base_dir` (and `base_dir/src` when present);
+    imports of modules outside the tree are ignored.
+    """
+
+    def __init__(self, base_dir: Path, read_text=None, cache_file: Optional[Path] = None):
+        self.base_dir = Path(base_dir).resolve()
+        self.read_text = read_text or (lambda path: path.read_text(encoding="utf-8"))
+        digest = content_hash(str(self.base_dir))[:16]
+        self.cache_file = cache_file or default_cache_dir() / "imports" / f"{digest}.json"
+        self.roots = [self.base_dir] + [root for root in (self.base_dir / "src",) if root.is_dir()]
+        self._cached: Dict[str, List[ImportSpec]] = self._load()
+        self._used: Dict[str, List[ImportSpec]] = {}
+        self._lock = threading.Lock()
+        self.parsed = 0  # files parsed because their hash was not cached
+
+    def _load(self) -> Dict[str, List[ImportSpec]]:
+        try:
+            return json.loads(self.cache_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def save(self) -> None:
+        """
+        Merges the imports parsed or used in this session into the cache file.
+
+        Entries from earlier runs are kept, so runs with different entry
+        points stay incremental. Once the cache holds more than
+        `MAX_CACHE_ENTRIES` files, the least recently used entries are dropped.
+        """
+        with self._lock:
+            if not self._used:
+                return
+            used = dict(self._used)
+        merged = {**self._load(), **self._cached}  # entries other processes saved meanwhile
+        for digest in used:
+            merged.pop(digest, None)
+        merged.update(used)  # ✅ Most recently used last
+        for digest in list(merged)[:max(0, len(merged) - MAX_CACHE_ENTRIES)]:
+            del merged[digest]
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=self.cache_file.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as temp:
+            temp.write(json.dumps(merged))
+        os.replace(temp_name, self.cache_file)
+        with self._lock:
+            self._cached = merged
+
+    def imports_of(self, file: Path) -> List[ImportSpec]:
+        try:
+            text = self.read_text(file)
+        except (OSError, UnicodeDecodeError):
+            return []
+        digest = content_hash(text)
+        with self._lock:
+            specs = self._used.get(digest, self._cached.get(digest))
+        if specs is None:
+            specs = parse_imports(text)
+            self.parsed += 1
+        with self._lock:
+            self._used[digest] = specs
+        return specs
+
+    def _module_file(self, module: str) -> Optional[Path]:
+        """Maps a dotted module name to `module.py` or `module/__init__.py` inside the tree."""
+        if not module:
+            return None
+        parts = module.split(".")
+        for root in self.roots:
+            candidate = root.joinpath(*parts)
+            for file in (candidate.with_name(parts[-1] + ".py"), candidate / "__init__.py"):
+                if file.is_file():
+                    return file
+        return None
+
+    def _package_inits(self, module: str) -> List[Path]:
+        """`__init__.py` of every package along a dotted path; importing `a.b.c` runs `a` and `a.b` first."""
+        parts = module.split(".")
+        found = []
+        for length in range(1, len(parts)):
+            for root in self.roots:
+                init = root.joinpath(*parts[:length], "__init__.py")
+                if init.is_file():
+                    found.append(init)
+                    break
+        return found
+
+    def _package_of(self, file: Path) -> List[str]:
+        """Dotted package parts of `file`, relative to the root that contains it."""
+        for root in sorted(self.roots, key=lambda r: len(r.parts), reverse=True):
+            if root in file.parents:
+                return list(file.relative_to(root).parent.parts)
+        return []
+
+    def dependencies(self, file: Path) -> List[Path]:
+        """Files inside the tree imported by `file`, in import order."""
+        found: List[Path] = []
+        package = self._package_of(file)
+        for level, module, names in self.imports_of(file):
+            if level:
+                if level - 1 > len(package):
+                    continue
+                base = package[:len(package) - (level - 1)]
+                module = ".".join(base + ([module] if module else []))
+            # `from pkg import mod` may name submodules as well as attributes
+            candidates = [module] + [f"{module}.{name}" if module else name for name in names]
+            if module:
+                found.extend(self._package_inits(module))
+            found.extend(resolved for resolved in map(self._module_file, candidates) if resolved is not None)
+        return list(dict.fromkeys(found))
+
+    def closure(self, entries: Iterable[Path], depth: Optional[int] = None) -> List[Path]:
+        """Breadth-first transitive imports of `entries`, at most `depth` levels deep (None = unlimited)."""
+        seen: Dict[Path, None] = {}
+        queue = deque((Path(entry).resolve(), 0) for entry in entries)
+        while queue:
+            file, level = queue.popleft()
+            if file in seen or not file.is_file():
+                continue
+            seen[file] = None
+            if depth is not None and level >= depth:
+                continue
+            for dependency in self.dependencies(file):
+                if dependency not in seen:
+                    queue.append((dependency, level + 1))
+        return list(seen)
@@ -1,10 +1,25 @@
+import itertools
 import os
+import tempfile
+import threading
 from pathlib import Path
-from typing import List, Dict, Optional, Type
+from typing import Iterator, List, Dict, Optional, Tuple, Type
 from pydantic import BaseModel, Field
 from langchain_core.tools import BaseTool
 import pathspec  # ✅ Added for .gitignore handling
 from langchain_community.tools import DuckDuckGoSearchRun, DuckDuckGoSearchResults
+from .profiling import PROFILER, profiled
+from .cache import ContentCache, listing_digest, note_listing, note_read, note_write, recording
+from .bundle import TREE_SECTION, write_bundle
+from .shard import manifest_file_name, plan_shards, write_shards
+from .git import changed_files, file_diff, list_tracked_files
+from .tree import format_tree, render_tree
+from .patch import apply_search_replace, apply_unified_diff
+from .pipeline import DEFAULT_STAGES, FilePipeline, fresh_record
+from .file_index import FileIndex
+from .imports import ImportGraph
+from .prefetch import Prefetcher
+from .repo_map import DEFAULT_MAX_TOKENS, RepoMap, render_repo_map
 class InvalidBaseDirectoryError(Exception):
     pass
 
@@ -14,6 +29,26 @@ class NoFilesFoundError(Exception):
 class OutputFileAlreadyExistsError(Exception):
     pass
 
+def _umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+# Mode of new files in .result, as `open()` would create them; read once at import
+_NEW_FILE_MODE = 0o666 & ~_umask()
+
+_READ_TOOLS = ("get_directory_tree", "get_repo_map", "get_file_content", "get_files_in_folder",
+               "get_files_recursively", "find_files", "get_import_closure")
+_EDIT_TOOLS = ("write_file", "write_files", "apply_patch", "edit_file", "clean_result_folder")
+
+# Named tool sets for `get_tools(profile)`; None means every tool.
+TOOL_PROFILES: Dict[str, Optional[tuple]] = {
+    "review": _READ_TOOLS,  # ✅ Read-only
+    "editing": _READ_TOOLS + _EDIT_TOOLS,
+    "offline": _READ_TOOLS + _EDIT_TOOLS + ("forge_prompt",),  # ✅ No network access
+    "full": None,
+}
+
 class CodePromptForge:
     def __init__(
         self,
@@ -22,7 +57,24 @@ class CodePromptForge:
         dry_run: bool = False,
         force: bool = False,
         include_tree: bool = False,
-        excluded: Optional[List[str]] = None
+        excluded: Optional[List[str]] = None,
+        output_format: str = "text",
+        compress: bool = False,
+        shard_size: Optional[int] = None,
+        shard_unit: str = "bytes",
+        content_cache: Optional[ContentCache] = None,
+        enumeration: str = "walk",
+        since: Optional[str] = None,
+        include_diffs: bool = False,
+        tree_style: str = "flat",
+        tree_max_depth: Optional[int] = None,
+        tree_max_entries: Optional[int] = None,
+        workers: int = 1,
+        use_file_index: bool = False,
+        file_index_ttl: Optional[float] = None,
+        entries: Optional[List[str]] = None,
+        entry_depth: Optional[int] = None,
+        prefetcher: Optional[Prefetcher] = None
     ):
         self.base_dir = Path(base_dir).resolve()
         if not self.base_dir.exists() or not self.base_dir.is_dir():
@@ -32,6 +84,37 @@ class CodePromptForge:
         self.dry_run = dry_run
         self.force = force
         self.include_tree = include_tree
+        if output_format not in ("text", "bundle"):
+            raise ValueError(f"Unknown output format '{output_format}'; expected 'text' or 'bundle'.")
+        self.output_format = output_format
+        self.compress = compress
+        if shard_size and output_format != "text":
+            raise ValueError("Sharding is only supported for the text output format.")
+        self.shard_size = shard_size
+        self.shard_unit = shard_unit
+        self.content_cache = content_cache
+        if enumeration not in ("walk", "git"):
+            raise ValueError(f"Unknown enumeration '{enumeration}'; expected 'walk' or 'git'.")
+        self.enumeration = enumeration  # "git" lists files from the index instead of walking
+        self.since = since  # limit find_files to files changed relative to this git ref
+        self.include_diffs = include_diffs
+        if tree_style not in ("flat", "compact"):
+            raise ValueError(f"Unknown tree style '{tree_style}'; expected 'flat' or 'compact'.")
+        self.tree_style = tree_style  # "compact" prints each directory prefix once
+        self.tree_max_depth = tree_max_depth
+        self.tree_max_entries = tree_max_entries
+        self.workers = workers  # processes for CPU-bound per-file stages; 0 uses every core
+        self.use_file_index = use_file_index  # answer listings from a resident compact index
+        self.file_index_ttl = file_index_ttl  # rebuild the index once it is older (seconds); None keeps it
+        self._file_index: Optional[FileIndex] = None
+        self._file_index_lock = threading.Lock()
+        self.entries = entries  # select only these files and their transitive Python imports
+        self.entry_depth = entry_depth
+        self._import_graph: Optional[ImportGraph] = None
+        self._repo_map: Optional[RepoMap] = None
+        self.prefetcher = prefetcher  # warms the content cache with files the listing tools return
+        self._aio: Optional["AsyncCodePromptForge"] = None
+        self._aio_lock = threading.Lock()
         self.result_dir = self.base_dir / ".result"
         self.result_dir.mkdir(parents=True, exist_ok=True)
 
@@ -52,6 +135,7 @@ class CodePromptForge:
 
         return pathspec.PathSpec.from_lines("gitwildmatch", gitignore_patterns)
 
+    @profiled("forge.is_ignored")
     def _is_ignored(self, file_path: Path) -> bool:
         """Checks if a file is ignored by .gitignore, explicitly excluded, or in `.git`."""
         relative_path = str(file_path.relative_to(self.base_dir))
@@ -61,74 +145,381 @@ class CodePromptForge:
             or (".git/" in relative_path or relative_path.startswith(".git"))  # ✅ Always ignore `.git`
         )
 
+    def _read_text(self, file_path: Path) -> str:
+        """Reads a file as UTF-8 text; every forge read goes through here."""
+        if self.content_cache is not None:
+            content = self.content_cache.read_text(file_path)
+        else:
+            content = file_path.read_text(encoding="utf-8")
+        if PROFILER.enabled:
+            PROFILER.incr("forge.files_read")
+            PROFILER.incr("forge.chars_read", len(content))
+        note_read(file_path, content)
+        return content
+
+    def _candidate_files(self, target_path: Path) -> Iterator[Path]:
+        """Yields every file under `target_path`, from the git index or by walking the disk."""
+        if self.enumeration == "git":
+            with PROFILER.span("forge.git_ls_files"):
+                tracked = list_tracked_files(target_path)
+            for relative in tracked:
+                file = target_path / relative
+                if file.is_file():
+                    yield file
+            return
+        for file in target_path.rglob("*"):
+            if file.is_file():
+                yield file
+
+    def _iter_files(self, target_path: Path) -> Iterator[Path]:
+        """Yields the non-ignored files under `target_path`; the single walk behind every listing."""
+        for file in self._candidate_files(target_path):
+            if not self._is_ignored(file):
+                yield file
+
+    @property
+    def file_index(self) -> FileIndex:
+        """Compact index of every non-ignored file, built on first use and after `file_index_ttl`."""
+        index = self._file_index
+        if not self._file_index_stale(index):
+            return index
+        with self._file_index_lock:
+            index = self._file_index
+            if self._file_index_stale(index):  # ✅ Concurrent callers wait for one rebuild
+                with PROFILER.span("forge.build_file_index"):
+                    index = self._file_index = FileIndex.build(self.base_dir, self._iter_files(self.base_dir))
+        return index
+
+    def _file_index_stale(self, index: Optional[FileIndex]) -> bool:
+        return index is None or (self.file_index_ttl is not None and index.age() > self.file_index_ttl)
+
+    def invalidate_file_index(self) -> None:
+        """Drops the resident index; the next listing rebuilds it."""
+        self._file_index = None
+
+    def _indexed_folder(self, target_path: Path) -> Optional[str]:
+        """`target_path` relative to the base directory if listings for it can come from the index."""
+        if not self.use_file_index:
+            return None
+        try:
+            return str(target_path.resolve().relative_to(self.base_dir))
+        except ValueError:
+            return None
+
+    @profiled("forge.get_directory_tree")
     def get_directory_tree(self, folder_path: str) -> List[str]:
         """Returns a list of all files in the specified folder, excluding ignored ones."""
         target_path = self.base_dir / folder_path
         if not target_path.is_dir():
             raise InvalidBaseDirectoryError(f"Invalid directory: {target_path}")
 
-        return [
-            str(file.relative_to(self.base_dir))
-            for file in target_path.rglob("*")
-            if file.is_file() and not self._is_ignored(file)
-        ]
-
+        paths = self._listing(target_path)
+        if recording():
+            note_listing(target_path, self._listing_digest(paths))
+        return paths
+
+    def _listing(self, target_path: Path) -> List[str]:
+        """Relative paths of the non-ignored files under `target_path`, from the index when enabled."""
+        folder = self._indexed_folder(target_path)
+        if folder is not None:
+            return list(self.file_index.paths(folder))
+        return [str(file.relative_to(self.base_dir)) for file in self._iter_files(target_path)]
+
+    def _listing_digest(self, paths: List[str]) -> str:
+        # The agent's own writes into .result must not make its answers stale
+        result_prefix = self.result_dir.name + os.sep
+        return listing_digest(path for path in paths if not path.startswith(result_prefix))
+
+    def listing_hash(self, folder: str) -> Optional[str]:
+        """
+        Hash of the listing the tools return for `folder` (an absolute path),
+        `.result` aside, or None if the folder is gone. Response caches use it
+        to check answers that depended on a listing.
+        """
+        target_path = Path(folder)
+        if not target_path.is_dir():
+            return None
+        return self._listing_digest(self._listing(target_path))
+
+    def _note_listing(self, target_path: Path) -> None:
+        if recording():
+            note_listing(target_path, self.listing_hash(str(target_path)))
+
+    @property
+    def repo_map(self) -> RepoMap:
+        """Cached per-file summaries of the base directory, created on first use."""
+        if self._repo_map is None:
+            precomputed = self.prefetcher.record if self.prefetcher is not None else None
+            self._repo_map = RepoMap(self.base_dir, read_text=self._read_text, precomputed=precomputed)
+        return self._repo_map
+
+    @profiled("forge.repo_map_records")
+    def repo_map_records(self, folder_path: str = ".") -> List[Dict[str, object]]:
+        """
+        Returns path, size, lines, tokens, language, top-level symbols and a
+        summary for every file under `folder_path`; only changed files are read.
+        """
+        target_path = self.base_dir / folder_path
+        if not target_path.is_dir():
+            raise InvalidBaseDirectoryError(f"Invalid directory: {target_path}")
+        folder = str(target_path.resolve().relative_to(self.base_dir))
+        records = self.repo_map.refresh(self.get_directory_tree(folder_path), folder)
+        self.repo_map.save()
+        return records
+
+    def get_repo_map(self, folder_path: str = ".", max_tokens: Optional[int] = DEFAULT_MAX_TOKENS) -> str:
+        """Renders `repo_map_records` compactly, within roughly `max_tokens`."""
+        return render_repo_map(self.repo_map_records(folder_path), max_tokens)
+
+    @profiled("forge.render_directory_tree")
+    def render_directory_tree(self, folder_path: str = ".", max_depth: Optional[int] = None,
+                              max_entries: Optional[int] = None) -> str:
+        """Returns the files under a folder as a compact indented tree (see `render_tree`)."""
+        return render_tree(self.get_directory_tree(folder_path), max_depth=max_depth, max_entries=max_entries)
+
+    def _tree_text(self, files: List[Path]) -> str:
+        """Renders already-walked files in the configured `tree_style`."""
+        relative = [str(file.relative_to(self.base_dir)) for file in files]
+        return format_tree(relative, self.tree_style, self.tree_max_depth, self.tree_max_entries)
+
+    @profiled("forge.get_file_content")
     def get_file_content(self, file_path: str) -> str:
         target_file = self.base_dir / file_path
         if not target_file.is_file() or self._is_ignored(target_file):
             raise FileNotFoundError(f"File not found or ignored: {target_file}")
-        return target_file.read_text(encoding="utf-8")
+        return self._read_text(target_file)
 
+    @profiled("forge.get_files_in_folder")
     def get_files_in_folder(self, folder_path: str) -> Dict[str, str]:
         target_folder = self.base_dir / folder_path
         if not target_folder.is_dir():
             raise InvalidBaseDirectoryError(f"Invalid directory: {target_folder}")
 
+        self._note_listing(target_folder)
         return {
-            file.name: file.read_text(encoding="utf-8")
+            file.name: self._read_text(file)
             for file in target_folder.iterdir()
             if file.is_file() and not self._is_ignored(file)
         }
 
+    @profiled("forge.get_files_recursively")
     def get_files_recursively(self, folder_path: str) -> Dict[str, str]:
         target_folder = self.base_dir / folder_path
         if not target_folder.is_dir():
             raise InvalidBaseDirectoryError(f"Invalid directory: {target_folder}")
 
+        self._note_listing(target_folder)
+        folder = self._indexed_folder(target_folder)
+        if folder is not None:
+            contents = {}
+            for path in self.file_index.paths(folder):
+                try:
+                    contents[path] = self._read_text(self.base_dir / path)
+                except FileNotFoundError:
+                    continue  # ✅ Deleted since the index was built
+            return contents
         return {
-            str(file.relative_to(self.base_dir)): file.read_text(encoding="utf-8")
-            for file in target_folder.rglob("*")
-            if file.is_file() and not self._is_ignored(file)
+            str(file.relative_to(self.base_dir)): self._read_text(file)
+            for file in self._iter_files(target_folder)
         }
 
+    def _result_path(self, file_path: str) -> Path:
+        """Maps a relative path into the .result folder, refusing paths that escape it."""
+        result_file = (self.result_dir / file_path).resolve()
+        if self.result_dir.resolve() not in result_file.parents:
+            raise ValueError(f"Refusing to write outside the .result folder: {file_path}")
+        return result_file
+
+    @staticmethod
+    def _stage(result_file: Path, content: str) -> Path:
+        """
+        Writes `content` to a temporary file next to `result_file` and returns its path.
+
+        The temporary file gets the mode of the file it replaces (or the umask
+        default for new files) instead of the 0600 `mkstemp` uses.
+        """
+        result_file.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            mode = result_file.stat().st_mode & 0o7777
+        except FileNotFoundError:
+            mode = _NEW_FILE_MODE
+        fd, temp_name = tempfile.mkstemp(dir=result_file.parent, prefix=f".{result_file.name}.", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as temp:
+            temp.write(content)
+        os.chmod(temp_name, mode)
+        return Path(temp_name)
+
+    @profiled("forge.write_file")
     def write_file(self, file_path: str, content: str) -> str:
         """Writes a file inside .result folder and ensures it exists."""
         self.result_dir.mkdir(parents=True, exist_ok=True)
-        result_file = self.result_dir / file_path
-        result_file.write_text(content, encoding="utf-8")
+        result_file = self._result_path(file_path)
+        os.replace(self._stage(result_file, content), result_file)  # ✅ Atomic: readers never see partial files
+        note_write(result_file)
+        self.invalidate_file_index()
+        self._stop_prefetch()
+        PROFILER.incr("forge.chars_written", len(content))
         return f"File written successfully: {result_file}"
 
+    @profiled("forge.write_files")
+    def write_files(self, files: Dict[str, str]) -> str:
+        """
+        Writes several files inside the .result folder in one call.
+
+        Every file is staged to a temporary file first; only when all of them
+        were written are they renamed into place, so a failure leaves no file
+        half-updated.
+        """
+        self.result_dir.mkdir(parents=True, exist_ok=True)
+        targets = [(self._result_path(file_path), content) for file_path, content in files.items()]
+        staged = []
+        try:
+            for result_file, content in targets:
+                staged.append((self._stage(result_file, content), result_file))
+        except Exception:
+            for temp, _ in staged:
+                temp.unlink(missing_ok=True)
+            raise
+        for temp, result_file in staged:
+            os.replace(temp, result_file)
+            note_write(result_file)
+        self.invalidate_file_index()
+        self._stop_prefetch()
+        PROFILER.incr("forge.chars_written", sum(len(content) for _, content in targets))
+        return f"Files written successfully: {[str(result_file) for _, result_file in staged]}"
+
+    def _edit_source(self, file_path: str) -> str:
+        """Returns the text an edit applies to: the .result copy if one exists, else the original."""
+        result_file = self._result_path(file_path)
+        if result_file.is_file():
+            return self._read_text(result_file)
+        return self.get_file_content(file_path)
+
+    @profiled("forge.apply_patch")
+    def apply_patch(self, file_path: str, diff: str) -> str:
+        """Applies a unified diff to a file and writes the result into the .result folder."""
+        return self.write_file(file_path, apply_unified_diff(self._edit_source(file_path), diff))
+
+    @profiled("forge.edit_file")
+    def edit_file(self, file_path: str, edits: List[Dict[str, str]]) -> str:
+        """Applies search/replace edits to a file and writes the result into the .result folder."""
+        return self.write_file(file_path, apply_search_replace(self._edit_source(file_path), edits))
+
+    def _changed_files(self) -> Iterator[Path]:
+        """Yields the non-ignored files changed relative to `self.since`."""
+        with PROFILER.span("forge.git_changed_files"):
+            changed = changed_files(self.base_dir, self.since)
+        for relative in changed:
+            file = self.base_dir / relative
+            if file.is_file() and not self._is_ignored(file):
+                yield file
+
+    def _prefetch(self, files: List[Path]) -> None:
+        """Hands a listing the agent just received to the prefetcher, if one is attached."""
+        if self.prefetcher is not None:
+            self.prefetcher.schedule(files, self.base_dir)
+
+    def _stop_prefetch(self) -> None:
+        """The agent has moved on to writing; stop warming files it may no longer read."""
+        if self.prefetcher is not None:
+            self.prefetcher.cancel()
+
+    @property
+    def import_graph(self) -> ImportGraph:
+        """Import graph of the base directory, created on first use."""
+        if self._import_graph is None:
+            self._import_graph = ImportGraph(self.base_dir, read_text=self._read_text)
+        return self._import_graph
+
+    @profiled("forge.import_closure")
+    def import_closure(self, entries: List[str], depth: Optional[int] = None) -> List[Path]:
+        """
+        Returns `entries` and the files they import, transitively and at most
+        `depth` levels deep, resolved statically within the base directory.
+        """
+        for entry in entries:
+            if not (self.base_dir / entry).is_file():
+                raise FileNotFoundError(f"Entry file not found: {self.base_dir / entry}")
+        files = self.import_graph.closure([self.base_dir / entry for entry in entries], depth)
+        self.import_graph.save()
+        return [file for file in files if self.base_dir in file.parents and not self._is_ignored(file)]
+
+    @profiled("forge.find_files")
     def find_files(self, extensions: List[str]) -> List[Path]:
-        matched_files = [
-            file_path
-            for ext in extensions
-            for file_path in self.base_dir.rglob(f"*.{ext}")
-            if not self._is_ignored(file_path)
-        ]
+        self._note_listing(self.base_dir)
+        return self._find_files(extensions)
+
+    def _find_files(self, extensions: List[str], walked: Optional[List[Path]] = None) -> List[Path]:
+        """Selects files by extension, reusing `walked` instead of walking again when given."""
+        suffixes = tuple(f".{ext}" for ext in extensions)
+        if self.since:
+            candidates = self._changed_files()
+        elif self.entries:
+            candidates = self.import_closure(self.entries, self.entry_depth)
+        elif walked is not None:
+            candidates = walked
+        elif self.use_file_index:
+            # Filter on the compact index; only matching files become Path objects
+            candidates = (self.base_dir / path for path in self.file_index.paths(suffixes=suffixes))
+            candidates = (file for file in candidates if file.is_file())  # ✅ Skip files deleted since the build
+        else:
+            candidates = self._iter_files(self.base_dir)
+        matched_files = [file_path for file_path in candidates if file_path.name.endswith(suffixes)]
         if not matched_files:
-            raise NoFilesFoundError(f"No files found for extensions {extensions} in '{self.base_dir}'.")
+            where = f"changed since '{self.since}' " if self.since else ""
+            if self.entries:
+                where = f"imported by {self.entries} "
+            raise NoFilesFoundError(f"No files found for extensions {extensions} {where}in '{self.base_dir}'.")
         return sorted(set(matched_files))
 
+    def _pipeline_records(self, files: List[Path], stages=DEFAULT_STAGES) -> List[Dict[str, object]]:
+        """Runs per-file stages over `files` (in worker processes unless `workers` is 1)."""
+        pipeline = FilePipeline(stages, workers=self.workers)
+        return pipeline.run(self.base_dir, (str(file.relative_to(self.base_dir)) for file in files))
+
+    @profiled("forge.index_files")
+    def index_files(self, extensions: List[str], stages=DEFAULT_STAGES) -> List[Dict[str, object]]:
+        """
+        Returns one record per matching file with the fields added by `stages`
+        (see `codepromptforge.core.pipeline.STAGES`), in `find_files` order.
+        """
+        return self._pipeline_records(self._find_files(extensions), stages)
+
+    def _precomputed(self, files: List[Path]) -> Optional[Dict[str, Dict[str, object]]]:
+        """Hashes and token counts computed in worker processes, or None when running single-process."""
+        if self.workers == 1:
+            return None
+        return {record["path"]: record for record in self._pipeline_records(files)}
+
+    def _diff(self, file: Path) -> str:
+        """Returns the diff of `file` against `self.since`, or '' if diffs are not requested."""
+        if not (self.since and self.include_diffs):
+            return ""
+        return file_diff(self.base_dir, self.since, str(file.relative_to(self.base_dir)))
+
+    def _diff_sections(self, relative: str, file: Path) -> List[Tuple[str, str]]:
+        """The diff of `file` as a `(heading, text)` shard section, if diffs are requested."""
+        diff = self._diff(file)
+        return [(f"{relative} (diff against {self.since})", diff)] if diff else []
+
     def _validate_output_file(self) -> None:
-        """Ensures output file does not already exist unless force=True."""
-        if self.output_file and self.output_file.exists() and not self.force:
+        """Ensures output file (or shard manifest) does not already exist unless force=True."""
+        if not self.output_file:
+            return
+        target = manifest_file_name(self.output_file) if self.shard_size else self.output_file
+        if target.exists() and not self.force:
             raise OutputFileAlreadyExistsError(
-                f"Output file '{self.output_file}' already exists. Use --force to overwrite."
+                f"Output file '{target}' already exists. Use --force to overwrite."
             )
 
+    @profiled("forge.forge_prompt")
     def forge_prompt(self, extensions: List[str]) -> None:
         self._validate_output_file()
-        files = self.find_files(extensions)
+        # One walk feeds both the file selection and the directory tree
+        walked = list(self._iter_files(self.base_dir)) if self.include_tree else None
+        with PROFILER.span("forge.find_files"):
+            files = self._find_files(extensions, walked)
+        tree = self._tree_text(walked) if self.include_tree else None
         if self.dry_run:
             print("\n".join(str(f) for f in files))
             return
@@ -136,18 +527,66 @@ class CodePromptForge:
             print("No files found for combination.")
             return
         self.output_file.parent.mkdir(parents=True, exist_ok=True)
+        note_write(self.output_file)
+        if self.output_format == "bundle":
+            self._write_bundle(files, tree)
+            return
+        if self.shard_size:
+            self._write_shards(files, tree)
+            return
         with self.output_file.open('w', encoding='utf-8') as outfile:
-            if self.include_tree:
+            if tree is not None:
                 outfile.write("Directory Tree:\n")
-                outfile.write("\n".join(self.get_directory_tree(".")) + "\n")
+                outfile.write(tree)
             for file in files:
                 outfile.write(f"### {file.name} ###\n")
-                outfile.write(file.read_text(encoding="utf-8"))
+                outfile.write(self._read_text(file))
                 outfile.write("\n")
+                diff = self._diff(file)
+                if diff:
+                    outfile.write(f"### {file.relative_to(self.base_dir)} (diff against {self.since}) ###\n")
+                    outfile.write(diff)
+                    outfile.write("\n")
 
+    def _write_bundle(self, files: List[Path], tree: Optional[str] = None) -> None:
+        """Writes the selected files as an indexed bundle keyed by their relative paths."""
+        records = self._precomputed(files)
+
+        def file_sections():
+            for file in files:
+                relative = str(file.relative_to(self.base_dir))
+                if records and fresh_record(records, relative, file) is None:
+                    records.pop(relative, None)  # ✅ Changed since the worker read it; hash it again
+                yield relative, self._read_text(file)
+                diff = self._diff(file)
+                if diff:
+                    yield f"{relative}.diff", diff
+
+        sections = file_sections()
+        if tree is not None:
+            sections = itertools.chain(((TREE_SECTION, tree),), sections)
+        write_bundle(self.output_file, sections, compress=self.compress, records=records)
+
+    def _write_shards(self, files: List[Path], tree: Optional[str] = None) -> Path:
+        """Splits the combined output into shards of at most `shard_size` and writes a manifest."""
+        prelude = ("Directory Tree", "Directory Tree:\n" + tree) if tree is not None else None
+        shards = plan_shards(
+            self.output_file,
+            ((str(file.relative_to(self.base_dir)), file) for file in files),
+            self.shard_size,
+            self.shard_unit,
+            self._read_text,
+            prelude=prelude,
+            records=self._precomputed(files) if self.shard_unit == "tokens" else None,
+            extra_sections=self._diff_sections,
+        )
+        return write_shards(self.output_file, shards, self.shard_size, self.shard_unit, self._read_text)
+
+    @profiled("forge.run")
     def run(self, extensions: List[str]) -> None:
         self.forge_prompt(extensions)
 
+    @profiled("forge.clean_result_folder")
     def clean_result_folder(self, excluded_files: List[str]) -> None:
         self.result_dir.mkdir(parents=True, exist_ok=True)
         deleted_files = []
@@ -156,14 +595,49 @@ class CodePromptForge:
             if file_path.exists() and file_path.is_file():
                 file_path.unlink()
                 deleted_files.append(file_name)
+                note_write(file_path)
+        if deleted_files:
+            self.invalidate_file_index()
         print(f"Cleaned .result folder. Removed files: {deleted_files}")
 
-    def get_tools(self) -> List[BaseTool]:
-        """Returns LangChain-compatible tools with access to CodePromptForge methods."""
+    @property
+    def aio(self) -> "AsyncCodePromptForge":
+        """Asyncio view of this forge, created on first use and shared by the tools' `_arun`."""
+        with self._aio_lock:
+            if self._aio is None:
+                from .async_forge import AsyncCodePromptForge
+                self._aio = AsyncCodePromptForge(forge=self)
+            return self._aio
+
+    def close(self) -> None:
+        """
+        Stops the threads this forge started. Calls already submitted still
+        finish, and a later async call starts a new thread pool.
+        """
+        with self._aio_lock:
+            aio, self._aio = self._aio, None
+        if aio is not None:
+            aio.close(wait=False)
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+
+    def get_tools(self, profile: str = "full") -> List[BaseTool]:
+        """
+        Returns LangChain-compatible tools with access to CodePromptForge methods.
+
+        `profile` selects one of `TOOL_PROFILES`; smaller sets keep every
+        LLM call shorter and spare small models choosing between near-identical tools.
+        """
+        if profile not in TOOL_PROFILES:
+            raise ValueError(f"Unknown tool profile '{profile}'; expected one of {list(TOOL_PROFILES)}.")
 
         class GetDirectoryTreeInput(BaseModel):
             folder_path: str = Field(..., description="The directory path to generate a tree from.")
 
+        class GetRepoMapInput(BaseModel):
+            folder_path: str = Field(".", description="Folder to map, relative to the base directory.")
+            max_tokens: int = Field(DEFAULT_MAX_TOKENS, description="Approximate size limit of the map; 0 means no limit.")
+
         class GetFileContentInput(BaseModel):
             file_path: str = Field(..., description="Path of the file to read.")
 
@@ -171,6 +645,21 @@ class CodePromptForge:
             file_path: str = Field(..., description="Path to save the file.")
             content: str = Field(..., description="Content to be written in the file.")
 
+        class WriteFilesInput(BaseModel):
+            files: Dict[str, str] = Field(..., description="Mapping of file path to the full content to write.")
+
+        class ApplyPatchInput(BaseModel):
+            file_path: str = Field(..., description="Path of the file to patch, relative to the base directory.")
+            diff: str = Field(..., description="Unified diff with @@ hunk headers and a few lines of context.")
+
+        class SearchReplaceEdit(BaseModel):
+            search: str = Field(..., description="Exact text to find; must occur exactly once in the file.")
+            replace: str = Field(..., description="Text to put in its place.")
+
+        class EditFileInput(BaseModel):
+            file_path: str = Field(..., description="Path of the file to edit, relative to the base directory.")
+            edits: List[SearchReplaceEdit] = Field(..., description="Search/replace edits applied in order.")
+
         class CleanResultFolderInput(BaseModel):
             excluded_files: List[str] = Field(..., description="List of filenames to remove inside .result folder.")
 
@@ -183,93 +672,232 @@ class CodePromptForge:
         class FindFilesInput(BaseModel):
             extensions: List[str] = Field(..., description="List of file extensions to search for.")
 
+        class GetImportClosureInput(BaseModel):
+            file_paths: List[str] = Field(..., description="Python files to start from, relative to the base directory.")
+            depth: Optional[int] = Field(None, description="How many import levels to follow; omit for all.")
+
         class ForgePromptInput(BaseModel):
             extensions: List[str] = Field(..., description="List of file extensions to include in the prompt.")
 
         forge = self
 
+        def _as_edit(edit) -> Dict[str, str]:
+            return edit if isinstance(edit, dict) else edit.model_dump()
+
         class GetDirectoryTreeTool(BaseTool):
             name: str = "get_directory_tree"
             description: str = "Returns a list of all files in the specified folder, with paths relative to the base directory."
             args_schema: Type[BaseModel] = GetDirectoryTreeInput
 
+            @profiled("tool.get_directory_tree")
             def _run(self, folder_path: str) -> List[str]:
-                return forge.get_directory_tree(folder_path)
+                paths = forge.get_directory_tree(folder_path)
+                forge._prefetch([forge.base_dir / path for path in paths])
+                return paths
+
+            @profiled("tool.get_directory_tree")
+            async def _arun(self, folder_path: str) -> List[str]:
+                paths = await forge.aio.get_directory_tree(folder_path)
+                forge._prefetch([forge.base_dir / path for path in paths])
+                return paths
+
+        class GetRepoMapTool(BaseTool):
+            name: str = "get_repo_map"
+            description: str = "Lists every file with its language, size, line and token counts, top-level symbols and a one-line summary. Use it to decide which files to read."
+            args_schema: Type[BaseModel] = GetRepoMapInput
+
+            @profiled("tool.get_repo_map")
+            def _run(self, folder_path: str = ".", max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+                return forge.get_repo_map(folder_path, max_tokens)
+
+            @profiled("tool.get_repo_map")
+            async def _arun(self, folder_path: str = ".", max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+                return await forge.aio.get_repo_map(folder_path, max_tokens)
 
         class GetFileContentTool(BaseTool):
             name: str = "get_file_content"
             description: str = "Retrieves the content of a specified file."
             args_schema: Type[BaseModel] = GetFileContentInput
 
+            @profiled("tool.get_file_content")
             def _run(self, file_path: str) -> str:
                 return forge.get_file_content(file_path)
 
+            @profiled("tool.get_file_content")
+            async def _arun(self, file_path: str) -> str:
+                return await forge.aio.get_file_content(file_path)
+
         class GetFilesInFolderTool(BaseTool):
             name: str = "get_files_in_folder"
             description: str = "Lists all files in the specified folder."
             args_schema: Type[BaseModel] = GetFilesInFolderInput
 
+            @profiled("tool.get_files_in_folder")
             def _run(self, folder_path: str) -> Dict[str, str]:
                 return forge.get_files_in_folder(folder_path)
 
+            @profiled("tool.get_files_in_folder")
+            async def _arun(self, folder_path: str) -> Dict[str, str]:
+                return await forge.aio.get_files_in_folder(folder_path)
+
         class GetFilesRecursivelyTool(BaseTool):
             name: str = "get_files_recursively"
             description: str = "Lists all files in a folder and its subfolders."
             args_schema: Type[BaseModel] = GetFilesRecursivelyInput
 
+            @profiled("tool.get_files_recursively")
             def _run(self, folder_path: str) -> Dict[str, str]:
                 return forge.get_files_recursively(folder_path)
 
+            @profiled("tool.get_files_recursively")
+            async def _arun(self, folder_path: str) -> Dict[str, str]:
+                return await forge.aio.get_files_recursively(folder_path)
+
         class FindFilesTool(BaseTool):
             name: str = "find_files"
             description: str = "Finds files with the specified extensions in the base directory."
             args_schema: Type[BaseModel] = FindFilesInput
 
+            @profiled("tool.find_files")
             def _run(self, extensions: List[str]) -> List[str]:
-                return [str(file) for file in forge.find_files(extensions)]
+                files = forge.find_files(extensions)
+                forge._prefetch(files)
+                return [str(file) for file in files]
+
+            @profiled("tool.find_files")
+            async def _arun(self, extensions: List[str]) -> List[str]:
+                files = await forge.aio.find_files(extensions)
+                forge._prefetch(files)
+                return [str(file) for file in files]
+
+        class GetImportClosureTool(BaseTool):
+            name: str = "get_import_closure"
+            description: str = "Lists the given Python files and the project files they import, transitively. Use it to find the code a change touches."
+            args_schema: Type[BaseModel] = GetImportClosureInput
+
+            @profiled("tool.get_import_closure")
+            def _run(self, file_paths: List[str], depth: Optional[int] = None) -> List[str]:
+                files = forge.import_closure(file_paths, depth)
+                forge._prefetch(files)
+                return [str(file.relative_to(forge.base_dir)) for file in files]
+
+            @profiled("tool.get_import_closure")
+            async def _arun(self, file_paths: List[str], depth: Optional[int] = None) -> List[str]:
+                files = await forge.aio.import_closure(file_paths, depth)
+                forge._prefetch(files)
+                return [str(file.relative_to(forge.base_dir)) for file in files]
 
         class WriteFileTool(BaseTool):
             name: str = "write_file"
             description: str = "Writes content to a file inside the .result folder."
             args_schema: Type[BaseModel] = WriteFileInput
 
+            @profiled("tool.write_file")
             def _run(self, file_path: str, content: str) -> str:
                 return forge.write_file(file_path, content)
 
+            @profiled("tool.write_file")
+            async def _arun(self, file_path: str, content: str) -> str:
+                return await forge.aio.write_file(file_path, content)
+
+        class WriteFilesTool(BaseTool):
+            name: str = "write_files"
+            description: str = "Writes several files inside the .result folder in one atomic call."
+            args_schema: Type[BaseModel] = WriteFilesInput
+
+            @profiled("tool.write_files")
+            def _run(self, files: Dict[str, str]) -> str:
+                return forge.write_files(files)
+
+            @profiled("tool.write_files")
+            async def _arun(self, files: Dict[str, str]) -> str:
+                return await forge.aio.write_files(files)
+
+        class ApplyPatchTool(BaseTool):
+            name: str = "apply_patch"
+            description: str = "Applies a unified diff to a file and saves the result in the .result folder. Prefer this over rewriting whole files."
+            args_schema: Type[BaseModel] = ApplyPatchInput
+
+            @profiled("tool.apply_patch")
+            def _run(self, file_path: str, diff: str) -> str:
+                return forge.apply_patch(file_path, diff)
+
+            @profiled("tool.apply_patch")
+            async def _arun(self, file_path: str, diff: str) -> str:
+                return await forge.aio.apply_patch(file_path, diff)
+
+        class EditFileTool(BaseTool):
+            name: str = "edit_file"
+            description: str = "Applies search/replace edits to a file and saves the result in the .result folder."
+            args_schema: Type[BaseModel] = EditFileInput
+
+            @profiled("tool.edit_file")
+            def _run(self, file_path: str, edits: List[SearchReplaceEdit]) -> str:
+                return forge.edit_file(file_path, [_as_edit(edit) for edit in edits])
+
+            @profiled("tool.edit_file")
+            async def _arun(self, file_path: str, edits: List[SearchReplaceEdit]) -> str:
+                return await forge.aio.edit_file(file_path, [_as_edit(edit) for edit in edits])
+
         class CleanResultFolderTool(BaseTool):
             name: str = "clean_result_folder"
             description: str = "Deletes specific files inside the .result folder."
             args_schema: Type[BaseModel] = CleanResultFolderInput
 
+            @profiled("tool.clean_result_folder")
             def _run(self, excluded_files: List[str]) -> None:
                 return forge.clean_result_folder(excluded_files)
 
+            @profiled("tool.clean_result_folder")
+            async def _arun(self, excluded_files: List[str]) -> None:
+                return await forge.aio.clean_result_folder(excluded_files)
+
         class ForgePromptTool(BaseTool):
             name: str = "forge_prompt"
             description: str = "Combines and processes code files into a single prompt."
             args_schema: Type[BaseModel] = ForgePromptInput
 
+            @profiled("tool.forge_prompt")
             def _run(self, extensions: List[str]) -> None:
                 return forge.forge_prompt(extensions)
 
+            @profiled("tool.forge_prompt")
+            async def _arun(self, extensions: List[str]) -> None:
+                return await forge.aio.forge_prompt(extensions)
+
         class RunTool(BaseTool):
             name: str = "run"
             description: str = "Runs the forge process on the specified file extensions."
             args_schema: Type[BaseModel] = ForgePromptInput
 
+            @profiled("tool.run")
             def _run(self, extensions: List[str]) -> None:
                 return forge.run(extensions)
 
-        return [
-            GetDirectoryTreeTool(),
-            GetFileContentTool(),
-            GetFilesInFolderTool(),
-            GetFilesRecursivelyTool(),
-            FindFilesTool(),
-            WriteFileTool(),
-            CleanResultFolderTool(),
-            ForgePromptTool(),
-            RunTool(),
-            DuckDuckGoSearchRun(), 
-            DuckDuckGoSearchResults(backend="news")
-        ]
\ No newline at end of file
+            @profiled("tool.run")
+            async def _arun(self, extensions: List[str]) -> None:
+                return await forge.aio.run(extensions)
+
+        tool_classes = [
+            GetDirectoryTreeTool,
+            GetRepoMapTool,
+            GetFileContentTool,
+            GetFilesInFolderTool,
+            GetFilesRecursivelyTool,
+            FindFilesTool,
+            GetImportClosureTool,
+            WriteFileTool,
+            WriteFilesTool,
+            ApplyPatchTool,
+            EditFileTool,
+            CleanResultFolderTool,
+            ForgePromptTool,
+            RunTool,
+        ]
+        allowed = TOOL_PROFILES[profile]
+        tools: List[BaseTool] = [tool_class() for tool_class in tool_classes]
+        if allowed is not None:
+            tools = [tool for tool in tools if tool.name in allowed]
+        if allowed is None:
+            tools += [DuckDuckGoSearchRun(), DuckDuckGoSearchResults(backend="news")]
+        return tools
\ No newline at end of file
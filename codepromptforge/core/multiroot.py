@@ -0,0 +1,163 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .bundle import TREE_SECTION, write_bundle
+from .cache import ContentCache, content_hash
+from .main import CodePromptForge, NoFilesFoundError, OutputFileAlreadyExistsError
+from .profiling import profiled
+from .tree import format_tree
+
+
+class MultiRootForge:
+    """
+    Combines files from several base directories into one output.
+
+    Every root keeps its own `.gitignore`; `excluded` entries may be qualified
+    with a root label (`lib/setup.py`) to apply to that root only, or left
+    unqualified to apply to every root. Roots are walked concurrently and share
+    one `ContentCache`. In text output, files whose content is identical to one
+    already emitted are written once and referenced afterwards; bundles keep
+    every path readable and store the shared content once. Output paths are qualified with
+    the root label, which is the directory name (suffixed with `-2`, `-3`, ...
+    when two roots share a name).
+    """
+
+    def __init__(
+        self,
+        base_dirs: Sequence[str],
+        output_file: str = None,
+        dry_run: bool = False,
+        force: bool = False,
+        include_tree: bool = False,
+        excluded: Optional[List[str]] = None,
+        output_format: str = "text",
+        compress: bool = False,
+        content_cache: Optional[ContentCache] = None,
+        max_workers: Optional[int] = None,
+        enumeration: str = "walk",
+        tree_style: str = "flat",
+        tree_max_depth: Optional[int] = None,
+        tree_max_entries: Optional[int] = None
+    ):
+        if not base_dirs:
+            raise ValueError("At least one base directory is required.")
+        self.output_file = Path(output_file) if output_file else None
+        self.dry_run = dry_run
+        self.force = force
+        self.include_tree = include_tree
+        self.output_format = output_format
+        self.compress = compress
+        self.content_cache = content_cache or ContentCache()
+        self.max_workers = max_workers
+        self.tree_style = tree_style
+        self.tree_max_depth = tree_max_depth
+        self.tree_max_entries = tree_max_entries
+
+        self.roots: List[Tuple[str, CodePromptForge]] = []
+        labels = set()
+        for base_dir in base_dirs:
+            label = self._unique_label(Path(base_dir).resolve().name or "root", labels)
+            labels.add(label)
+            forge = CodePromptForge(
+                base_dir=base_dir,
+                excluded=self._excludes_for(label, excluded or []),
+                output_format=output_format,
+                content_cache=self.content_cache,
+                enumeration=enumeration,
+                tree_style=tree_style,
+            )
+            self.roots.append((label, forge))
+
+    @staticmethod
+    def _unique_label(name: str, taken: set) -> str:
+        label, suffix = name, 2
+        while label in taken:
+            label, suffix = f"{name}-{suffix}", suffix + 1
+        return label
+
+    @staticmethod
+    def _excludes_for(label: str, excluded: List[str]) -> List[str]:
+        prefix = f"{label}/"
+        return [e[len(prefix):] if e.startswith(prefix) else e for e in excluded]
+
+    def _map_roots(self, func) -> list:
+        with ThreadPoolExecutor(max_workers=self.max_workers or len(self.roots)) as executor:
+            return list(executor.map(func, self.roots))
+
+    @profiled("multiroot.find_files")
+    def find_files(self, extensions: List[str]) -> List[Tuple[str, CodePromptForge, Path]]:
+        """Returns `(qualified path, forge, file)` for every match across all roots."""
+
+        def find(root):
+            label, forge = root
+            try:
+                files = forge.find_files(extensions)
+            except NoFilesFoundError:
+                return []
+            return [(f"{label}/{file.relative_to(forge.base_dir)}", forge, file) for file in files]
+
+        matched = [match for root_matches in self._map_roots(find) for match in root_matches]
+        if not matched:
+            roots = ", ".join(str(forge.base_dir) for _, forge in self.roots)
+            raise NoFilesFoundError(f"No files found for extensions {extensions} in {roots}.")
+        return matched
+
+    def get_directory_tree(self) -> List[str]:
+        """Returns the root-qualified paths of every non-ignored file in every root."""
+
+        def tree(root):
+            label, forge = root
+            return [f"{label}/{path}" for path in forge.get_directory_tree(".")]
+
+        return [path for paths in self._map_roots(tree) for path in paths]
+
+    def _sections(self, files: List[Tuple[str, CodePromptForge, Path]]):
+        """Yields `(qualified path, text)`, replacing repeated content with a reference."""
+        first_seen: Dict[str, str] = {}
+        for qualified, forge, file in files:
+            text = forge._read_text(file)
+            digest = content_hash(text)
+            if digest in first_seen:
+                yield qualified, f"(identical to {first_seen[digest]})"
+            else:
+                first_seen[digest] = qualified
+                yield qualified, text
+
+    @profiled("multiroot.forge_prompt")
+    def forge_prompt(self, extensions: List[str]) -> None:
+        if self.output_file and self.output_file.exists() and not self.force:
+            raise OutputFileAlreadyExistsError(
+                f"Output file '{self.output_file}' already exists. Use --force to overwrite."
+            )
+        files = self.find_files(extensions)
+        if self.dry_run:
+            print("\n".join(qualified for qualified, _, _ in files))
+            return
+        # Warm the shared cache concurrently; the writer then reads from memory.
+        # The cache is read directly so each file is counted and hashed once, by the writer.
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(lambda match: self.content_cache.read_text(match[2]), files))
+
+        self.output_file.parent.mkdir(parents=True, exist_ok=True)
+        tree = None
+        if self.include_tree:
+            tree = format_tree(self.get_directory_tree(), self.tree_style, self.tree_max_depth, self.tree_max_entries)
+        if self.output_format == "bundle":
+            # `write_bundle` stores repeated content once, so every section keeps its real text
+            sections = ((qualified, forge._read_text(file)) for qualified, forge, file in files)
+            if tree is not None:
+                sections = [(TREE_SECTION, tree)] + list(sections)
+            write_bundle(self.output_file, sections, compress=self.compress)
+            return
+        with self.output_file.open("w", encoding="utf-8") as outfile:
+            if tree is not None:
+                outfile.write("Directory Tree:\n")
+                outfile.write(tree)
+            for qualified, text in self._sections(files):
+                outfile.write(f"### {qualified} ###\n")
+                outfile.write(text)
+                outfile.write("\n")
+
+    def run(self, extensions: List[str]) -> None:
+        self.forge_prompt(extensions)
@@ -0,0 +1,130 @@
+import re
+from typing import Iterable, List, Mapping, Tuple, Union
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class PatchApplyError(Exception):
+    pass
+
+
+def _split_lines(text: str) -> List[str]:
+    """
+    Splits `text` on line feeds only, dropping a trailing `\r` from each line.
+
+    `str.splitlines()` also breaks on form feeds, `\x1c`-`\x1e`, `\x85` and
+    U+2028/U+2029, which would turn a single source line into several.
+    """
+    lines = [line[:-1] if line.endswith("\r") else line for line in text.split("\n")]
+    if lines and lines[-1] == "":
+        lines.pop()
+    return lines
+
+
+def _parse_hunks(diff: str) -> List[Tuple[int, int, List[str], List[str]]]:
+    """
+    Returns `(old start line, old line count, old lines, new lines)` for every
+    hunk of a unified diff.
+
+    Each hunk body is exactly as long as its `@@` header says, so removed lines
+    that look like file headers (e.g. an SQL `-- comment`) are read as content.
+    """
+    hunks = []
+    current = None
+    old_left = new_left = 0
+    for line in _split_lines(diff):
+        if old_left or new_left:
+            if line.startswith("\\"):
+                continue  # "\ No newline at end of file"
+            if line.startswith("-"):
+                current[2].append(line[1:])
+                old_left -= 1
+            elif line.startswith("+"):
+                current[3].append(line[1:])
+                new_left -= 1
+            else:
+                # Context line; some generators drop the leading space on empty lines
+                text = line[1:] if line.startswith(" ") else line
+                current[2].append(text)
+                current[3].append(text)
+                old_left, new_left = old_left - 1, new_left - 1
+            if old_left < 0 or new_left < 0:
+                raise PatchApplyError(f"Hunk {len(hunks)} has more lines than its header declares.")
+            continue
+        match = _HUNK_RE.match(line)
+        if match:
+            old_count = int(match.group(2)) if match.group(2) is not None else 1
+            old_left = old_count
+            new_left = int(match.group(4)) if match.group(4) is not None else 1
+            current = (int(match.group(1)), old_count, [], [])
+            hunks.append(current)
+        # Anything else between hunks ("--- a/f", "+++ b/f", "diff ...", "index ...") is a header
+    if old_left or new_left:
+        raise PatchApplyError(f"Hunk {len(hunks)} is truncated; its header declares more lines than it has.")
+    if not hunks:
+        raise PatchApplyError("No hunks found; expected a unified diff with '@@ -a,b +c,d @@' headers.")
+    return hunks
+
+
+def _find_block(lines: List[str], block: List[str], expected: int, start: int) -> int:
+    """Finds `block` in `lines` at or after `start`, preferring the position closest to `expected`."""
+    if not block:
+        return min(max(expected, start), len(lines))
+    for normalise in (lambda s: s, str.rstrip):
+        wanted = [normalise(b) for b in block]
+        positions = [
+            i for i in range(start, len(lines) - len(block) + 1)
+            if [normalise(l) for l in lines[i:i + len(block)]] == wanted
+        ]
+        if positions:
+            return min(positions, key=lambda i: abs(i - expected))
+    return -1
+
+
+def apply_unified_diff(original: str, diff: str) -> str:
+    """
+    Applies a unified diff to `original` and returns the new text.
+
+    Hunks are located by their context rather than trusting line numbers, so
+    diffs produced against a slightly different version still apply; trailing
+    whitespace differences are tolerated as a fallback.
+    """
+    lines = _split_lines(original)
+    newline = "\r\n" if "\r\n" in original else "\n"
+    trailing_newline = original.endswith("\n") or not original
+    offset, start = 0, 0
+    for number, (old_start, old_count, old_lines, new_lines) in enumerate(_parse_hunks(diff), start=1):
+        # A pure insertion (`-5,0`) goes after old line 5; other hunks start at line `old_start`
+        expected = max((old_start if old_count == 0 else old_start - 1) + offset, 0)
+        position = _find_block(lines, old_lines, expected, start)
+        if position < 0:
+            preview = "\n".join(old_lines[:3])
+            raise PatchApplyError(f"Hunk {number} does not apply; context not found:\n{preview}")
+        lines[position:position + len(old_lines)] = new_lines
+        offset += len(new_lines) - len(old_lines)
+        start = position + len(new_lines)
+    text = newline.join(lines)
+    return text + newline if trailing_newline and lines else text
+
+
+SearchReplace = Union[Mapping[str, str], Tuple[str, str]]
+
+
+def apply_search_replace(original: str, edits: Iterable[SearchReplace]) -> str:
+    """
+    Applies `(search, replace)` edits in order; each search text must occur exactly once.
+
+    Edits may be given as pairs or as mappings with `search` and `replace` keys.
+    """
+    text = original
+    for number, edit in enumerate(edits, start=1):
+        search, replace = (edit["search"], edit["replace"]) if isinstance(edit, Mapping) else edit
+        if not search:
+            raise PatchApplyError(f"Edit {number} has an empty search text.")
+        count = text.count(search)
+        if count == 0:
+            raise PatchApplyError(f"Edit {number}: search text not found:\n{search}")
+        if count > 1:
+            raise PatchApplyError(f"Edit {number}: search text occurs {count} times; add more context.")
+        text = text.replace(search, replace, 1)
+    return text
@@ -0,0 +1,160 @@
+import ast
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from .cache import content_hash
+from .profiling import PROFILER
+from .tokens import estimate_tokens
+
+# A stage maps `(relative path, text)` to the fields it adds to the file's record.
+Stage = Callable[[str, str], Dict[str, object]]
+
+DEFAULT_CHUNK_SIZE = 64
+MAX_SUMMARY_CHARS = 120
+
+
+def hash_stage(path: str, text: str) -> Dict[str, object]:
+    return {"sha256": content_hash(text)}
+
+
+def token_stage(path: str, text: str) -> Dict[str, object]:
+    return {"tokens": estimate_tokens(text)}
+
+
+def line_stage(path: str, text: str) -> Dict[str, object]:
+    lines = text.count("\n") + (1 if text and not text.endswith("\n") else 0)
+    return {"size": len(text.encode("utf-8")), "lines": lines}
+
+
+def outline_stage(path: str, text: str) -> Dict[str, object]:
+    """Top-level classes and functions of a Python file (`class Name`, `def name`); empty for other files."""
+    if not path.endswith(".py"):
+        return {"outline": []}
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return {"outline": []}
+    outline = []
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            outline.append(f"class {node.name}")
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            outline.append(f"def {node.name}")
+    return {"outline": outline}
+
+
+def summary_stage(path: str, text: str) -> Dict[str, object]:
+    """First line of a Python module docstring, or the first heading or line of other text files."""
+    summary = ""
+    if path.endswith(".py"):
+        try:
+            summary = ast.get_docstring(ast.parse(text)) or ""
+        except (SyntaxError, ValueError):
+            pass
+    else:
+        summary = next((line.lstrip("#").strip() for line in text.splitlines() if line.strip()), "")
+    return {"summary": summary.strip().split("\n")[0][:MAX_SUMMARY_CHARS]}
+
+
+STAGES: Dict[str, Stage] = {
+    "hash": hash_stage,
+    "tokens": token_stage,
+    "lines": line_stage,
+    "outline": outline_stage,
+    "summary": summary_stage,
+}
+
+DEFAULT_STAGES = ("hash", "tokens")
+
+
+def resolve_stages(stages: Iterable[Union[str, Stage]]) -> Tuple[Stage, ...]:
+    """Maps stage names to the built-in stages; callables are passed through unchanged."""
+    resolved = []
+    for stage in stages:
+        if callable(stage):
+            resolved.append(stage)
+        elif stage in STAGES:
+            resolved.append(STAGES[stage])
+        else:
+            raise ValueError(f"Unknown stage '{stage}'; expected one of {sorted(STAGES)}.")
+    return tuple(resolved)
+
+
+def _process_chunk(base_dir: str, paths: Sequence[str], stages: Tuple[Stage, ...]) -> List[Dict[str, object]]:
+    """Reads and processes one batch of files; runs inside a worker process."""
+    records = []
+    for relative in paths:
+        file = Path(base_dir) / relative
+        stat = file.stat()
+        record: Dict[str, object] = {"path": relative, "mtime_ns": stat.st_mtime_ns, "file_size": stat.st_size}
+        try:
+            text = file.read_text(encoding="utf-8")
+        except UnicodeDecodeError:
+            record["binary"] = True  # ✅ One binary file must not fail the whole batch
+            records.append(record)
+            continue
+        for stage in stages:
+            record.update(stage(relative, text))
+        records.append(record)
+    return records
+
+
+class FilePipeline:
+    """
+    Runs CPU-bound per-file stages (hashing, token counting, outlining, ...)
+    over many files, in a process pool when `workers` is not 1.
+
+    Workers receive batches of relative paths and read the files themselves,
+    so file contents are never pickled across processes. Records come back
+    in the order of the input paths, with the modification time and size the
+    file had when it was read; files that are not UTF-8 text are marked
+    `"binary": True` and skip the stages. Custom stages must be module-level
+    functions so they can be sent to the workers.
+    """
+
+    def __init__(self, stages: Iterable[Union[str, Stage]] = DEFAULT_STAGES, workers: int = 1,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.stages = resolve_stages(stages)
+        self.workers = workers or os.cpu_count() or 1  # 0 means one worker per core
+        self.chunk_size = chunk_size
+
+    def _chunks(self, paths: List[str]) -> List[List[str]]:
+        # Several batches per worker keep every core busy when file sizes vary.
+        size = max(1, min(self.chunk_size, math.ceil(len(paths) / (self.workers * 4))))
+        return [paths[i:i + size] for i in range(0, len(paths), size)]
+
+    def run(self, base_dir: Union[str, Path], paths: Iterable[str]) -> List[Dict[str, object]]:
+        """Returns one record per path, `{"path": ..., <stage fields>}`, in input order."""
+        paths = list(paths)
+        with PROFILER.span("pipeline.run"):
+            PROFILER.incr("pipeline.files", len(paths))
+            if self.workers == 1 or len(paths) <= 1:
+                return _process_chunk(str(base_dir), paths, self.stages)
+            chunks = self._chunks(paths)
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks))) as executor:
+                results = executor.map(_process_chunk, itertools.repeat(str(base_dir)), chunks,
+                                       itertools.repeat(self.stages))
+                return [record for chunk in results for record in chunk]
+
+
+def fresh_record(records: Optional[Mapping[str, Dict[str, object]]], path: str,
+                 file: Path) -> Optional[Dict[str, object]]:
+    """
+    Returns the pipeline's record for `path` if `file` has not changed since
+    a worker read it, so its hash and token count can be used without
+    hashing the text again.
+    """
+    record = records.get(path) if records else None
+    if record is None or "mtime_ns" not in record:
+        return None
+    try:
+        stat = file.stat()
+    except OSError:
+        return None
+    if (stat.st_mtime_ns, stat.st_size) != (record["mtime_ns"], record["file_size"]):
+        return None
+    return record
@@ -0,0 +1,124 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+from .cache import ContentCache
+from .pipeline import Stage, resolve_stages
+from .profiling import PROFILER
+
+DEFAULT_MAX_FILES = 8
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+MAX_RECORDS = 4096
+
+
+class Prefetcher:
+    """
+    Warms a `ContentCache` with files the agent is likely to read next.
+
+    After a listing tool returns, the agent usually reads the files it just
+    listed, roughly in order. `schedule` hands the listing to a single
+    background thread. That thread reads the first files, at most `max_files`
+    of them and `max_bytes` in total, into the cache while the LLM is still
+    generating its next step. Each new `schedule` supersedes the batch before
+    it, and `cancel` stops the current one. Both take effect before the next
+    file is read.
+
+    Optional `stages` (see `codepromptforge.core.pipeline.STAGES`), such as
+    "hash" or "outline", run on each prefetched file with its path relative to
+    the `base_dir` given to `schedule`. Their results are kept in `record`
+    while the file stays unchanged; the forge's repo map reuses them instead
+    of summarizing the file again.
+    """
+
+    def __init__(self, cache: ContentCache, max_files: int = DEFAULT_MAX_FILES,
+                 max_bytes: int = DEFAULT_MAX_BYTES, stages: Iterable[Union[str, Stage]] = ()):
+        self.cache = cache
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.stages = resolve_stages(stages)
+        self._records: "OrderedDict[str, Dict[str, object]]" = OrderedDict()
+        self._generation = 0
+        self._pending: Optional[Future] = None
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def schedule(self, files: Iterable[Path], base_dir: Optional[Path] = None) -> Future:
+        """Starts prefetching `files` in order, superseding any batch still running."""
+        files = list(files)[:self.max_files]
+        with self._lock:
+            self._generation += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="codepromptforge-prefetch")
+            self._pending = self._executor.submit(self._prefetch, self._generation, files, base_dir)
+            return self._pending
+
+    def cancel(self) -> None:
+        """Stops the current batch before its next file."""
+        with self._lock:
+            self._generation += 1
+
+    def close(self) -> None:
+        """Stops the current batch and the background thread; a later `schedule` starts a new one."""
+        with self._lock:
+            self._generation += 1
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Blocks until the most recently scheduled batch has finished or stopped."""
+        with self._lock:
+            pending = self._pending
+        if pending is not None:
+            pending.result(timeout)
+
+    def record(self, path: Path) -> Optional[Dict[str, object]]:
+        """Stage results for `path` if it was prefetched and has not changed since."""
+        with self._lock:
+            record = self._records.get(str(path))
+        if record is None:
+            return None
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        if (stat.st_mtime_ns, stat.st_size) != (record["mtime_ns"], record["size"]):
+            return None
+        return {key: value for key, value in record.items() if key not in ("mtime_ns", "size")}
+
+    def _current(self, generation: int) -> bool:
+        return generation == self._generation
+
+    def _prefetch(self, generation: int, files: list, base_dir: Optional[Path]) -> None:
+        budget = self.max_bytes
+        with PROFILER.span("prefetch.batch"):
+            for file in files:
+                if not self._current(generation):
+                    PROFILER.incr("prefetch.cancelled")
+                    return
+                try:
+                    stat = file.stat()
+                    if stat.st_size > budget:
+                        continue  # ✅ A smaller file further down may still fit
+                    budget -= stat.st_size
+                    text = self.cache.read_text(file)
+                except (OSError, UnicodeDecodeError):
+                    continue
+                PROFILER.incr("prefetch.files")
+                PROFILER.incr("prefetch.bytes", stat.st_size)
+                if self.stages:
+                    relative = str(file.relative_to(base_dir)) if base_dir is not None else str(file)
+                    self._run_stages(file, relative, stat, text)
+
+    def _run_stages(self, file: Path, relative: str, stat, text: str) -> None:
+        record: Dict[str, object] = {}
+        for stage in self.stages:
+            record.update(stage(relative, text))
+        record.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)  # ✅ After the stages; "lines" also sets size
+        with self._lock:
+            self._records[str(file)] = record
+            self._records.move_to_end(str(file))
+            while len(self._records) > MAX_RECORDS:
+                self._records.popitem(last=False)
@@ -0,0 +1,267 @@
+import functools
+import inspect
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+class _NullSpan:
+    """Span returned while profiling is disabled; does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, time.perf_counter() - self.start, self.start)
+        return False
+
+
+class Profiler:
+    """
+    Collects timing spans and counters for forge operations, tool calls and LLM calls.
+
+    Profiling is disabled by default; while disabled, `span()` returns a shared
+    no-op context manager and `incr()` returns immediately, so instrumented code
+    pays a single attribute check.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace = False
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._spans: Dict[str, List[float]] = {}
+        self._counters: Dict[str, float] = {}
+        self._events: List[Dict] = []
+
+    def enable(self, trace: bool = False) -> None:
+        """Starts collecting; with `trace=True` every span is also kept as an event."""
+        self.enabled = True
+        self.trace = trace
+
+    def disable(self) -> None:
+        self.enabled = False
+        self.trace = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._origin = time.perf_counter()
+            self._spans = {}
+            self._counters = {}
+            self._events = []
+
+    def span(self, name: str):
+        """Returns a context manager timing the enclosed block under `name`."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, duration: float, start: Optional[float] = None) -> None:
+        """Adds one observation of `duration` seconds to the span `name`."""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                self._spans[name] = [1, duration, duration, duration]
+            else:
+                stats[0] += 1
+                stats[1] += duration
+                stats[2] = min(stats[2], duration)
+                stats[3] = max(stats[3], duration)
+            if self.trace:
+                self._events.append({
+                    "name": name,
+                    "start": (start if start is not None else time.perf_counter() - duration) - self._origin,
+                    "duration": duration,
+                    "thread": threading.get_ident(),
+                })
+
+    def incr(self, name: str, value: float = 1) -> None:
+        """Increments the counter `name` by `value`."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def spans(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {"count": count, "total": total, "min": low, "max": high}
+                for name, (count, total, low, high) in self._spans.items()
+            }
+
+    def counters(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._counters)
+
+    def summary(self) -> str:
+        """Renders a human-readable breakdown sorted by total time."""
+        spans = sorted(self.spans().items(), key=lambda item: item[1]["total"], reverse=True)
+        lines = [f"{'span':<40} {'calls':>8} {'total s':>10} {'mean ms':>10} {'max ms':>10}"]
+        for name, s in spans:
+            lines.append(
+                f"{name:<40} {s['count']:>8} {s['total']:>10.4f} "
+                f"{1000 * s['total'] / s['count']:>10.3f} {1000 * s['max']:>10.3f}"
+            )
+        counters = self.counters()
+        if counters:
+            lines.append("")
+            lines.append(f"{'counter':<40} {'value':>10}")
+            for name in sorted(counters):
+                lines.append(f"{name:<40} {counters[name]:>10g}")
+        return "\n".join(lines)
+
+    def to_json(self) -> Dict:
+        with self._lock:
+            events = list(self._events)
+        return {"spans": self.spans(), "counters": self.counters(), "events": events}
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, indent=2)
+
+    def to_prometheus(self, prefix: str = "codepromptforge") -> str:
+        """Renders spans and counters in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {prefix}_span_seconds Time spent in instrumented operations.",
+            f"# TYPE {prefix}_span_seconds summary",
+        ]
+        spans = self.spans()
+        for name in sorted(spans):
+            label = _prometheus_label(name)
+            lines.append(f'{prefix}_span_seconds_sum{{span="{label}"}} {spans[name]["total"]:.6f}')
+            lines.append(f'{prefix}_span_seconds_count{{span="{label}"}} {spans[name]["count"]}')
+        lines.append(f"# HELP {prefix}_span_seconds_max Slowest observation per operation.")
+        lines.append(f"# TYPE {prefix}_span_seconds_max gauge")
+        for name in sorted(spans):
+            lines.append(f'{prefix}_span_seconds_max{{span="{_prometheus_label(name)}"}} {spans[name]["max"]:.6f}')
+        lines.append(f"# HELP {prefix}_events_total Instrumentation counters.")
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        counters = self.counters()
+        for name in sorted(counters):
+            lines.append(f'{prefix}_events_total{{name="{_prometheus_label(name)}"}} {counters[name]:g}')
+        return "\n".join(lines) + "\n"
+
+
+def _prometheus_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Process-wide profiler used by the forge, the tools and the assistants.
+PROFILER = Profiler()
+
+
+def profiled(name: str) -> Callable:
+    """Decorator timing every call of the wrapped function (or coroutine function) under the span `name`."""
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not PROFILER.enabled:
+                    return await func(*args, **kwargs)
+                with _Span(PROFILER, name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return func(*args, **kwargs)
+            with _Span(PROFILER, name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class ProfilingCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback recording the time of every LLM call (`llm.call`), every
+    tool call (`agent.tool_call`) and every LangGraph node execution
+    (`agent.step.<node>`) into `PROFILER`.
+    """
+
+    def __init__(self, profiler: Profiler = PROFILER):
+        self.profiler = profiler
+        self._starts: Dict = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, name: str) -> None:
+        if self.profiler.enabled:
+            with self._lock:
+                self._starts[run_id] = (name, time.perf_counter())
+
+    def _stop(self, run_id) -> None:
+        with self._lock:
+            started = self._starts.pop(run_id, None)
+        if started is not None:
+            name, start = started
+            self.profiler.record(name, time.perf_counter() - start, start)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, "llm.call")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, "llm.call")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._stop(run_id)
+        self.profiler.incr("llm.calls")
+        for generations in getattr(response, "generations", []):
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                self.profiler.incr("llm.input_tokens", usage.get("input_tokens", 0))
+                self.profiler.incr("llm.output_tokens", usage.get("output_tokens", 0))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._stop(run_id)
+        self.profiler.incr("llm.errors")
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id, "agent.tool_call")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._stop(run_id)
+        self.profiler.incr("agent.tool_calls")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._stop(run_id)
+        self.profiler.incr("agent.tool_errors")
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self.profiler.incr("agent.steps")
+            self._start(run_id, f"agent.step.{node}")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._stop(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._stop(run_id)
@@ -1,58 +1,134 @@
-react_template = """
+import warnings
+from typing import Iterable, List, Sequence, Tuple
+
+# Every guideline lists the tools it mentions and is left out of the prompt
+# unless all of them are available, so the prompt only describes tools the
+# agent can actually call.
+Guideline = Tuple[Tuple[str, ...], str]
+
+_WEB_TOOLS = ("duckduckgo_search", "duckduckgo_results_json")
+
+_INTRO = """
 You are an AI code reviewer and generator, responsible for analyzing and improving software projects. Your goal is to assist in reviewing, modifying, and generating high-quality code while leveraging the available tools.
 
 You may also be requested to generate prompts with enougth context to fix or write a new feature.
+"""
 
+_CHAT_WITH_WEB = """
 Be friendly and chat with the user about any topic. You may search the web, using duckduckgo, to gather additional context to answer questions or to interact.
 Don`t call other tools unless you engage in a code review process.
+"""
 
-When asked to work on a codebase here are your Guidelines
-
-	1.	Understand the Context
-	•	Start by retrieving the directory tree using get_directory_tree to get an overview of the project.
-	•	Identify relevant files for analysis using find_files (e.g., Python, JavaScript, or other specified extensions).
-	2.	Analyze the Codebase
-	•	Read individual files with get_file_content to understand their structure and functionality.
-	•	If a specific folder needs inspection, use get_files_in_folder or get_files_recursively.
-	3.	Apply Code Review Principles
-	•	Look for bugs, security risks, and inefficiencies in the code.
-	•	Identify inconsistent styles, redundant code, or performance issues.
-	•	Ensure compliance with best practices and design patterns.
-	4.	Enhance and Optimize Code
-	•	If issues are found, suggest improvements, refactors, or optimizations.
-	•	If a function, class, or module is missing, generate the necessary code.
-	•	Ensure that any new code aligns with existing conventions and patterns.
-	5.	Write and Save Modifications
-	•	If a change is required, write modified code to a file using write_file.
-	•	If multiple changes are needed, manage them efficiently without overwriting critical files.
-	6.	Ensure Clean Project State
-	•	Before finalizing, check the .result folder for unnecessary files and remove them using clean_result_folder.
-	•	Ensure that ignored files (from .gitignore) are not included in the process.
-
-Tools Available
-
-You have access to the following tools:
-	•	get_directory_tree(folder_path): Retrieve a list of all files in a given folder.
-	•	get_file_content(file_path): Read the contents of a specific file.
-	•	get_files_in_folder(folder_path): List all files in a folder.
-	•	get_files_recursively(folder_path): Retrieve files from a folder and its subdirectories.
-	•	find_files(extensions): Find all files matching a given set of extensions.
-	•	write_file(file_path, content): Write or overwrite a file.
-	•	clean_result_folder(excluded_files): Remove unnecessary files from the .result folder.
-	•	forge_prompt(extensions): Generate a combined prompt from selected files.
-	•	duckduckgo_search(query: str): Searchs the web
-    •	duckduckgo_results_json(query: str): Searchs the web, and returns news and more detailed info
-
-
-Expected Workflow for codereview
-	1.	Retrieve the project structure using get_directory_tree.
-	2.	Identify key files using find_files(["py"]) (or other specified extensions).
-	3.	Analyze relevant files using get_file_content.
-	4.	Identify areas for improvement (bugs, optimizations, security).
-	5.	Suggest and generate improved code where necessary.
-	6.	Write updated files using write_file without overriding critical files.
-	7.	Ensure clean project state using clean_result_folder where appropriate.
+_CHAT = """
+Be friendly and chat with the user about any topic.
+Don`t call tools unless you engage in a code review process.
+"""
 
+_GUIDELINES: Sequence[Tuple[str, Sequence[Guideline]]] = (
+    ("Understand the Context", (
+        (("get_directory_tree",), "Start by retrieving the directory tree using get_directory_tree to get an overview of the project."),
+        (("get_repo_map",), "Use get_repo_map to see each file's size, symbols and summary in one call, and plan which files to read from it."),
+        (("find_files",), "Identify relevant files for analysis using find_files (e.g., Python, JavaScript, or other specified extensions)."),
+    )),
+    ("Analyze the Codebase", (
+        (("get_file_content",), "Read individual files with get_file_content to understand their structure and functionality."),
+        (("get_files_in_folder", "get_files_recursively"), "If a specific folder needs inspection, use get_files_in_folder or get_files_recursively."),
+        (("get_import_closure",), "When a task concerns one Python module, use get_import_closure to list just that module and the files it imports."),
+    )),
+    ("Apply Code Review Principles", (
+        ((), "Look for bugs, security risks, and inefficiencies in the code."),
+        ((), "Identify inconsistent styles, redundant code, or performance issues."),
+        ((), "Ensure compliance with best practices and design patterns."),
+    )),
+    ("Enhance and Optimize Code", (
+        ((), "If issues are found, suggest improvements, refactors, or optimizations."),
+        ((), "If a function, class, or module is missing, generate the necessary code."),
+        ((), "Ensure that any new code aligns with existing conventions and patterns."),
+    )),
+    ("Write and Save Modifications", (
+        (("apply_patch", "edit_file"), "For changes to existing files, prefer apply_patch (a unified diff) or edit_file (search/replace) over rewriting the whole file."),
+        (("write_file", "write_files"), "Use write_file only for new files, and write_files to save several files in one call."),
+        (("write_file",), "If multiple changes are needed, manage them efficiently without overwriting critical files."),
+    )),
+    ("Ensure Clean Project State", (
+        (("clean_result_folder",), "Before finalizing, check the .result folder for unnecessary files and remove them using clean_result_folder."),
+        (("get_directory_tree",), "Ensure that ignored files (from .gitignore) are not included in the process."),
+    )),
+)
+
+_WORKFLOW: Sequence[Guideline] = (
+    (("get_directory_tree",), "Retrieve the project structure using get_directory_tree."),
+    (("get_repo_map",), "Choose the files worth reading from get_repo_map."),
+    (("find_files",), 'Identify key files using find_files(["py"]) (or other specified extensions).'),
+    (("get_file_content",), "Analyze relevant files using get_file_content."),
+    ((), "Identify areas for improvement (bugs, optimizations, security)."),
+    ((), "Suggest and generate improved code where necessary."),
+    (("apply_patch", "edit_file"), "Save changes with apply_patch or edit_file (write_file for new files) without overriding critical files."),
+    (("clean_result_folder",), "Ensure clean project state using clean_result_folder where appropriate."),
+)
+
+_CLOSING = """
 Your task is to review, analyze, and generate code while following best practices. If modifications are needed, ensure they are well-structured and aligned with the existing codebase.
 or, just assist the user with his/her needs. Use unicode emoji`s to make the conversation more interesting and engaging
 """
+
+_READ_ONLY_NOTE = "You can read the project but not modify it; describe the changes you recommend instead of saving them."
+
+
+def _select(guidelines: Iterable[Guideline], names: set) -> List[str]:
+    return [text for needed, text in guidelines if all(name in names for name in needed)]
+
+
+def _summary(description: str) -> str:
+    """First sentence of a tool description, to keep the tool list short."""
+    first = description.strip().split("\n")[0]
+    end = first.find(". ")
+    return first[:end + 1] if end != -1 else first
+
+
+def build_react_prompt(tools: Iterable) -> str:
+    """
+    Builds the assistant's system prompt from the tools it was actually given.
+
+    Guidelines and workflow steps that mention a missing tool are left out,
+    and the tool list is generated from each tool's name, arguments and
+    description, so smaller tool profiles also get a shorter prompt.
+    """
+    tools = list(tools)
+    names = {tool.name for tool in tools}
+    has_web = any(name in names for name in _WEB_TOOLS)
+    lines: List[str] = [_INTRO + (_CHAT_WITH_WEB if has_web else _CHAT), "When asked to work on a codebase here are your Guidelines", ""]
+
+    number = 0
+    for title, guidelines in _GUIDELINES:
+        bullets = _select(guidelines, names)
+        if not bullets:
+            continue
+        number += 1
+        lines.append(f"\t{number}.\t{title}")
+        lines.extend(f"\t•\t{text}" for text in bullets)
+    if not names & {"write_file", "write_files", "apply_patch", "edit_file"}:
+        lines += ["", _READ_ONLY_NOTE]
+
+    lines += ["", "Tools Available", "", "You have access to the following tools:"]
+    for tool in tools:
+        arguments = ", ".join(getattr(tool, "args", {}) or {})
+        lines.append(f"\t•\t{tool.name}({arguments}): {_summary(tool.description)}")
+
+    lines += ["", "", "Expected Workflow for codereview"]
+    steps = _select(_WORKFLOW, names)
+    lines.extend(f"\t{number}.\t{text}" for number, text in enumerate(steps, start=1))
+    return "\n".join(lines) + "\n" + _CLOSING
+
+
+def __getattr__(name: str) -> str:
+    """
+    Keeps `react_template`, the prompt for the full tool set, importable; it
+    is built on each access. New code should call `build_react_prompt`.
+    """
+    if name == "react_template":
+        warnings.warn("react_template is deprecated; use build_react_prompt(forge.get_tools(profile)) instead.",
+                      DeprecationWarning, stacklevel=2)
+        from .main import CodePromptForge
+        return build_react_prompt(CodePromptForge(base_dir=".").get_tools())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,199 @@
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .cache import content_hash, default_cache_dir, note_hash
+from .pipeline import resolve_stages
+from .tokens import estimate_tokens
+
+# Per-file fields of the map; the content hash is added by `RepoMap` itself.
+MAP_STAGES = ("tokens", "lines", "outline", "summary")
+# Fields a precomputed record must carry to stand in for reading the file.
+_PRECOMPUTED_FIELDS = ("sha256", "tokens", "lines", "outline", "summary")
+
+DEFAULT_MAX_TOKENS = 2000
+MAX_SYMBOLS = 12
+
+LANGUAGES = {
+    ".py": "python", ".pyi": "python", ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript",
+    ".ts": "typescript", ".tsx": "typescript", ".java": "java", ".kt": "kotlin", ".go": "go", ".rs": "rust",
+    ".rb": "ruby", ".php": "php", ".c": "c", ".h": "c", ".cc": "cpp", ".cpp": "cpp", ".hpp": "cpp",
+    ".cs": "csharp", ".swift": "swift", ".scala": "scala", ".sh": "shell", ".sql": "sql",
+    ".html": "html", ".css": "css", ".scss": "scss", ".vue": "vue",
+    ".md": "markdown", ".rst": "rst", ".txt": "text",
+    ".json": "json", ".yaml": "yaml", ".yml": "yaml", ".toml": "toml", ".ini": "ini", ".cfg": "ini", ".xml": "xml",
+}
+_NAMED_LANGUAGES = {"Dockerfile": "dockerfile", "Makefile": "make"}
+
+
+def language_of(path: str) -> str:
+    """Language of a file guessed from its name; empty when unknown."""
+    name = os.path.basename(path)
+    return _NAMED_LANGUAGES.get(name) or LANGUAGES.get(os.path.splitext(name)[1].lower(), "")
+
+
+def _in_folder(path: str, folder: str) -> bool:
+    folder = folder.strip("/")
+    return folder in ("", ".") or path == folder or path.startswith(folder + "/")
+
+
+def _content_key(digest: str, path: str) -> tuple:
+    """Files share summaries only with the same content and extension; outlines depend on both."""
+    return digest, os.path.splitext(path)[1].lower()
+
+
+class RepoMap:
+    """
+    Path, size, line count, estimated tokens, language, top-level symbols and
+    a one-line summary for every file under `base_dir`.
+
+    The map is stored in a JSON cache file. On `refresh`, files whose size and
+    modification time are unchanged are not read. Changed files are read and
+    hashed, and their fields are recomputed only if no cached file had the
+    same content. `precomputed(file)` may return the hash and map fields
+    already computed for an unchanged file, e.g. `Prefetcher.record`; such
+    files are not read at all.
+    """
+
+    def __init__(self, base_dir: Path, read_text=None, cache_file: Optional[Path] = None,
+                 precomputed: Optional[Callable[[Path], Optional[Dict[str, object]]]] = None):
+        self.base_dir = Path(base_dir).resolve()
+        self.read_text = read_text or (lambda path: path.read_text(encoding="utf-8"))
+        self.precomputed = precomputed
+        digest = content_hash(str(self.base_dir))[:16]
+        self.cache_file = cache_file or default_cache_dir() / "repo_maps" / f"{digest}.json"
+        self.stages = resolve_stages(MAP_STAGES)
+        self._entries: Dict[str, Dict[str, object]] = self._load()
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.computed = 0  # files summarized because no cached file had their content
+
+    def _load(self) -> Dict[str, Dict[str, object]]:
+        try:
+            return json.loads(self.cache_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def save(self) -> None:
+        """Writes the map to its cache file if `refresh` changed it."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._entries)
+            self._dirty = False
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=self.cache_file.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as temp:
+            temp.write(data)
+        os.replace(temp_name, self.cache_file)
+
+    def refresh(self, paths: Iterable[str], folder: str = ".") -> List[Dict[str, object]]:
+        """
+        Brings the entries under `folder` up to date with `paths` (relative to
+        the base directory) and returns their records, sorted by path.
+        """
+        with self._lock:
+            previous = dict(self._entries)
+        by_hash = {_content_key(record["sha256"], path): record
+                   for path, record in previous.items() if "sha256" in record}
+        updated = {}
+        records = []
+        changed = False
+        for relative in sorted(paths):
+            file = self.base_dir / relative
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            record = previous.get(relative)
+            if record is not None and (record["mtime_ns"], record["size"]) == (stat.st_mtime_ns, stat.st_size):
+                if "sha256" in record:
+                    note_hash(file, record["sha256"])  # ✅ Answers built from the map still depend on this file
+            else:
+                record = self._summarize(relative, file, stat, by_hash)
+                if record is None:
+                    continue
+                changed = True
+            updated[relative] = record
+            records.append(record)
+        with self._lock:
+            # ✅ Merge into the current entries; another refresh may have finished meanwhile
+            removed = [path for path in self._entries if _in_folder(path, folder) and path not in updated]
+            for path in removed:
+                del self._entries[path]
+            self._entries.update(updated)
+            self._dirty = self._dirty or changed or bool(removed)
+        return [{key: value for key, value in record.items() if key != "mtime_ns"} for record in records]
+
+    def _summarize(self, relative: str, file: Path, stat, by_hash) -> Optional[Dict[str, object]]:
+        known = self.precomputed(file) if self.precomputed else None
+        if known is not None and all(key in known for key in _PRECOMPUTED_FIELDS):
+            note_hash(file, known["sha256"])  # ✅ Answers built from the map still depend on this file
+            record = {"path": relative, "language": language_of(relative)}
+            record.update((key, known[key]) for key in _PRECOMPUTED_FIELDS)
+            record.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            return record
+        try:
+            text = self.read_text(file)
+        except UnicodeDecodeError:
+            return {"path": relative, "language": "binary", "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        except OSError:
+            return None
+        digest = content_hash(text)
+        record = {"path": relative, "language": language_of(relative)}
+        known = by_hash.get(_content_key(digest, relative))
+        if known is not None:
+            record.update((key, value) for key, value in known.items() if key not in record)
+        else:
+            record["sha256"] = digest
+            for stage in self.stages:
+                record.update(stage(relative, text))
+            self.computed += 1
+        record.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        return record
+
+
+def _describe(record: Dict[str, object], with_symbols: bool) -> str:
+    if record.get("language") == "binary":
+        return f"{record['path']}  binary, {record['size']} bytes"
+    details = ", ".join(part for part in (
+        record.get("language"), f"{record.get('lines', 0)} lines", f"~{record.get('tokens', 0)} tokens",
+    ) if part)
+    line = f"{record['path']}  {details}"
+    if record.get("summary"):
+        line += f" - {record['summary']}"
+    symbols = record.get("outline") or []
+    if with_symbols and symbols:
+        shown = ", ".join(symbols[:MAX_SYMBOLS])
+        more = f", +{len(symbols) - MAX_SYMBOLS} more" if len(symbols) > MAX_SYMBOLS else ""
+        line += f"\n    {shown}{more}"
+    return line
+
+
+def render_repo_map(records: List[Dict[str, object]], max_tokens: Optional[int] = DEFAULT_MAX_TOKENS) -> str:
+    """
+    Renders map records as one line per file (plus its top-level symbols)
+    within roughly `max_tokens`; None or 0 means no limit. Symbols are dropped
+    first; if the map still does not fit, the remaining files are counted
+    instead of listed.
+    """
+    total = sum(int(record.get("tokens", 0)) for record in records)
+    header = f"{len(records)} files, ~{total} tokens in total"
+    for with_symbols in (True, False):
+        lines = [_describe(record, with_symbols) for record in records]
+        text = "\n".join([header] + lines)
+        if not max_tokens or estimate_tokens(text) <= max_tokens:
+            return text
+    kept, used = [header], estimate_tokens(header)
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    omitted = len(records) - (len(kept) - 1)
+    kept.append(f"... {omitted} more files not shown; narrow the folder or raise max_tokens")
+    return "\n".join(kept)
@@ -0,0 +1,222 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .pipeline import fresh_record
+from .tokens import estimate_tokens
+
+SHARD_UNITS = ("bytes", "tokens")
+
+# Start a new shard at a directory boundary once the current one is this full,
+# so a directory is split across shards only when it does not fit in one.
+_DIRECTORY_BREAK_RATIO = 0.75
+
+
+@dataclass
+class ShardSection:
+    """One file, or one line range of an oversized file, placed in a shard."""
+
+    path: str
+    source: Optional[Path]
+    cost: int
+    part: int = 1
+    parts: int = 1
+    lines: Optional[Tuple[int, int]] = None
+    text: Optional[str] = None
+
+    @property
+    def header(self) -> str:
+        if self.parts == 1:
+            return f"### {self.path} ###\n"
+        return f"### {self.path} (part {self.part}/{self.parts}, lines {self.lines[0]}-{self.lines[1]}) ###\n"
+
+
+@dataclass
+class Shard:
+    file: Path
+    sections: List[ShardSection] = field(default_factory=list)
+    cost: int = 0
+
+
+def measure(text: str, unit: str) -> int:
+    """Size of `text` in the shard budget unit."""
+    return estimate_tokens(text) if unit == "tokens" else len(text.encode("utf-8"))
+
+
+def shard_file_name(output_file: Path, index: int) -> Path:
+    """`combined.txt` -> `combined.001.txt`."""
+    return output_file.with_name(f"{output_file.stem}.{index:03d}{output_file.suffix}")
+
+
+def manifest_file_name(output_file: Path) -> Path:
+    return output_file.with_name(f"{output_file.stem}.manifest.json")
+
+
+def _fitting_prefix(text: str, room: int, unit: str) -> int:
+    """Length of the longest prefix of `text` that measures at most `room`."""
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if measure(text[:middle], unit) <= room:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _pack_lines(path: str, text: str, budget: int, unit: str, parts: int) -> List[Tuple[int, int, str, int]]:
+    """
+    Packs the lines of `text` into `(first line, last line, text, cost)` chunks
+    whose header, written with `parts` as both part number and count, fits the budget.
+    """
+    newline_cost = measure("\n", unit)
+
+    def header_cost(first: int, last: int) -> int:
+        return measure(f"### {path} (part {parts}/{parts}, lines {first}-{last}) ###\n", unit) + newline_cost
+
+    chunks, current, current_cost, first_line = [], [], 0, 1
+    for number, line in enumerate(text.splitlines(keepends=True), start=1):
+        cost = measure(line, unit)
+        if current and header_cost(first_line, number) + current_cost + cost > budget:
+            chunks.append((first_line, number - 1, "".join(current), current_cost))
+            current, current_cost, first_line = [], 0, number
+        # A line longer than a chunk on its own is cut into pieces that keep its line number
+        while not current and header_cost(number, number) + cost > budget:
+            room = budget - header_cost(number, number)
+            size = _fitting_prefix(line, room, unit) if room > 0 else 0
+            if size == 0:
+                raise ValueError(f"Shard size {budget} is too small to hold any part of '{path}'.")
+            chunks.append((number, number, line[:size], measure(line[:size], unit)))
+            line = line[size:]
+            cost = measure(line, unit)
+        if line:
+            current.append(line)
+            current_cost += cost
+    if current:
+        chunks.append((first_line, number, "".join(current), current_cost))
+    return chunks
+
+
+def _split_lines(path: str, source: Optional[Path], text: str, budget: int, unit: str) -> List[ShardSection]:
+    """
+    Splits an oversized file on line boundaries into chunks that fit the budget,
+    counting each chunk's own header.
+    """
+    parts = 1
+    while True:
+        chunks = _pack_lines(path, text, budget, unit, parts)
+        # Part numbers only grow the header by their digits, so stop once the width is settled
+        if len(str(len(chunks))) <= len(str(parts)):
+            break
+        parts = len(chunks)
+    sections = []
+    for i, (start, end, chunk, cost) in enumerate(chunks, start=1):
+        section = ShardSection(path=path, source=source, cost=0, part=i, parts=len(chunks),
+                               lines=(start, end), text=chunk)
+        section.cost = measure(section.header, unit) + cost + measure("\n", unit)
+        sections.append(section)
+    return sections
+
+
+def plan_shards(output_file: Path, files: Iterable[Tuple[str, Path]], budget: int, unit: str,
+                read_text: Callable[[Path], str], prelude: Optional[Tuple[str, str]] = None,
+                records: Optional[Mapping[str, Dict]] = None,
+                extra_sections: Optional[Callable[[str, Path], Iterable[Tuple[str, str]]]] = None) -> List[Shard]:
+    """
+    Packs `(relative path, file)` pairs, in order, into shards of at most `budget` units.
+
+    Files are never split unless they are larger than a shard on their own; a new
+    shard is also started at a directory boundary once the current one is mostly
+    full, so related paths stay together. `prelude` is an optional `(name, text)`
+    section placed first, e.g. the directory tree. `records` are pipeline
+    results keyed by path whose token counts are reused when unit is "tokens"
+    and the file is unchanged since the worker read it. `extra_sections(path,
+    file)` returns `(name, text)` sections placed right after that file, e.g.
+    its diff. Each file is read once; the planned sections keep its text.
+    """
+    if unit not in SHARD_UNITS:
+        raise ValueError(f"Unknown shard unit '{unit}'; expected one of {SHARD_UNITS}.")
+    if budget <= 0:
+        raise ValueError("Shard size must be positive.")
+
+    newline_cost = measure("\n", unit)
+    sections: List[ShardSection] = []
+
+    def add(section: ShardSection, tokens: Optional[int] = None) -> None:
+        if tokens is not None:
+            # The header ends in a newline, so token estimates of header and text add up
+            section.cost = measure(section.header, unit) + tokens + newline_cost
+        else:
+            section.cost = measure(section.header + section.text + "\n", unit)
+        if section.cost > budget:
+            sections.extend(_split_lines(section.path, section.source, section.text, budget, unit))
+        else:
+            sections.append(section)
+
+    if prelude:
+        name, text = prelude
+        cost = measure(text, unit)
+        if cost > budget:
+            sections.extend(_split_lines(name, None, text, budget, unit))
+        else:
+            sections.append(ShardSection(path=name, source=None, cost=cost, text=text))
+    for path, source in files:
+        text = read_text(source)
+        record = fresh_record(records, path, source) if unit == "tokens" else None
+        add(ShardSection(path=path, source=source, cost=0, text=text),
+            record.get("tokens") if record is not None else None)
+        for name, extra in (extra_sections(path, source) if extra_sections else ()):
+            add(ShardSection(path=name, source=source, cost=0, text=extra))
+
+    shards: List[Shard] = []
+    current: Optional[Shard] = None
+    previous_dir = None
+    for section in sections:
+        directory = str(Path(section.path).parent)
+        full = current is not None and current.sections and (
+            current.cost + section.cost > budget
+            or (directory != previous_dir and section.part == 1
+                and current.cost >= budget * _DIRECTORY_BREAK_RATIO)
+        )
+        if current is None or full:
+            current = Shard(file=shard_file_name(output_file, len(shards) + 1))
+            shards.append(current)
+        current.sections.append(section)
+        current.cost += section.cost
+        previous_dir = directory
+    return shards
+
+
+def _write_shard(shard: Shard, read_text: Callable[[Path], str]) -> Dict:
+    with shard.file.open("w", encoding="utf-8") as out:
+        for section in shard.sections:
+            if section.source is None and section.parts == 1:
+                out.write(section.text)  # ✅ The prelude carries its own heading
+                continue
+            out.write(section.header)
+            out.write(section.text if section.text is not None else read_text(section.source))
+            out.write("\n")
+    return {
+        "file": shard.file.name,
+        "cost": shard.cost,
+        "bytes": shard.file.stat().st_size,
+        "sections": [
+            {"path": s.path, "part": s.part, "parts": s.parts, "lines": list(s.lines) if s.lines else None}
+            for s in shard.sections
+        ],
+    }
+
+
+def write_shards(output_file: Path, shards: List[Shard], budget: int, unit: str,
+                 read_text: Callable[[Path], str], max_workers: Optional[int] = None) -> Path:
+    """Writes the shards concurrently, then a manifest listing each shard's contents."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        written = list(executor.map(lambda shard: _write_shard(shard, read_text), shards))
+    manifest = manifest_file_name(output_file)
+    manifest.write_text(
+        json.dumps({"unit": unit, "budget": budget, "shards": written}, indent=2),
+        encoding="utf-8",
+    )
+    return manifest
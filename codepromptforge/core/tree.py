@@ -0,0 +1,87 @@
+from typing import Dict, Iterable, List, Optional
+
+
+class _Node:
+    __slots__ = ("dirs", "files", "file_count")
+
+    def __init__(self):
+        self.dirs: Dict[str, "_Node"] = {}
+        self.files: List[str] = []
+        self.file_count = 0
+
+
+def _build_trie(paths: Iterable[str]) -> _Node:
+    root = _Node()
+    for path in paths:
+        *parts, name = path.replace("\\", "/").split("/")
+        node = root
+        node.file_count += 1
+        for part in parts:
+            if part in ("", "."):
+                continue
+            node = node.dirs.setdefault(part, _Node())
+            node.file_count += 1
+        node.files.append(name)
+    return root
+
+
+def _plural(count: int) -> str:
+    return f"{count} file" if count == 1 else f"{count} files"
+
+
+def render_tree(paths: Iterable[str], max_depth: Optional[int] = None, max_entries: Optional[int] = None,
+                indent: str = "  ") -> str:
+    """
+    Renders relative file paths as an indented tree that prints every prefix once.
+
+    - Chains of directories holding a single sub-directory and no files are
+      merged into one line (`src/app/core/`).
+    - Directories deeper than `max_depth` are collapsed into one line with
+      their file count; `max_depth=0` collapses the whole tree into `./ (N files)`.
+    - At most `max_entries` entries are listed per directory; the rest are
+      summarised as `... N more entries (M files)`.
+    """
+    root = _build_trie(paths)
+    if max_depth == 0:
+        return f"./ ({_plural(root.file_count)})" if root.file_count else ""
+    lines: List[str] = []
+
+    def walk(node: _Node, depth: int) -> None:
+        entries = []
+        for name in sorted(node.dirs):
+            child, label = node.dirs[name], name
+            while len(child.dirs) == 1 and not child.files:
+                (sub_name, sub_child), = child.dirs.items()
+                child, label = sub_child, f"{label}/{sub_name}"
+            entries.append((label, child))
+        entries.extend((name, None) for name in sorted(node.files))
+
+        shown = entries if max_entries is None else entries[:max_entries]
+        for label, child in shown:
+            prefix = indent * depth
+            if child is None:
+                lines.append(f"{prefix}{label}")
+            elif max_depth is not None and depth + 1 >= max_depth:
+                lines.append(f"{prefix}{label}/ ({_plural(child.file_count)})")
+            else:
+                lines.append(f"{prefix}{label}/")
+                walk(child, depth + 1)
+        hidden = entries[len(shown):]
+        if hidden:
+            hidden_files = sum(1 if child is None else child.file_count for _, child in hidden)
+            lines.append(f"{indent * depth}... {len(hidden)} more entries ({_plural(hidden_files)})")
+
+    walk(root, 0)
+    return "\n".join(lines)
+
+
+def format_tree(paths: Iterable[str], style: str = "flat", max_depth: Optional[int] = None,
+                max_entries: Optional[int] = None) -> str:
+    """
+    Renders the directory tree section of a combined prompt: one path per line
+    for the "flat" style without limits, otherwise `render_tree`.
+    """
+    paths = list(paths)
+    if style == "compact" or max_depth is not None or max_entries is not None:
+        return render_tree(paths, max_depth=max_depth, max_entries=max_entries) + "\n"
+    return "\n".join(paths) + "\n"
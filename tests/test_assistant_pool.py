@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from codepromptforge.assistant.common import AssistantPool, AssistantRegistry
+from codepromptforge.core.main import CodePromptForge
+
+builds = []
+
+
+def build_recording_assistant(llm, base_dir, forge=None, **options):
+    time.sleep(0.02)
+    assistant = {"llm": llm, "base_dir": base_dir, "forge": forge, "options": options}
+    builds.append(assistant)
+    return assistant
+
+
+AssistantRegistry.register_assistant("pool_test_assistant", build_recording_assistant)
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg-cache"))
+
+
+@pytest.fixture
+def repos(tmp_path):
+    for name in ("api", "web"):
+        (tmp_path / name).mkdir()
+    builds.clear()
+    return str(tmp_path / "api"), str(tmp_path / "web")
+
+
+def make_pool(max_size=8, **options):
+    return AssistantPool(lambda model: f"llm:{model}", max_size=max_size,
+                         forge_factory=lambda base_dir: CodePromptForge(base_dir=base_dir), **options)
+
+
+def test_assistants_llms_and_forges_are_reused(repos):
+    api, web = repos
+    pool = make_pool(response_cache="cache")
+    first = pool.get("pool_test_assistant", "qwen", api)
+    assert pool.get("pool_test_assistant", "qwen", api) is first
+    other_model = pool.get("pool_test_assistant", "llama", api)
+    other_repo = pool.get("pool_test_assistant", "qwen", web)
+
+    assert len(builds) == 3
+    assert other_model["forge"] is first["forge"]
+    assert other_repo["llm"] is first["llm"]
+    assert other_repo["forge"] is not first["forge"]
+    assert first["options"] == {"response_cache": "cache"}
+
+
+def test_least_recently_used_assistant_is_evicted(repos):
+    api, web = repos
+    pool = make_pool(max_size=2)
+    pool.get("pool_test_assistant", "qwen", api)
+    pool.get("pool_test_assistant", "qwen", web)
+    pool.get("pool_test_assistant", "qwen", api)
+    pool.get("pool_test_assistant", "llama", api)
+
+    assert [key[1:] for key in pool.keys()] == [("qwen", api), ("llama", api)]
+    pool.get("pool_test_assistant", "qwen", web)
+    assert len(builds) == 4
+
+
+def test_concurrent_requests_share_one_build(repos):
+    api, _ = repos
+    pool = make_pool()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.get("pool_test_assistant", "qwen", api)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_evicted_forges_are_closed(repos):
+    api, web = repos
+    pool = make_pool(max_size=1)
+    forge = pool.get("pool_test_assistant", "qwen", api)["forge"]
+    executor = forge.aio._executor
+    pool.get("pool_test_assistant", "qwen", web)
+
+    assert executor._shutdown
+    assert forge.aio._executor is not executor  # ✅ Still usable by a request that holds it
+    forge.close()
+
+
+def test_leased_forges_are_closed_when_released(repos):
+    api, web = repos
+    pool = make_pool(max_size=1)
+    with pool.lease("pool_test_assistant", "qwen", api) as assistant:
+        executor = assistant["forge"].aio._executor
+        pool.get("pool_test_assistant", "qwen", web)  # evicts the leased assistant
+        assert not executor._shutdown
+        assert assistant["forge"].aio._executor is executor
+    assert executor._shutdown
+
+
+def test_async_view_is_created_once_under_concurrency(repos):
+    forge = CodePromptForge(base_dir=repos[0])
+    views = []
+    threads = [threading.Thread(target=lambda: views.append(forge.aio)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    forge.close()
+    assert len({id(view) for view in views}) == 1
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from codepromptforge.core.async_forge import AsyncCodePromptForge
+from codepromptforge.core.main import CodePromptForge
+
+
+@pytest.fixture
+def codebase(tmp_path):
+    code_dir = tmp_path / "codebase"
+    (code_dir / "pkg").mkdir(parents=True)
+    for i in range(6):
+        (code_dir / "pkg" / f"mod{i}.py").write_text(f"VALUE = {i}")
+    return code_dir
+
+
+def test_async_methods_match_sync_results(codebase, tmp_path):
+    async def scenario():
+        async with AsyncCodePromptForge(base_dir=str(codebase), output_file=str(tmp_path / "out.txt")) as forge:
+            tree = await forge.get_directory_tree(".")
+            files = await forge.find_files(["py"])
+            contents = await forge.read_files(["pkg/mod0.py", "pkg/mod5.py"])
+            await forge.write_file("note.txt", "hello")
+            await forge.forge_prompt(["py"])
+            return tree, files, contents
+
+    tree, files, contents = asyncio.run(scenario())
+    sync = CodePromptForge(base_dir=str(codebase))
+    assert sorted(tree) == [f"pkg/mod{i}.py" for i in range(6)]
+    assert files == sync.find_files(["py"])
+    assert contents == {"pkg/mod0.py": "VALUE = 0", "pkg/mod5.py": "VALUE = 5"}
+    assert (codebase / ".result" / "note.txt").read_text() == "hello"
+    assert "VALUE = 3" in (tmp_path / "out.txt").read_text()
+
+
+def test_concurrency_limit_is_respected(codebase):
+    forge = AsyncCodePromptForge(base_dir=str(codebase), max_workers=8, max_concurrency=2)
+    active, peak, lock = 0, 0, threading.Lock()
+    original = forge.forge.get_file_content
+
+    def slow_read(path):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return original(path)
+
+    forge.forge.get_file_content = slow_read
+    paths = [f"pkg/mod{i}.py" for i in range(6)]
+    contents = asyncio.run(forge.read_files(paths))
+    forge.close()
+
+    assert len(contents) == 6
+    assert peak == 2
+
+
+def test_tools_support_async_invocation(codebase):
+    forge = CodePromptForge(base_dir=str(codebase))
+    tool = next(tool for tool in forge.get_tools() if tool.name == "get_file_content")
+    assert asyncio.run(tool.ainvoke({"file_path": "pkg/mod1.py"})) == "VALUE = 1"
@@ -0,0 +1,120 @@
+import json
+import subprocess
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+from codepromptforge.assistant.batch import BatchRunner, completed_job_ids, load_jobs
+from codepromptforge.assistant.common.fake_llm import FakeChatModel
+from codepromptforge.assistant.common.response_cache import ResponseCache
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg-cache"))
+
+
+@pytest.fixture
+def repos(tmp_path):
+    paths = []
+    for name in ("api", "web"):
+        repo = tmp_path / name
+        repo.mkdir()
+        (repo / "main.py").write_text(f"print('{name}')\n")
+        paths.append(str(repo))
+    return paths
+
+
+@pytest.fixture
+def jobs_file(tmp_path, repos):
+    jobs = tmp_path / "jobs.jsonl"
+    lines = [{"base_dir": repo, "prompt": f"review {i}"} for repo in repos for i in range(3)]
+    lines.append({"id": "custom", "base_dir": repos[0], "prompt": "summarise", "model": "other"})
+    jobs.write_text("\n".join(json.dumps(line) for line in lines) + "\n")
+    return jobs
+
+
+def reading_llm(model):
+    return FakeChatModel(model=model, tool_calls=[{"name": "get_file_content", "args": {"file_path": "main.py"}}])
+
+
+def test_batch_runs_every_job_with_stats(jobs_file, tmp_path):
+    created = []
+
+    def llm_factory(model):
+        created.append(model)
+        return reading_llm(model)
+
+    output = tmp_path / "results.jsonl"
+    summary = BatchRunner(llm_factory, "fake", concurrency=3).run(load_jobs(str(jobs_file)), str(output))
+
+    assert summary == {"total": 7, "skipped": 0, "ok": 7, "error": 0}
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len({r["id"] for r in results}) == 7
+    custom = next(r for r in results if r["id"] == "custom")
+    assert custom["model"] == "other" and custom["response"].startswith("[other] summarise (1 tool calls")
+    for result in results:
+        assert result["llm_calls"] == 2 and result["tool_calls"] == 1
+        assert result["input_tokens"] > 0 and result["output_tokens"] > 0
+        assert result["duration_s"] >= result["llm_s"]
+    assert sorted(created) == ["fake", "other"]
+
+
+def test_batch_resumes_after_interruption(jobs_file, tmp_path):
+    jobs = load_jobs(str(jobs_file))
+    output = tmp_path / "results.jsonl"
+    output.write_text(
+        json.dumps({"id": jobs[0].id, "status": "ok"}) + "\n"
+        + json.dumps({"id": jobs[1].id, "status": "error"}) + "\n"
+        + '{"id": "' + jobs[2].id + '", "sta'
+    )
+    assert completed_job_ids(str(output)) == {jobs[0].id}
+
+    ran = []
+    lock = threading.Lock()
+    runner = BatchRunner(reading_llm, "fake", concurrency=2)
+    original = runner.run_job
+
+    def recording(job):
+        with lock:
+            ran.append(job.id)
+        return original(job)
+
+    runner.run_job = recording
+    summary = runner.run(jobs, str(output))
+    assert summary["skipped"] == 1 and summary["ok"] == 6
+    assert jobs[0].id not in ran and sorted(ran) == sorted(job.id for job in jobs[1:])
+    assert completed_job_ids(str(output)) == {job.id for job in jobs}
+
+
+def test_shared_response_cache_keeps_answers_per_repository(tmp_path):
+    jobs_file = tmp_path / "jobs.jsonl"
+    lines = []
+    for name, source in (("small", "x = 1\n"), ("large", "x = 1\n" * 50)):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "main.py").write_text(source)
+        lines.append({"id": name, "base_dir": str(tmp_path / name), "prompt": "review main.py"})
+    jobs_file.write_text("\n".join(json.dumps(line) for line in lines) + "\n")
+
+    output = tmp_path / "results.jsonl"
+    runner = BatchRunner(reading_llm, "fake", concurrency=1,
+                         response_cache=ResponseCache(str(tmp_path / "responses.sqlite")))
+    runner.run(load_jobs(str(jobs_file)), str(output))
+
+    responses = {r["id"]: r["response"] for r in map(json.loads, output.read_text().splitlines())}
+    assert responses["small"] != responses["large"]
+
+
+def test_batch_cli_with_fake_llm(jobs_file, tmp_path):
+    output = tmp_path / "results.jsonl"
+    result = subprocess.run(
+        [sys.executable, "-m", "codepromptforge.core.cli", "batch_assistant", "--jobs", str(jobs_file),
+         "--output", str(output), "--model", "fake", "--concurrency", "4",
+         "--llm", "codepromptforge.assistant.common.fake_llm:build_fake_llm"],
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert len(output.read_text().splitlines()) == 7
@@ -0,0 +1,64 @@
+import subprocess
+import sys
+
+import pytest
+
+from codepromptforge.core.bundle import TREE_SECTION, BundleReader, InvalidBundleError, write_bundle
+from codepromptforge.core.main import CodePromptForge
+
+
+@pytest.fixture
+def codebase(tmp_path):
+    code_dir = tmp_path / "codebase"
+    code_dir.mkdir()
+    (code_dir / "util.py").write_text("print('top')")
+    (code_dir / "pkg").mkdir()
+    (code_dir / "pkg" / "util.py").write_text("print('nested é')")
+    return code_dir
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_bundle_round_trip(tmp_path, compress):
+    bundle_file = tmp_path / "out.bundle"
+    entries = write_bundle(bundle_file, [("a.py", "x = 1\n"), ("b/c.py", "y = 'ü'\n")], compress=compress)
+
+    with BundleReader(str(bundle_file)) as reader:
+        assert reader.paths() == ["a.py", "b/c.py"]
+        assert reader.read("b/c.py", verify=True) == "y = 'ü'\n"
+        assert reader.entry("a.py").sha256 == entries[0].sha256
+        assert reader.entry("a.py").tokens > 0
+
+
+def test_reader_rejects_non_bundles(tmp_path):
+    not_a_bundle = tmp_path / "plain.txt"
+    not_a_bundle.write_text("### a.py ###\nprint('hi')\n")
+    with pytest.raises(InvalidBundleError):
+        BundleReader(str(not_a_bundle))
+
+
+def test_forge_prompt_bundle_uses_relative_paths(codebase, tmp_path):
+    bundle_file = tmp_path / "combined.bundle"
+    forge = CodePromptForge(base_dir=str(codebase), output_file=str(bundle_file),
+                            output_format="bundle", include_tree=True)
+    forge.forge_prompt(["py"])
+
+    with BundleReader(str(bundle_file)) as reader:
+        assert set(reader.paths()) == {TREE_SECTION, "util.py", "pkg/util.py"}
+        assert reader.read("pkg/util.py") == "print('nested é')"
+
+
+def test_cli_extract(codebase, tmp_path):
+    bundle_file = tmp_path / "combined.bundle"
+    base = [sys.executable, "-m", "codepromptforge.core.cli"]
+    combine = subprocess.run(
+        base + ["combine", "--extensions", "py", "--output-file", str(bundle_file),
+                "--base-dir", str(codebase), "--format", "bundle", "--compress"],
+        text=True, capture_output=True,
+    )
+    assert combine.returncode == 0, combine.stderr
+
+    extract = subprocess.run(base + ["extract", "--bundle", str(bundle_file), "--path", "pkg/util.py"],
+                             text=True, capture_output=True)
+    assert extract.returncode == 0, extract.stderr
+    assert "print('nested é')" in extract.stdout
+    assert "print('top')" not in extract.stdout
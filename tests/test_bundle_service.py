@@ -0,0 +1,139 @@
+import gzip
+import os
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from codepromptforge.assistant.web_assistant.bundles import BundleService, bundle_response
+
+
+@pytest.fixture
+def codebase(tmp_path):
+    code_dir = tmp_path / "codebase"
+    code_dir.mkdir()
+    (code_dir / "main.py").write_text("print('main')\n")
+    (code_dir / "util.py").write_text("def helper():\n    return 1\n")
+    return code_dir
+
+
+@pytest.fixture
+def service(codebase, tmp_path):
+    service = BundleService(str(codebase), cache_dir=str(tmp_path / "cache"), refresh_interval=0, retire_after=0)
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def client(service):
+    app = Flask(__name__)
+
+    @app.route("/bundle")
+    def bundle():
+        return bundle_response(service.get(["py"]))
+
+    return app.test_client()
+
+
+def test_conditional_requests_and_ranges(client):
+    first = client.get("/bundle")
+    assert first.status_code == 200
+    assert "print('main')" in first.get_data(as_text=True)
+    etag = first.headers["ETag"]
+
+    assert client.get("/bundle", headers={"If-None-Match": etag}).status_code == 304
+
+    partial = client.get("/bundle", headers={"Range": "bytes=0-9"})
+    assert partial.status_code == 206
+    assert partial.get_data() == first.get_data()[:10]
+
+
+def test_gzip_stream(client):
+    plain = client.get("/bundle").get_data()
+    compressed = client.get("/bundle", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.get_data()) == plain
+    etag = compressed.headers["ETag"]
+    assert client.get("/bundle", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}).status_code == 304
+
+    refused = client.get("/bundle", headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "Content-Encoding" not in refused.headers and refused.get_data() == plain
+
+
+def test_changed_files_are_rebuilt_in_the_background(service, codebase):
+    first = service.get(["py"])
+    (codebase / "util.py").write_text("def helper():\n    return 2\n")
+    os.utime(codebase / "util.py", ns=(time.time_ns(), time.time_ns() + 10**9))
+
+    assert service.get(["py"]) is first  # served stale while the rebuild runs
+    deadline = time.monotonic() + 5
+    while service.get(["py"]).etag == first.etag and time.monotonic() < deadline:
+        time.sleep(0.01)
+    rebuilt = service.get(["py"])
+    assert rebuilt.etag != first.etag
+    assert "return 2" in rebuilt.path.read_text()
+    assert not first.path.exists()
+
+
+def test_concurrent_requests_share_one_build(service, monkeypatch):
+    builds = []
+    original = service._build
+
+    def slow_build(key):
+        builds.append(key)
+        time.sleep(0.1)
+        return original(key)
+
+    monkeypatch.setattr(service, "_build", slow_build)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.get(["py"]))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert len({result.etag for result in results}) == 1
+
+
+def wait_for_rebuild(service, first, **selection):
+    deadline = time.monotonic() + 5
+    while service.get(**selection).etag == first.etag and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return service.get(**selection)
+
+
+def test_selections_with_equal_output_do_not_share_a_file(codebase, tmp_path):
+    service = BundleService(str(codebase), cache_dir=str(tmp_path / "cache"), refresh_interval=0)
+    try:
+        only_py = service.get(["py"])
+        with_md = service.get(["py", "md"])  # there are no .md files, so the output is identical
+        assert only_py.etag == with_md.etag and only_py.path != with_md.path
+
+        (codebase / "util.py").write_text("def helper():\n    return 3\n")
+        os.utime(codebase / "util.py", ns=(time.time_ns(), time.time_ns() + 10**9))
+        wait_for_rebuild(service, only_py, extensions=["py"])
+        assert with_md.path.exists() and only_py.path.exists()  # retired files outlive in-flight requests
+    finally:
+        service.close()
+
+
+def test_tree_bundles_notice_added_files(service, codebase):
+    first = service.get(["py"], include_tree=True)
+    (codebase / "notes.md").write_text("# Notes\n")
+    rebuilt = wait_for_rebuild(service, first, extensions=["py"], include_tree=True)
+    assert "notes.md" in rebuilt.path.read_text()
+
+
+def test_least_recently_used_bundles_are_evicted(codebase, tmp_path):
+    service = BundleService(str(codebase), cache_dir=str(tmp_path / "cache"), retire_after=0, max_bundles=2)
+    try:
+        first = service.get(["py"])
+        second = service.get(["py", "md"])
+        service.get(["py"])  # touching the first selection makes the second the oldest
+        service.get(["py", "txt"])
+        assert first.path.exists() and not second.path.exists()
+        assert len(list((tmp_path / "cache").glob("*.txt"))) == 2
+    finally:
+        service.close()
@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+
+import pytest
+
+from codepromptforge.core.file_index import FLAG_EXECUTABLE, FileIndex
+from codepromptforge.core.main import CodePromptForge
+
+
+@pytest.fixture
+def codebase(tmp_path):
+    code_dir = tmp_path / "codebase"
+    for folder in ("src/app", "src/lib", "docs"):
+        (code_dir / folder).mkdir(parents=True)
+    (code_dir / "src" / "app" / "__init__.py").write_text("")
+    (code_dir / "src" / "app" / "main.py").write_text("print('app')")
+    (code_dir / "src" / "lib" / "__init__.py").write_text("")
+    (code_dir / "src" / "lib" / "tool.sh").write_text("echo hi")
+    os.chmod(code_dir / "src" / "lib" / "tool.sh", 0o755)
+    (code_dir / "docs" / "guide.md").write_text("# Guide")
+    (code_dir / "build.log").write_text("ignored")
+    (code_dir / ".gitignore").write_text("*.log\n")
+    return code_dir
+
+
+def test_indexed_listings_match_walk(codebase):
+    walking = CodePromptForge(base_dir=str(codebase))
+    indexed = CodePromptForge(base_dir=str(codebase), use_file_index=True)
+
+    for folder in (".", "src", "src/app/", str(codebase / "docs")):
+        assert indexed.get_directory_tree(folder) == walking.get_directory_tree(folder)
+    assert indexed.find_files(["py", "md"]) == walking.find_files(["py", "md"])
+    assert indexed.get_files_recursively("src") == walking.get_files_recursively("src")
+
+
+def test_index_columns(codebase):
+    forge = CodePromptForge(base_dir=str(codebase), use_file_index=True)
+    index = forge.file_index
+    rows = {index.path(row): row for row in range(len(index))}
+
+    assert "build.log" not in rows
+    tool = rows[os.path.join("src", "lib", "tool.sh")]
+    assert index.size(tool) == len("echo hi")
+    assert index.flags(tool) & FLAG_EXECUTABLE
+    assert index.mtime_ns(tool) == (codebase / "src" / "lib" / "tool.sh").stat().st_mtime_ns
+
+
+def test_writes_invalidate_the_index(codebase):
+    forge = CodePromptForge(base_dir=str(codebase), use_file_index=True)
+    before = forge.get_directory_tree(".")
+    forge.write_file("new.py", "x = 1")
+    assert set(forge.get_directory_tree(".")) - set(before) == {os.path.join(".result", "new.py")}
+
+
+def test_index_is_rebuilt_after_ttl(codebase):
+    forge = CodePromptForge(base_dir=str(codebase), use_file_index=True, file_index_ttl=0)
+    forge.get_directory_tree(".")
+    (codebase / "docs" / "extra.md").write_text("# Extra")
+    assert os.path.join("docs", "extra.md") in forge.get_directory_tree("docs")
+
+
+def test_deleted_files_are_skipped_before_the_ttl(codebase):
+    forge = CodePromptForge(base_dir=str(codebase), use_file_index=True)
+    forge.get_directory_tree(".")
+    (codebase / "docs" / "guide.md").unlink()
+
+    assert os.path.join("docs", "guide.md") not in forge.get_files_recursively("docs")
+    assert codebase / "docs" / "guide.md" not in forge.find_files(["md", "py"])
+
+
+def test_concurrent_listings_share_one_build(codebase, monkeypatch):
+    forge = CodePromptForge(base_dir=str(codebase), use_file_index=True)
+    builds = []
+    original = FileIndex.build
+
+    def slow_build(base_dir, files):
+        builds.append(base_dir)
+        time.sleep(0.05)
+        return original(base_dir, files)
+
+    monkeypatch.setattr(FileIndex, "build", staticmethod(slow_build))
+    threads = [threading.Thread(target=forge.get_directory_tree, args=(".",)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
+
+
+def test_index_stays_compact():
+    index = FileIndex()
+    info = os.stat(__file__)
+    for d in range(200):
+        for f in range(100):
+            index.add(os.path.join("services", f"svc{d}", "src", f"module_{f}.py"), info)
+    index.add(os.path.join("services", "svc0", "src", "__init__.py"), info)
+    index.freeze()
+
+    files, directories, size = index.stats()
+    assert (files, directories) == (20001, 200)
+    assert size / files < 50
+    assert list(index.paths("services/svc3", suffixes=[".py"]))[:1] == [os.path.join("services", "svc3", "src", "module_0.py")]
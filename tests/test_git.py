@@ -0,0 +1,76 @@
+import shutil
+import subprocess
+
+import pytest
+
+from codepromptforge.core.main import CodePromptForge, NoFilesFoundError
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def _git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "pkg").mkdir(parents=True)
+    (repo / "pkg" / "core.py").write_text("def core():\n    return 1\n")
+    (repo / "pkg" / "util.py").write_text("def util():\n    return 2\n")
+    _git(repo, "init", "-q")
+    _git(repo, "add", "pkg")
+    _git(repo, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "initial")
+    # Untracked build output is never listed from the index
+    (repo / "build").mkdir()
+    (repo / "build" / "generated.py").write_text("x = 1\n")
+    return repo
+
+
+def test_git_enumeration_lists_tracked_files_only(repo):
+    forge = CodePromptForge(base_dir=str(repo), enumeration="git")
+    assert sorted(forge.get_directory_tree(".")) == ["pkg/core.py", "pkg/util.py"]
+    assert sorted(forge.get_directory_tree("pkg")) == ["pkg/core.py", "pkg/util.py"]
+
+    walked = CodePromptForge(base_dir=str(repo)).get_directory_tree(".")
+    assert "build/generated.py" in walked
+
+
+def test_since_limits_combine_to_changed_files_with_diffs(repo, tmp_path):
+    (repo / "pkg" / "core.py").write_text("def core():\n    return 42\n")
+    (repo / "pkg" / "new.py").write_text("NEW = True\n")
+    (repo / ".gitignore").write_text("build/\n")
+
+    output_file = tmp_path / "changes.txt"
+    forge = CodePromptForge(base_dir=str(repo), output_file=str(output_file), since="HEAD", include_diffs=True)
+    forge.forge_prompt(["py"])
+
+    content = output_file.read_text()
+    assert "return 42" in content
+    assert "NEW = True" in content
+    assert "def util" not in content
+    assert "### pkg/core.py (diff against HEAD) ###" in content
+    assert "-    return 1" in content
+
+
+def test_sharded_output_keeps_diffs(repo, tmp_path):
+    (repo / "pkg" / "core.py").write_text("def core():\n    return 42\n")
+    (repo / ".gitignore").write_text("build/\n")
+
+    output_file = tmp_path / "changes.txt"
+    forge = CodePromptForge(base_dir=str(repo), output_file=str(output_file), since="HEAD", include_diffs=True,
+                            shard_size=4096)
+    forge.forge_prompt(["py"])
+
+    content = (tmp_path / "changes.001.txt").read_text()
+    assert "### pkg/core.py (diff against HEAD) ###" in content
+    assert "-    return 1" in content
+
+
+def test_since_without_changes_raises(repo):
+    (repo / ".gitignore").write_text("build/\n")
+    _git(repo, "add", ".gitignore")
+    _git(repo, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "ignore build")
+    forge = CodePromptForge(base_dir=str(repo), since="HEAD")
+    with pytest.raises(NoFilesFoundError):
+        forge.find_files(["py"])
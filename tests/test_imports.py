@@ -0,0 +1,101 @@
+import subprocess
+import sys
+
+import pytest
+
+from codepromptforge.core.imports import ImportGraph, parse_imports
+from codepromptforge.core.main import CodePromptForge
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def codebase(tmp_path):
+    code_dir = tmp_path / "codebase"
+    app = code_dir / "app"
+    (app / "services").mkdir(parents=True)
+    (app / "__init__.py").write_text("")
+    (app / "main.py").write_text("import os\nfrom app.services import billing\nfrom .config import SETTINGS\n")
+    (app / "config.py").write_text("SETTINGS = {}\n")
+    (app / "services" / "__init__.py").write_text("")
+    (app / "services" / "billing.py").write_text("from ..models import Invoice\n\ndef charge():\n    from . import tax\n")
+    (app / "services" / "tax.py").write_text("RATE = 0.2\n")
+    (app / "services" / "unused.py").write_text("import app.config\n")
+    (app / "models.py").write_text("class Invoice:\n    pass\n")
+    (code_dir / "README.md").write_text("# App\n")
+    return code_dir
+
+
+def test_parse_imports():
+    specs = parse_imports("import a.b, c\nfrom ..pkg import x, y\nfrom . import *\n")
+    assert specs == [(0, "a.b", []), (0, "c", []), (2, "pkg", ["x", "y"]), (1, "", [])]
+    assert parse_imports("def broken(:") == []
+
+
+def test_closure_follows_relative_and_absolute_imports(codebase):
+    forge = CodePromptForge(base_dir=str(codebase))
+    closure = {str(f.relative_to(codebase)) for f in forge.import_closure(["app/main.py"])}
+    assert closure == {
+        "app/__init__.py", "app/main.py", "app/config.py", "app/services/__init__.py", "app/services/billing.py",
+        "app/services/tax.py", "app/models.py",
+    }
+
+    shallow = {str(f.relative_to(codebase)) for f in forge.import_closure(["app/main.py"], depth=1)}
+    assert shallow == {"app/__init__.py", "app/main.py", "app/config.py", "app/services/__init__.py",
+                       "app/services/billing.py"}
+
+
+def test_parsed_imports_are_cached_by_content_hash(codebase):
+    first = ImportGraph(codebase)
+    first.closure([codebase / "app" / "main.py"])
+    first.save()
+    assert first.parsed == 6  # both empty __init__.py files share one parse
+
+    (codebase / "app" / "models.py").write_text("from .config import SETTINGS\n")
+    second = ImportGraph(codebase)
+    closure = second.closure([codebase / "app" / "main.py"])
+    assert second.parsed == 1
+    assert codebase / "app" / "config.py" in closure
+
+
+def test_cache_keeps_entries_from_other_runs(codebase):
+    first = ImportGraph(codebase)
+    first.closure([codebase / "app" / "services" / "tax.py"])
+    first.save()
+    second = ImportGraph(codebase)
+    second.closure([codebase / "app" / "config.py"])
+    second.save()
+
+    third = ImportGraph(codebase)
+    third.closure([codebase / "app" / "services" / "tax.py"], depth=0)
+    assert third.parsed == 0
+
+
+def test_import_of_a_submodule_includes_its_packages(codebase):
+    (codebase / "app" / "cli.py").write_text("import app.services.tax\n")
+    closure = ImportGraph(codebase).closure([codebase / "app" / "cli.py"])
+    assert codebase / "app" / "__init__.py" in closure
+    assert codebase / "app" / "services" / "__init__.py" in closure
+
+
+def test_combine_entry(codebase, tmp_path):
+    output_file = tmp_path / "out.txt"
+    result = subprocess.run(
+        [sys.executable, "-m", "codepromptforge.core.cli", "combine", "--entry", "app/services/billing.py",
+         "--depth", "1", "--base-dir", str(codebase), "--output-file", str(output_file)],
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    combined = output_file.read_text()
+    assert "### billing.py ###" in combined and "### models.py ###" in combined
+    assert "### tax.py ###" in combined
+    assert "### main.py ###" not in combined and "### unused.py ###" not in combined
+
+
+def test_import_closure_tool(codebase):
+    forge = CodePromptForge(base_dir=str(codebase))
+    tool = next(tool for tool in forge.get_tools() if tool.name == "get_import_closure")
+    assert tool.invoke({"file_paths": ["app/services/billing.py"], "depth": 0}) == ["app/services/billing.py"]
@@ -0,0 +1,70 @@
+import pytest
+
+from codepromptforge.core.bundle import BundleReader
+from codepromptforge.core.cache import ContentCache
+from codepromptforge.core.multiroot import MultiRootForge
+
+
+@pytest.fixture
+def roots(tmp_path):
+    service = tmp_path / "service"
+    (service / "app").mkdir(parents=True)
+    (service / "app" / "main.py").write_text("import shared")
+    (service / "vendored.py").write_text("VERSION = 1")
+    (service / ".gitignore").write_text("build/\n")
+    (service / "build").mkdir()
+    (service / "build" / "gen.py").write_text("generated")
+
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    (shared / "shared.py").write_text("def helper(): pass")
+    (shared / "vendored.py").write_text("VERSION = 1")
+    (shared / "setup.py").write_text("setup()")
+    return service, shared
+
+
+def test_combines_roots_with_qualified_paths(roots, tmp_path):
+    output_file = tmp_path / "combined.txt"
+    forge = MultiRootForge([str(r) for r in roots], output_file=str(output_file), excluded=["shared/setup.py"])
+    forge.forge_prompt(["py"])
+
+    content = output_file.read_text()
+    assert "### service/app/main.py ###\nimport shared" in content
+    assert "### shared/shared.py ###\ndef helper(): pass" in content
+    assert "build/gen.py" not in content
+    assert "setup()" not in content
+
+
+def test_identical_files_are_emitted_once(roots, tmp_path):
+    output_file = tmp_path / "combined.txt"
+    MultiRootForge([str(r) for r in roots], output_file=str(output_file)).forge_prompt(["py"])
+
+    content = output_file.read_text()
+    assert content.count("VERSION = 1") == 1
+    assert "### shared/vendored.py ###\n(identical to service/vendored.py)" in content
+
+
+def test_bundles_keep_duplicate_files_readable(roots, tmp_path):
+    output_file = tmp_path / "combined.bundle"
+    MultiRootForge([str(r) for r in roots], output_file=str(output_file), output_format="bundle").forge_prompt(["py"])
+
+    with BundleReader(str(output_file)) as reader:
+        assert reader.read("shared/vendored.py", verify=True) == "VERSION = 1"
+        first, duplicate = reader.entry("service/vendored.py"), reader.entry("shared/vendored.py")
+        assert (duplicate.offset, duplicate.length) == (first.offset, first.length)
+    assert output_file.read_bytes().count(b"VERSION = 1") == 1
+
+
+def test_duplicate_root_names_get_distinct_labels(tmp_path):
+    first, second = tmp_path / "a" / "lib", tmp_path / "b" / "lib"
+    for root in (first, second):
+        root.mkdir(parents=True)
+        (root / f"{root.parent.name}.py").write_text(root.parent.name)
+
+    forge = MultiRootForge([str(first), str(second)], output_file=str(tmp_path / "out.bundle"),
+                           output_format="bundle", content_cache=ContentCache())
+    forge.forge_prompt(["py"])
+
+    with BundleReader(str(tmp_path / "out.bundle")) as reader:
+        assert reader.paths() == ["lib/a.py", "lib-2/b.py"]
+    assert len(forge.content_cache) == 2
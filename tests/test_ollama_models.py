@@ -0,0 +1,95 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("ollama")
+
+from codepromptforge.assistant.common.ollama_models import ModelCatalog, parse_keep_alive
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Answers the subset of the Ollama API used by the catalog."""
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path, None))
+        self._reply({"models": [{"model": name} for name in self.server.models]})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(("POST", self.path, body))
+        self._reply({"model": body["model"], "response": "", "done": True})
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_ollama():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllamaHandler)
+    server.models = ["llama3:latest"]
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _host(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_list_models_is_cached_until_refresh(fake_ollama):
+    catalog = ModelCatalog(host=_host(fake_ollama), ttl=3600)
+
+    assert catalog.list_models() == ["llama3:latest"]
+    assert catalog.list_models() == ["llama3:latest"]
+    assert len(fake_ollama.requests) == 1
+
+    fake_ollama.models.append("qwen2.5:14b")
+    assert catalog.list_models() == ["llama3:latest"]
+    assert catalog.list_models(refresh=True) == ["llama3:latest", "qwen2.5:14b"]
+    assert len(fake_ollama.requests) == 2
+
+
+def test_expired_ttl_triggers_refetch(fake_ollama):
+    catalog = ModelCatalog(host=_host(fake_ollama), ttl=0)
+    catalog.list_models()
+    catalog.list_models()
+    assert len(fake_ollama.requests) == 2
+
+
+def test_has_model_accepts_untagged_names_and_refreshes_once(fake_ollama):
+    catalog = ModelCatalog(host=_host(fake_ollama), ttl=3600)
+    assert catalog.has_model("llama3")
+
+    fake_ollama.models.append("phi4:latest")
+    assert catalog.has_model("phi4:latest")
+    assert not catalog.has_model("missing")
+
+
+def test_warm_up_loads_model_with_context_and_keep_alive(fake_ollama):
+    catalog = ModelCatalog(host=_host(fake_ollama))
+    catalog.warm_up_in_background("llama3:latest", num_ctx=8192, keep_alive=-1).join(timeout=10)
+
+    method, path, body = fake_ollama.requests[-1]
+    assert (method, path) == ("POST", "/api/generate")
+    assert body["model"] == "llama3:latest"
+    assert body["options"]["num_ctx"] == 8192
+    assert body["keep_alive"] == -1
+
+
+def test_parse_keep_alive():
+    assert parse_keep_alive("-1") == -1
+    assert parse_keep_alive("300") == 300
+    assert parse_keep_alive("30m") == "30m"
@@ -0,0 +1,107 @@
+import os
+import stat
+
+import pytest
+
+from codepromptforge.core.main import CodePromptForge
+from codepromptforge.core.patch import PatchApplyError, apply_search_replace, apply_unified_diff
+
+ORIGINAL = "".join(f"line {i}\n" for i in range(1, 21))
+
+
+def test_apply_unified_diff():
+    diff = (
+        "--- a/f.txt\n+++ b/f.txt\n"
+        "@@ -2,3 +2,3 @@\n line 2\n-line 3\n+line three\n line 4\n"
+        "@@ -18,2 +18,3 @@\n line 18\n line 19\n+line 19.5\n"
+    )
+    result = apply_unified_diff(ORIGINAL, diff)
+    assert "line three\n" in result and "line 3\n" not in result
+    assert "line 19\nline 19.5\nline 20\n" in result
+
+
+def test_unified_diff_tolerates_shifted_line_numbers():
+    diff = "@@ -40,3 +40,3 @@\n line 9\n-line 10\n+line ten\n line 11\n"
+    assert "line 9\nline ten\nline 11\n" in apply_unified_diff(ORIGINAL, diff)
+
+
+def test_unified_diff_with_missing_context_fails():
+    with pytest.raises(PatchApplyError):
+        apply_unified_diff(ORIGINAL, "@@ -1,2 +1,2 @@\n nope\n-line 1\n+line one\n")
+
+
+def test_hunk_lengths_come_from_the_header():
+    original = "SELECT 1;\n-- old comment\nSELECT 2;\n"
+    diff = "--- a/q.sql\n+++ b/q.sql\n@@ -1,3 +1,3 @@\n SELECT 1;\n--- old comment\n+-- new comment\n SELECT 2;\n"
+    assert apply_unified_diff(original, diff) == "SELECT 1;\n-- new comment\nSELECT 2;\n"
+
+    with pytest.raises(PatchApplyError, match="truncated"):
+        apply_unified_diff(ORIGINAL, "@@ -1,3 +1,3 @@\n line 1\n-line 2\n+line two\n")
+
+
+def test_insertion_without_context_goes_after_the_given_line():
+    result = apply_unified_diff(ORIGINAL, "@@ -5,0 +6,2 @@\n+new a\n+new b\n")
+    assert "line 5\nnew a\nnew b\nline 6\n" in result
+
+
+def test_unified_diff_keeps_unusual_line_separators():
+    original = "page 1\fpage 2\nx = 1\u2028# note\nend\n"
+    diff = "@@ -1,3 +1,3 @@\n page 1\fpage 2\n-x = 1\u2028# note\n+x = 2\u2028# note\n end\n"
+    assert apply_unified_diff(original, diff) == "page 1\fpage 2\nx = 2\u2028# note\nend\n"
+
+    crlf = "a\r\nb\r\n"
+    assert apply_unified_diff(crlf, "@@ -1,2 +1,2 @@\n a\n-b\n+c\n") == "a\r\nc\r\n"
+
+
+def test_search_replace_requires_unique_match():
+    assert apply_search_replace("a = 1\nb = 2\n", [("b = 2", "b = 3")]) == "a = 1\nb = 3\n"
+    with pytest.raises(PatchApplyError):
+        apply_search_replace("x\nx\n", [{"search": "x", "replace": "y"}])
+    with pytest.raises(PatchApplyError):
+        apply_search_replace("x\n", [("missing", "y")])
+
+
+@pytest.fixture
+def forge(tmp_path):
+    code_dir = tmp_path / "codebase"
+    code_dir.mkdir()
+    (code_dir / "app.py").write_text(ORIGINAL)
+    return CodePromptForge(base_dir=str(code_dir))
+
+
+def test_edits_stack_in_result_folder(forge):
+    forge.apply_patch("app.py", "@@ -1,2 +1,2 @@\n-line 1\n+line one\n line 2\n")
+    forge.edit_file("app.py", [{"search": "line 2\n", "replace": "line two\n"}])
+
+    result = (forge.result_dir / "app.py").read_text()
+    assert result.startswith("line one\nline two\nline 3\n")
+    assert (forge.base_dir / "app.py").read_text() == ORIGINAL
+
+
+def test_write_files_is_batched_and_atomic(forge):
+    forge.write_files({"pkg/a.py": "A", "pkg/b.py": "B"})
+    assert (forge.result_dir / "pkg" / "a.py").read_text() == "A"
+    assert (forge.result_dir / "pkg" / "b.py").read_text() == "B"
+
+    with pytest.raises(ValueError):
+        forge.write_files({"ok.py": "fine", "../escape.py": "nope"})
+    assert not (forge.result_dir / "ok.py").exists()
+    assert not list(forge.result_dir.rglob("*.tmp"))
+
+
+def test_result_files_keep_a_normal_mode(forge):
+    forge.write_file("new.py", "x = 1\n")
+    new_file = forge.result_dir / "new.py"
+    mask = os.umask(0)
+    os.umask(mask)
+    assert stat.S_IMODE(new_file.stat().st_mode) == 0o666 & ~mask
+
+    new_file.chmod(0o755)
+    forge.write_files({"new.py": "x = 2\n"})
+    assert stat.S_IMODE(new_file.stat().st_mode) == 0o755
+
+
+def test_edit_file_tool(forge):
+    tool = next(tool for tool in forge.get_tools() if tool.name == "edit_file")
+    tool.invoke({"file_path": "app.py", "edits": [{"search": "line 20\n", "replace": "last line\n"}]})
+    assert (forge.result_dir / "app.py").read_text().endswith("line 19\nlast line\n")
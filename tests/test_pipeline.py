@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from codepromptforge.core.bundle import BundleReader
+from codepromptforge.core.cache import content_hash
+from codepromptforge.core.main import CodePromptForge
+from codepromptforge.core.pipeline import FilePipeline, fresh_record, resolve_stages
+from codepromptforge.core.tokens import estimate_tokens
+
+
+@pytest.fixture
+def codebase(tmp_path):
+    code_dir = tmp_path / "codebase"
+    (code_dir / "pkg").mkdir(parents=True)
+    for i in range(40):
+        (code_dir / "pkg" / f"mod{i:02d}.py").write_text(f"class Model{i}:\n    pass\n\n\ndef helper_{i}():\n    return {i}\n")
+    (code_dir / "pkg" / "broken.py").write_text("def broken(:\n")
+    (code_dir / "notes.md").write_text("# Notes\n")
+    return code_dir
+
+
+def test_process_pool_matches_serial_and_keeps_order(codebase):
+    paths = [f"pkg/mod{i:02d}.py" for i in reversed(range(40))]
+    stages = ["hash", "tokens", "lines", "outline"]
+    serial = FilePipeline(stages, workers=1).run(codebase, paths)
+    parallel = FilePipeline(stages, workers=3, chunk_size=4).run(codebase, paths)
+
+    assert parallel == serial
+    assert [record["path"] for record in parallel] == paths
+    text = (codebase / "pkg" / "mod07.py").read_text()
+    record = next(r for r in parallel if r["path"] == "pkg/mod07.py")
+    assert record["sha256"] == content_hash(text)
+    assert record["tokens"] == estimate_tokens(text)
+    assert record["lines"] == 6
+    assert record["outline"] == ["class Model7", "def helper_7"]
+
+
+def test_outline_tolerates_syntax_errors_and_other_languages(codebase):
+    records = FilePipeline(["outline"]).run(codebase, ["pkg/broken.py", "notes.md"])
+    assert [record["outline"] for record in records] == [[], []]
+
+
+def test_files_that_are_not_text_are_marked_binary(codebase):
+    (codebase / "pkg" / "logo.py").write_bytes(b"\xff\xfe\x00binary")
+    records = FilePipeline(["hash"], workers=2).run(codebase, ["pkg/logo.py", "pkg/mod01.py"])
+    assert records[0]["binary"] is True and "sha256" not in records[0]
+    assert "sha256" in records[1]
+
+
+def test_records_of_changed_files_are_not_reused(codebase):
+    records = {r["path"]: r for r in FilePipeline(["hash", "tokens"]).run(codebase, ["pkg/mod01.py"])}
+    file = codebase / "pkg" / "mod01.py"
+    assert fresh_record(records, "pkg/mod01.py", file) is records["pkg/mod01.py"]
+    file.write_text("changed = True\n")
+    assert fresh_record(records, "pkg/mod01.py", file) is None
+
+
+def test_unknown_stage_is_rejected():
+    with pytest.raises(ValueError):
+        resolve_stages(["hash", "minify"])
+
+
+def test_bundle_index_is_identical_with_workers(codebase, tmp_path):
+    indexes = []
+    for workers, name in ((1, "serial.bundle"), (2, "parallel.bundle")):
+        forge = CodePromptForge(base_dir=str(codebase), output_file=str(tmp_path / name),
+                                output_format="bundle", workers=workers)
+        forge.forge_prompt(["py"])
+        with BundleReader(str(tmp_path / name)) as reader:
+            indexes.append([(e.path, e.sha256, e.tokens, e.size) for e in reader.entries()])
+    assert indexes[0] == indexes[1]
+
+
+def test_token_shards_are_identical_with_workers(codebase, tmp_path):
+    manifests = []
+    for workers, name in ((1, "serial.txt"), (2, "parallel.txt")):
+        forge = CodePromptForge(base_dir=str(codebase), output_file=str(tmp_path / name),
+                                shard_size=200, shard_unit="tokens", workers=workers)
+        forge.forge_prompt(["py"])
+        manifest = json.loads((tmp_path / name.replace(".txt", ".manifest.json")).read_text())
+        manifests.append([(shard["cost"], shard["sections"]) for shard in manifest["shards"]])
+    assert manifests[0] == manifests[1]
+
+
+def test_index_files_follows_find_files_order(codebase):
+    forge = CodePromptForge(base_dir=str(codebase), workers=2)
+    records = forge.index_files(["py", "md"], stages=["lines"])
+    expected = [str(path.relative_to(codebase)) for path in forge.find_files(["py", "md"])]
+    assert [record["path"] for record in records] == expected
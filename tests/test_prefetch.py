@@ -0,0 +1,123 @@
+import threading
+
+import pytest
+
+from codepromptforge.core.cache import ContentCache
+from codepromptforge.core.main import CodePromptForge
+from codepromptforge.core.prefetch import Prefetcher
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg-cache"))
+
+
+@pytest.fixture
+def codebase(tmp_path):
+    code_dir = tmp_path / "codebase"
+    code_dir.mkdir()
+    for name in ("a", "b", "c", "d"):
+        (code_dir / f"{name}.py").write_text(f"def {name}():\n    pass\n")
+    (code_dir / "big.py").write_text("x = 1\n" * 1000)
+    return code_dir
+
+
+def test_listing_tool_warms_the_cache(codebase):
+    cache = ContentCache()
+    forge = CodePromptForge(base_dir=str(codebase), content_cache=cache,
+                            prefetcher=Prefetcher(cache, max_files=3, stages=["hash", "outline"]))
+    tool = next(tool for tool in forge.get_tools() if tool.name == "find_files")
+    tool.invoke({"extensions": ["py"]})
+    forge.prefetcher.wait(timeout=5)
+
+    assert len(cache) == 3
+    assert codebase / "a.py" in cache and codebase / "d.py" not in cache
+    assert forge.prefetcher.record(codebase / "a.py")["outline"] == ["def a"]
+    (codebase / "a.py").write_text("def renamed():\n    pass\n")
+    assert forge.prefetcher.record(codebase / "a.py") is None
+
+
+def test_directory_tree_tool_warms_the_listed_folder(codebase):
+    (codebase / "pkg").mkdir()
+    (codebase / "pkg" / "inner.py").write_text("def inner():\n    pass\n")
+    cache = ContentCache()
+    forge = CodePromptForge(base_dir=str(codebase), content_cache=cache, prefetcher=Prefetcher(cache))
+    tool = next(tool for tool in forge.get_tools() if tool.name == "get_directory_tree")
+    assert tool.invoke({"folder_path": "pkg"}) == ["pkg/inner.py"]
+    forge.prefetcher.wait(timeout=5)
+
+    assert codebase / "pkg" / "inner.py" in cache and codebase / "a.py" not in cache
+    forge.close()
+
+
+def test_byte_budget_skips_files_that_do_not_fit(codebase):
+    cache = ContentCache()
+    prefetcher = Prefetcher(cache, max_bytes=100)
+    prefetcher.schedule([codebase / "big.py", codebase / "a.py"])
+    prefetcher.wait(timeout=5)
+    assert codebase / "a.py" in cache and codebase / "big.py" not in cache
+
+
+def test_new_listing_supersedes_the_running_batch(codebase):
+    started, release = threading.Event(), threading.Event()
+
+    def blocking_stage(path, text):
+        started.set()
+        release.wait(5)
+        return {}
+
+    cache = ContentCache()
+    prefetcher = Prefetcher(cache, stages=[blocking_stage])
+    prefetcher.schedule([codebase / "a.py", codebase / "b.py"])
+    started.wait(5)
+    prefetcher.schedule([codebase / "c.py"])
+    release.set()
+    prefetcher.wait(timeout=5)
+
+    assert codebase / "c.py" in cache
+    assert codebase / "b.py" not in cache
+
+
+def test_writes_cancel_prefetching(codebase):
+    cache = ContentCache()
+    forge = CodePromptForge(base_dir=str(codebase), content_cache=cache, prefetcher=Prefetcher(cache))
+    generation = forge.prefetcher._generation
+    forge.write_file("notes.md", "done")
+    assert forge.prefetcher._generation == generation + 1
+
+
+def test_stages_see_relative_paths_and_feed_the_repo_map(codebase):
+    seen = []
+
+    def recording_stage(path, text):
+        seen.append(path)
+        return {}
+
+    cache = ContentCache()
+    prefetcher = Prefetcher(cache, stages=["hash", "tokens", "lines", "outline", "summary", recording_stage])
+    forge = CodePromptForge(base_dir=str(codebase), content_cache=cache, prefetcher=prefetcher)
+    forge._prefetch([codebase / "a.py"])
+    prefetcher.wait(timeout=5)
+    assert seen == ["a.py"]
+
+    reads = []
+    forge.repo_map.read_text = lambda path: reads.append(path) or path.read_text()
+    records = {record["path"]: record for record in forge.repo_map_records(".")}
+    assert records["a.py"]["outline"] == ["def a"]
+    assert codebase / "a.py" not in reads and codebase / "b.py" in reads
+    forge.close()
+
+
+def test_closing_the_forge_stops_prefetching(codebase):
+    cache = ContentCache()
+    forge = CodePromptForge(base_dir=str(codebase), content_cache=cache, prefetcher=Prefetcher(cache))
+    forge._prefetch([codebase / "a.py"])
+    forge.prefetcher.wait(timeout=5)
+    executor = forge.prefetcher._executor
+    forge.close()
+
+    assert executor._shutdown
+    forge._prefetch([codebase / "b.py"])  # ✅ A request still holding the forge keeps working
+    forge.prefetcher.wait(timeout=5)
+    assert codebase / "b.py" in cache
+    forge.close()
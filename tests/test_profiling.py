@@ -0,0 +1,89 @@
+import asyncio
+import json
+import subprocess
+import sys
+
+import pytest
+
+from codepromptforge.core.main import CodePromptForge
+from codepromptforge.core.profiling import PROFILER, Profiler
+
+
+@pytest.fixture
+def profiler():
+    PROFILER.reset()
+    PROFILER.enable(trace=True)
+    yield PROFILER
+    PROFILER.disable()
+    PROFILER.reset()
+
+
+@pytest.fixture
+def codebase(tmp_path):
+    code_dir = tmp_path / "codebase"
+    code_dir.mkdir()
+    (code_dir / "main.py").write_text("print('main')")
+    (code_dir / "sub").mkdir()
+    (code_dir / "sub" / "util.py").write_text("print('util')")
+    return code_dir
+
+
+def test_disabled_profiler_records_nothing(codebase):
+    PROFILER.reset()
+    forge = CodePromptForge(base_dir=str(codebase))
+    forge.get_directory_tree(".")
+    assert PROFILER.spans() == {}
+    assert PROFILER.counters() == {}
+
+
+def test_forge_methods_and_tools_are_timed(profiler, codebase):
+    forge = CodePromptForge(base_dir=str(codebase))
+    forge.get_file_content("main.py")
+    tool = next(tool for tool in forge.get_tools() if tool.name == "find_files")
+    tool._run(extensions=["py"])
+
+    spans = profiler.spans()
+    assert spans["forge.get_file_content"]["count"] == 1
+    assert spans["forge.find_files"]["count"] == 1
+    assert spans["tool.find_files"]["count"] == 1
+    assert profiler.counters()["forge.files_read"] == 1
+    assert any(event["name"] == "forge.is_ignored" for event in profiler.to_json()["events"])
+
+
+def test_async_tool_calls_are_timed(profiler, codebase):
+    forge = CodePromptForge(base_dir=str(codebase))
+    tool = next(tool for tool in forge.get_tools() if tool.name == "get_file_content")
+    asyncio.run(tool.ainvoke({"file_path": "main.py"}))
+    forge.close()
+
+    assert profiler.spans()["tool.get_file_content"]["count"] == 1
+
+
+def test_prometheus_format():
+    profiler = Profiler()
+    profiler.enable()
+    profiler.record("forge.find_files", 0.5)
+    profiler.record("forge.find_files", 1.5)
+    profiler.incr("llm.calls", 3)
+
+    text = profiler.to_prometheus()
+    assert '# TYPE codepromptforge_span_seconds summary' in text
+    assert 'codepromptforge_span_seconds_sum{span="forge.find_files"} 2.000000' in text
+    assert 'codepromptforge_span_seconds_count{span="forge.find_files"} 2' in text
+    assert 'codepromptforge_events_total{name="llm.calls"} 3' in text
+
+
+def test_cli_profile_writes_json_trace(codebase, tmp_path):
+    trace_file = tmp_path / "trace.json"
+    result = subprocess.run(
+        [sys.executable, "-m", "codepromptforge.core.cli", "--profile-output", str(trace_file),
+         "tree", "--folder", ".", "--base-dir", str(codebase)],
+        text=True,
+        capture_output=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "forge.get_directory_tree" in result.stderr
+
+    trace = json.loads(trace_file.read_text())
+    assert trace["spans"]["forge.get_directory_tree"]["count"] == 1
+    assert trace["events"]
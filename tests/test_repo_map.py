@@ -0,0 +1,118 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from codepromptforge.core.main import CodePromptForge
+from codepromptforge.core.repo_map import RepoMap, language_of, render_repo_map
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def codebase(tmp_path):
+    code_dir = tmp_path / "codebase"
+    (code_dir / "app").mkdir(parents=True)
+    (code_dir / "app" / "billing.py").write_text('"""Charges customers.\n\nMore detail."""\n\nclass Invoice:\n    pass\n\ndef charge():\n    pass\n')
+    (code_dir / "app" / "tax.py").write_text("RATE = 0.2\n")
+    (code_dir / "README.md").write_text("# Billing service\n\nDetails.\n")
+    (code_dir / "logo.png").write_bytes(b"\x89PNG\r\n\x1a\n\xff\xfe")
+    return code_dir
+
+
+def records_by_path(forge, folder="."):
+    return {record["path"]: record for record in forge.repo_map_records(folder)}
+
+
+def test_records_describe_each_file(codebase):
+    records = records_by_path(CodePromptForge(base_dir=str(codebase)))
+    billing = records["app/billing.py"]
+    assert billing["language"] == "python" and billing["lines"] == 9
+    assert billing["outline"] == ["class Invoice", "def charge"]
+    assert billing["summary"] == "Charges customers."
+    assert billing["size"] == (codebase / "app" / "billing.py").stat().st_size and billing["tokens"] > 0
+    assert records["README.md"]["summary"] == "Billing service"
+    assert records["logo.png"]["language"] == "binary"
+    assert language_of("Dockerfile") == "dockerfile" and language_of("notes.unknown") == ""
+
+
+def test_map_is_maintained_incrementally(codebase):
+    first = RepoMap(codebase)
+    first.refresh(["app/billing.py", "app/tax.py", "README.md"])
+    first.save()
+    assert first.computed == 3
+
+    (codebase / "app" / "tax.py").write_text("RATE = 0.25\n")
+    (codebase / "app" / "copy.py").write_text((codebase / "app" / "billing.py").read_text())
+    stat = (codebase / "README.md").stat()
+    os.utime(codebase / "README.md", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    second = RepoMap(codebase)
+    records = second.refresh(["app/billing.py", "app/copy.py", "app/tax.py", "README.md"])
+    assert second.computed == 1  # only tax.py has new content
+    assert [record["path"] for record in records] == ["README.md", "app/billing.py", "app/copy.py", "app/tax.py"]
+    assert records[2]["outline"] == ["class Invoice", "def charge"]
+
+
+def test_refreshing_a_folder_keeps_the_rest_of_the_map(codebase):
+    forge = CodePromptForge(base_dir=str(codebase))
+    forge.repo_map_records()
+    assert set(records_by_path(forge, "app")) == {"app/billing.py", "app/tax.py"}
+    assert "README.md" in records_by_path(forge)
+    assert forge.repo_map.computed == 3  # every text file was summarized once
+
+
+def test_same_content_with_another_extension_is_summarized_again(codebase):
+    forge = CodePromptForge(base_dir=str(codebase))
+    forge.repo_map_records()
+    (codebase / "app" / "billing.txt").write_text((codebase / "app" / "billing.py").read_text())
+    records = records_by_path(forge)
+    assert records["app/billing.txt"]["outline"] == []
+    assert records["app/billing.py"]["outline"] == ["class Invoice", "def charge"]
+
+
+def test_overlapping_refreshes_keep_each_others_results(codebase):
+    (codebase / "docs").mkdir()
+    (codebase / "docs" / "guide.md").write_text("# Guide\n")
+    repo_map = RepoMap(codebase)
+
+    def read_text(path):
+        if path.name == "billing.py":
+            repo_map.refresh(["docs/guide.md"], "docs")  # finishes while the app refresh is running
+        return path.read_text(encoding="utf-8")
+
+    repo_map.read_text = read_text
+    repo_map.refresh(["app/billing.py"], "app")
+    assert set(repo_map._entries) == {"app/billing.py", "docs/guide.md"}
+
+
+def test_render_stays_within_budget(codebase):
+    records = CodePromptForge(base_dir=str(codebase)).repo_map_records()
+    full = render_repo_map(records, max_tokens=None)
+    assert "class Invoice, def charge" in full and full.startswith("4 files")
+
+    without_symbols = render_repo_map(records, max_tokens=80)
+    assert "class Invoice" not in without_symbols and "app/tax.py" in without_symbols
+
+    truncated = render_repo_map(records, max_tokens=30)
+    assert "more files not shown" in truncated
+    assert render_repo_map(records, max_tokens=0) == full
+
+
+def test_repo_map_tool_and_cli(codebase):
+    forge = CodePromptForge(base_dir=str(codebase))
+    tool = next(tool for tool in forge.get_tools("review") if tool.name == "get_repo_map")
+    assert "app/billing.py  python, 9 lines" in tool.invoke({"folder_path": "app"})
+
+    result = subprocess.run(
+        [sys.executable, "-m", "codepromptforge.core.cli", "repo_map", "--base-dir", str(codebase), "--json"],
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    paths = [json.loads(line)["path"] for line in result.stdout.splitlines()]
+    assert paths == ["README.md", "app/billing.py", "app/tax.py", "logo.png"]
@@ -0,0 +1,161 @@
+import uuid
+from typing import Any, List
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from codepromptforge.assistant.common.fake_llm import FakeChatModel
+from codepromptforge.assistant.common.react_assistant import build_react_assistant
+from codepromptforge.assistant.common.response_cache import ResponseCache
+
+
+class ReadThenAnswerModel(BaseChatModel):
+    """Reads `main.py` through the tool, then answers; counts how often it is called."""
+
+    temperature: float = 0.0
+    calls: int = 0
+    tool_call: dict = {"name": "get_file_content", "args": {"file_path": "main.py"}}
+
+    @property
+    def _llm_type(self) -> str:
+        return "read-then-answer"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages: List[Any], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        if messages[-1].type == "tool":
+            message = AIMessage(content=f"answer #{self.calls}")
+        else:
+            message = AIMessage(content="", tool_calls=[{**self.tool_call, "id": f"call-{self.calls}"}])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@pytest.fixture
+def codebase(tmp_path):
+    code_dir = tmp_path / "codebase"
+    code_dir.mkdir()
+    (code_dir / "main.py").write_text("print('main')")
+    return code_dir
+
+
+def _ask(agent, question, thread_id=None):
+    config = {"configurable": {"thread_id": thread_id or str(uuid.uuid4())}}
+    return agent.invoke({"messages": [("user", question)]}, config=config)["messages"][-1].content
+
+
+def test_repeated_question_is_served_from_cache(codebase, tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    llm = ReadThenAnswerModel()
+    agent = build_react_assistant(llm, str(codebase), response_cache=cache)
+
+    first = _ask(agent, "review main.py")
+    calls = llm.calls
+    second = _ask(agent, "review main.py")
+
+    assert second == first
+    assert llm.calls == calls
+
+
+def test_changed_dependency_invalidates_entry(codebase, tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    llm = ReadThenAnswerModel()
+    agent = build_react_assistant(llm, str(codebase), response_cache=cache)
+
+    _ask(agent, "review main.py")
+    (codebase / "main.py").write_text("print('changed')")
+    calls = llm.calls
+    _ask(agent, "review main.py")
+
+    assert llm.calls > calls
+
+
+def test_added_file_invalidates_answers_built_on_a_listing(codebase, tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    llm = ReadThenAnswerModel(tool_call={"name": "find_files", "args": {"extensions": ["py"]}})
+    agent = build_react_assistant(llm, str(codebase), response_cache=cache)
+    agent.forge.file_index_ttl = 0  # listings (and so their hashes) see new files right away
+
+    _ask(agent, "which files are there?")
+    calls = llm.calls
+    _ask(agent, "which files are there?")
+    assert llm.calls == calls
+
+    (codebase / "added.py").write_text("print('added')")
+    _ask(agent, "which files are there?")
+    assert llm.calls > calls
+
+
+def test_answers_are_not_shared_between_repositories(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    answers = []
+    for name, source in (("a", "print('a')"), ("b", "print('a much longer program')")):
+        repo = tmp_path / name
+        repo.mkdir()
+        (repo / "main.py").write_text(source)
+        llm = FakeChatModel(tool_calls=[{"name": "get_file_content", "args": {"file_path": "main.py"}}])
+        answers.append(_ask(build_react_assistant(llm, str(repo), response_cache=cache), "review main.py"))
+    assert answers[0] != answers[1]
+
+
+def test_runs_that_write_files_are_not_replayed(codebase, tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    llm = ReadThenAnswerModel(tool_call={"name": "write_file", "args": {"file_path": "x.py", "content": "x = 1"}})
+    agent = build_react_assistant(llm, str(codebase), response_cache=cache)
+
+    _ask(agent, "write x.py")
+    (codebase / ".result" / "x.py").unlink()
+    _ask(agent, "write x.py")
+    assert (codebase / ".result" / "x.py").read_text() == "x = 1"
+
+
+def test_listing_dependencies_ignore_result_and_ignored_files(codebase, tmp_path):
+    (codebase / ".gitignore").write_text("build/\n")
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    llm = ReadThenAnswerModel(tool_call={"name": "find_files", "args": {"extensions": ["py"]}})
+    agent = build_react_assistant(llm, str(codebase), response_cache=cache)
+
+    _ask(agent, "which files are there?")
+    (codebase / "build").mkdir()
+    (codebase / "build" / "generated.py").write_text("x = 1")
+    (codebase / ".result").mkdir(exist_ok=True)
+    (codebase / ".result" / "main.py").write_text("print('edited')")
+    calls = llm.calls
+    _ask(agent, "which files are there?")
+    assert llm.calls == calls
+
+
+def test_history_is_kept_for_recent_threads_only(codebase, tmp_path, monkeypatch):
+    monkeypatch.setattr("codepromptforge.assistant.common.response_cache.MAX_THREADS", 2)
+    agent = build_react_assistant(ReadThenAnswerModel(), str(codebase),
+                                  response_cache=ResponseCache(str(tmp_path / "responses.sqlite")))
+    for thread_id in ("a", "b", "c"):
+        _ask(agent, "review main.py", thread_id)
+    assert list(agent._history) == ["b", "c"]
+
+
+def test_cached_turn_is_kept_in_agent_memory(codebase, tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    llm = ReadThenAnswerModel()
+    agent = build_react_assistant(llm, str(codebase), response_cache=cache)
+    _ask(agent, "review main.py")
+
+    thread_id = str(uuid.uuid4())
+    _ask(agent, "review main.py", thread_id)
+    state = agent.get_state({"configurable": {"thread_id": thread_id}})
+    assert [m.type for m in state.values["messages"]] == ["human", "ai"]
+
+
+def test_size_based_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"), max_bytes=10)
+    cache.put("old", "123456", {})
+    cache.put("new", "abcdef", {})
+
+    assert cache.get("old") is None
+    assert cache.get("new") == "abcdef"
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from codepromptforge.core.main import CodePromptForge
+
+
+@pytest.fixture
+def codebase(tmp_path):
+    code_dir = tmp_path / "codebase"
+    code_dir.mkdir()
+    for package in ("alpha", "beta"):
+        (code_dir / package).mkdir()
+        for name in ("one", "two"):
+            (code_dir / package / f"{name}.py").write_text(f"# {package}/{name}\n" + "x = 1\n" * 20)
+    (code_dir / "big.py").write_text("".join(f"line_{i} = {i}\n" for i in range(400)))
+    return code_dir
+
+
+def _manifest(output_file):
+    return json.loads(output_file.with_name(f"{output_file.stem}.manifest.json").read_text())
+
+
+def test_shards_respect_byte_budget(codebase, tmp_path):
+    output_file = tmp_path / "combined.txt"
+    forge = CodePromptForge(base_dir=str(codebase), output_file=str(output_file), shard_size=1024)
+    forge.forge_prompt(["py"])
+
+    manifest = _manifest(output_file)
+    assert len(manifest["shards"]) > 1
+    for shard in manifest["shards"]:
+        assert shard["bytes"] <= 1024
+        assert (tmp_path / shard["file"]).exists()
+
+    sections = [s for shard in manifest["shards"] for s in shard["sections"]]
+    big_parts = [s for s in sections if s["path"] == "big.py"]
+    assert len(big_parts) > 1 and all(s["parts"] == len(big_parts) for s in big_parts)
+    assert {s["path"] for s in sections} == {"big.py", "alpha/one.py", "alpha/two.py", "beta/one.py", "beta/two.py"}
+
+
+def test_large_tree_is_split_across_shards(codebase, tmp_path):
+    for i in range(60):
+        (codebase / "alpha" / f"generated_module_{i:02d}.txt").write_text("")
+    output_file = tmp_path / "combined.txt"
+    CodePromptForge(base_dir=str(codebase), output_file=str(output_file), shard_size=512,
+                    include_tree=True).forge_prompt(["py"])
+
+    manifest = _manifest(output_file)
+    for shard in manifest["shards"]:
+        assert shard["bytes"] <= 512
+    tree_parts = [s for shard in manifest["shards"] for s in shard["sections"] if s["path"] == "Directory Tree"]
+    assert len(tree_parts) > 1
+
+
+def test_shard_cost_counts_everything_written(codebase, tmp_path):
+    output_file = tmp_path / "combined.txt"
+    CodePromptForge(base_dir=str(codebase), output_file=str(output_file), shard_size=1024,
+                    excluded=["big.py"]).forge_prompt(["py"])
+
+    for shard in _manifest(output_file)["shards"]:
+        assert shard["cost"] == shard["bytes"]
+
+
+def test_split_file_is_reassembled_in_order(codebase, tmp_path):
+    output_file = tmp_path / "combined.txt"
+    CodePromptForge(base_dir=str(codebase), output_file=str(output_file), shard_size=1024).forge_prompt(["py"])
+
+    content = "".join((tmp_path / s["file"]).read_text() for s in _manifest(output_file)["shards"])
+    positions = [content.index(f"line_{i} = {i}\n") for i in range(400)]
+    assert positions == sorted(positions)
+
+
+def test_token_budget_keeps_small_directories_together(codebase, tmp_path):
+    output_file = tmp_path / "combined.txt"
+    forge = CodePromptForge(base_dir=str(codebase), output_file=str(output_file),
+                            shard_size=200, shard_unit="tokens", excluded=["big.py"])
+    forge.forge_prompt(["py"])
+
+    for shard in _manifest(output_file)["shards"]:
+        assert shard["cost"] <= 200
+        assert len({s["path"].split("/")[0] for s in shard["sections"]}) == 1
+
+
+def test_tight_budget_counts_the_real_headers_and_splits_long_lines(codebase, tmp_path):
+    (codebase / "big.py").write_text("".join(f"v{i} = {i}\n" for i in range(30)) + "y" * 300 + "\n")
+    output_file = tmp_path / "combined.txt"
+    CodePromptForge(base_dir=str(codebase), output_file=str(output_file), shard_size=60,
+                    excluded=["alpha", "beta"]).forge_prompt(["py"])
+
+    shards = _manifest(output_file)["shards"]
+    for shard in shards:
+        assert shard["bytes"] == shard["cost"] <= 60
+    content = "".join((tmp_path / s["file"]).read_text() for s in shards)
+    assert content.count("lines 31-31") > 1  # the long line is cut into pieces
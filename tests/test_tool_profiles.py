@@ -0,0 +1,41 @@
+import pytest
+
+from codepromptforge.core.main import TOOL_PROFILES, CodePromptForge
+from codepromptforge.core.prompt import build_react_prompt
+
+
+@pytest.fixture
+def forge(tmp_path):
+    return CodePromptForge(base_dir=str(tmp_path))
+
+
+def test_profiles_select_their_tools(forge):
+    for profile, allowed in TOOL_PROFILES.items():
+        if allowed is None:
+            continue
+        assert sorted(tool.name for tool in forge.get_tools(profile)) == sorted(allowed)
+    review = {tool.name for tool in forge.get_tools("review")}
+    assert not review & {"write_file", "apply_patch", "clean_result_folder"}
+
+
+def test_unknown_profile_is_rejected(forge):
+    with pytest.raises(ValueError, match="Unknown tool profile"):
+        forge.get_tools("everything")
+
+
+def test_prompt_only_describes_active_tools(forge):
+    review = build_react_prompt(forge.get_tools("review"))
+    editing = build_react_prompt(forge.get_tools("editing"))
+
+    assert "get_file_content(" in review
+    assert "apply_patch" not in review and "write_file" not in review
+    assert "duckduckgo" not in review
+    assert "not modify it" in review
+    assert "apply_patch(" in editing and "not modify it" not in editing
+    assert len(review) < len(editing)
+
+
+def test_react_template_is_still_importable(forge):
+    with pytest.deprecated_call():
+        from codepromptforge.core.prompt import react_template
+    assert react_template == build_react_prompt(forge.get_tools())
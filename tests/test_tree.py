@@ -0,0 +1,87 @@
+import argparse
+
+from codepromptforge.core.cli import handle_tree
+from codepromptforge.core.main import CodePromptForge
+from codepromptforge.core.multiroot import MultiRootForge
+from codepromptforge.core.tree import render_tree
+
+PATHS = [
+    "README.md",
+    "src/app/core/engine.py",
+    "src/app/core/util.py",
+    "src/app/web/views.py",
+    "docs/a.md",
+    "docs/b.md",
+    "docs/c.md",
+]
+
+
+def test_render_tree_prints_each_prefix_once():
+    assert render_tree(PATHS) == "\n".join([
+        "docs/",
+        "  a.md",
+        "  b.md",
+        "  c.md",
+        "src/app/",
+        "  core/",
+        "    engine.py",
+        "    util.py",
+        "  web/",
+        "    views.py",
+        "README.md",
+    ])
+
+
+def test_render_tree_collapses_below_max_depth():
+    assert render_tree(PATHS, max_depth=1) == "\n".join([
+        "docs/ (3 files)",
+        "src/app/ (3 files)",
+        "README.md",
+    ])
+
+
+def test_render_tree_caps_entries_per_directory():
+    rendered = render_tree(PATHS, max_entries=2).splitlines()
+    assert rendered[:4] == ["docs/", "  a.md", "  b.md", "  ... 1 more entries (1 file)"]
+    assert rendered[-1] == "... 1 more entries (1 file)"
+
+
+def test_forge_prompt_compact_tree(tmp_path):
+    code_dir = tmp_path / "codebase"
+    (code_dir / "pkg" / "sub").mkdir(parents=True)
+    (code_dir / "pkg" / "sub" / "deep.py").write_text("# deep")
+    (code_dir / "pkg" / "top.py").write_text("# top")
+    (code_dir / "notes.txt").write_text("notes")
+
+    output_file = tmp_path / "out.txt"
+    forge = CodePromptForge(base_dir=str(code_dir), output_file=str(output_file),
+                            include_tree=True, tree_style="compact")
+    forge.forge_prompt(["py"])
+
+    content = output_file.read_text()
+    assert content.startswith("Directory Tree:\npkg/\n  sub/\n    deep.py\n  top.py\nnotes.txt\n")
+    assert "### deep.py ###\n# deep" in content
+
+
+def test_tree_command_honours_max_depth_zero(tmp_path, capsys):
+    (tmp_path / "pkg" / "sub").mkdir(parents=True)
+    (tmp_path / "pkg" / "sub" / "deep.py").write_text("# deep")
+    (tmp_path / "top.py").write_text("# top")
+    outputs = {}
+    for depth in (0, 1):
+        args = argparse.Namespace(base_dir=str(tmp_path), folder=".", compact=False, max_depth=depth, max_entries=None)
+        handle_tree(args)
+        outputs[depth] = capsys.readouterr().out.strip()
+    assert outputs[0] == "./ (2 files)"
+    assert outputs[1] == "pkg/sub/ (1 file)\ntop.py"
+
+
+def test_multi_root_tree_uses_style_and_depth(tmp_path):
+    for root in ("api", "web"):
+        (tmp_path / root / "pkg" / "sub").mkdir(parents=True)
+        (tmp_path / root / "pkg" / "sub" / "deep.py").write_text("# deep")
+    output_file = tmp_path / "out.txt"
+    MultiRootForge([str(tmp_path / "api"), str(tmp_path / "web")], output_file=str(output_file),
+                   include_tree=True, tree_style="compact", tree_max_depth=1).forge_prompt(["py"])
+
+    assert output_file.read_text().startswith("Directory Tree:\napi/pkg/sub/ (1 file)\nweb/pkg/sub/ (1 file)\n")
@@ -0,0 +1,64 @@
+import pytest
+
+from codepromptforge.assistant.web_assistant.loadtest import LoadTest, build_fake_app, percentile
+from codepromptforge.core.profiling import PROFILER
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg-cache"))
+    yield
+    PROFILER.disable()
+    PROFILER.reset()
+
+
+@pytest.fixture
+def codebase(tmp_path):
+    code_dir = tmp_path / "codebase"
+    code_dir.mkdir()
+    (code_dir / "main.py").write_text("print('hello')\n")
+    return code_dir
+
+
+def test_app_factory_keeps_a_conversation_per_session(codebase):
+    app = build_fake_app(str(codebase), tool_calls=[])
+    client = app.test_client()
+    first = client.post("/chat", json={"message": "hello"}).get_json()
+    second = client.post("/chat", json={"message": "again"}).get_json()
+
+    assert first["message"] == "[fake] hello (0 tool calls, 0 chars of tool output)"
+    assert second["message"].startswith("[fake] again")
+    assert client.post("/chat", json={}).status_code == 400
+    # A second app in the same process is independent of the first
+    assert build_fake_app(str(codebase)).test_client().get("/metrics").status_code == 200
+
+
+def test_session_switch_normalises_the_repository_path(codebase):
+    client = build_fake_app(str(codebase), tool_calls=[]).test_client()
+    response = client.post("/session", json={"base_dir": str(codebase / "sub" / "..")})
+    assert response.status_code == 200 and response.get_json()["base_dir"] == str(codebase)
+    assert client.post("/session", json={"base_dir": str(codebase.parent)}).status_code == 400
+
+
+def test_metrics_are_off_unless_requested(codebase):
+    PROFILER.disable()
+    app = build_fake_app(str(codebase), tool_calls=[], metrics=False)
+    assert app.test_client().get("/metrics").status_code == 404
+    assert not PROFILER.enabled
+
+
+def test_load_test_reports_latency_and_tool_time(codebase):
+    app = build_fake_app(str(codebase), latency=0.01)
+    report = LoadTest(app, concurrency=3).run([["one", "two"]] * 4)
+
+    assert report["requests"] == 8 and report["errors"] == 0
+    assert report["tool_calls"] == 16
+    assert report["llm_calls"] == 24
+    assert 0 < report["latency_p50_s"] <= report["latency_p99_s"] <= report["latency_max_s"]
+    assert report["throughput_rps"] > 0
+
+
+def test_percentile():
+    assert percentile([], 50) == 0.0
+    assert percentile([3, 1, 2, 4], 50) == 2
+    assert percentile(list(range(1, 101)), 99) == 99